@@ -62,7 +62,7 @@ def m_rotate2(theta1, theta2):
                      theta1, theta2)
 
 
-@guvectorize('(float64[:], float64[:,:,:], int32[:], int32[:], int32[:], float64[:])', '(n),(r,s,s),(t),(),(),(m)', target='parallel')
+@guvectorize('(float64[:], float64[:,:,:], int32[:], int32[:], int32[:], float64[:])', '(n),(r,s,s),(t),(),(),(m)', target='parallel', cache=True)
 def get_points_vec_parallel(point, t, p, trans, it, output):
     trans = trans[0]
     it = it[0]
@@ -84,7 +84,7 @@ def get_points_vec_parallel(point, t, p, trans, it, output):
         output[idx + 2] = 1
 
 
-@jit
+@jit(cache=True)
 def get_points(npoints, t, p, trans, it):
     startpoints = np.column_stack((np.random.uniform(-10, 10, npoints), np.random.uniform(-10, 10, npoints), np.ones(npoints)))
     output = np.empty((npoints, it * 3), dtype=np.float)
@@ -0,0 +1,211 @@
+"""
+Headless batch renderer for saved coordinates
+
+Renders the entries of julia_graph_coords.txt (the file written by JuliaWindow.save_graph_coords) to PNG files
+without opening a window. Every entry is rendered with the same kernels and palette as the GUI (vectorize_call),
+and the entries are spread across a process pool. With --tiles, the entries are rendered one after another instead,
+each one split into tiles that are spread across the processes of a tile renderer (see tile_pool), which keeps all
+cores busy for a few large images. With --lanes, the z^2 entries are rendered with the lane-batched kernels, in
+float32 at shallow zooms (see escape_time.z2_lanes).
+Images are computed in strips of rows that are streamed into the PNG encoder (or a memory-mapped raw RGB file),
+so the memory used only depends on the strip size and posters of any size can be rendered.
+
+Usage: python batch_render.py [-f coords file] [-o output dir] [-W width] [-H height] [-e entries] [-p processes]
+                              [-m strip memory in MB] [--raw] [--tiles] [--lanes]
+Entries are numbered from 0 in file order, e.g. -e 0,2,5-7
+"""
+
+import argparse
+import concurrent.futures
+import decimal
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+
+# graph width of the julia screen at zoom 1, see JuliaScreen in julia_final
+GRAPH_WIDTH = 5
+LIMIT = 20.0
+PALETTE = [[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]]
+# bytes per pixel of a strip: complex128 coords, float64 escape values, packed int32 colors, RGB rows and scanlines
+STRIP_PIXEL_BYTES = 16 + 8 + 4 + 3 + 3
+
+
+def load_coords(path):
+    """
+    Loads saved graph coordinates
+    :param path: coords file
+    :return: list of [mode, gx, gy, zoom, max_iter, c], c is 0 for the mandelbrot modes
+    """
+    entries = []
+    with open(path, 'r') as file:
+        for line in file:
+            args = line.strip().split(',')
+            if len(args) < 5:
+                continue
+            mode = int(args[0])
+            c = complex(args[5]) if mode in [0, 2, 4, 6] else 0j
+            entries.append([mode, decimal.Decimal(args[1]), decimal.Decimal(args[2]), float(args[3]), int(args[4]), c])
+    return entries
+
+
+def parse_entries(text, count):
+    """
+    Parses an entry selection like 0,2,5-7
+    :param text: selection, None for all entries
+    :param count: number of entries
+    :return: list of entry indices
+    """
+    if not text:
+        return list(range(count))
+    indices = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            indices.extend(range(int(first), int(last) + 1))
+        else:
+            indices.append(int(part))
+    return [i for i in indices if 0 <= i < count]
+
+
+def graph_corners(gx, gy, zoom, w, h):
+    """
+    Returns the corners of the view the GUI shows for saved coords, see GraphScreen.set_graph_view
+    :param gx: graph center x as a decimal
+    :param gy: graph center y as a decimal
+    :param zoom: total zoom
+    :param w: image width
+    :param h: image height
+    :return: bottom left and top right corners as decimals
+    """
+    gw = GRAPH_WIDTH / zoom ** .5
+    gh = gw * h / w
+    ctx = decimal.Context(prec=max(28, 24 - int(math.log10(gw))))
+    return (ctx.add(gx, decimal.Decimal(-gw / 2)), ctx.add(gy, decimal.Decimal(-gh / 2)),
+            ctx.add(gx, decimal.Decimal(w * gw / w - gw / 2)), ctx.add(gy, decimal.Decimal(h * gh / h - gh / 2)))
+
+
+def init_worker(threads):
+    # numba reads its thread count on import, so every process only takes its share of the cores
+    os.environ['NUMBA_NUM_THREADS'] = str(threads)
+
+
+def render_strips(path, mode, w, h, corners, max_iter, c, memory, raw=False, tiles=None, lanes=False):
+    """
+    Renders a graph in strips of rows, top strip first, and streams them to a file
+    Every strip is colored with the same kernels as vectorize_call, and is encoded on a second thread while the
+    next strip is computed
+    :param path: output file
+    :param mode: mode
+    :param w: image width
+    :param h: image height
+    :param corners: bottom left and top right corners as decimals
+    :param max_iter: maximum iterations
+    :param c: c
+    :param memory: bytes a strip may use
+    :param raw: writes a memory-mapped raw RGB file (h x w x 3, top row first) instead of a PNG
+    :param tiles: TileRenderer that computes the strips, None to compute them in this process
+    :param lanes: if the z^2 modes are computed with the lane kernels (not with tiles)
+    """
+    from escape_time import escape_grid, grid_coords, parse_color_data, split_decimal
+    from pngwriter import PngWriter, packed_to_rows
+
+    (bl_x, bl_x_lo), (bl_y, bl_y_lo), (tr_x, tr_x_lo), (tr_y, tr_y_lo) = [split_decimal(corner) for corner in corners]
+    lanes = lanes and tiles is None
+    zr, zr_lo, zi, zi_lo = grid_coords(mode, w, h, bl_x, bl_y, tr_x, tr_y, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo, lanes)
+    palette = np.array(PALETTE, dtype=np.int32)
+    rows = max(1, min(h, memory // (w * STRIP_PIXEL_BYTES)))
+    if raw:
+        out = np.memmap(path, dtype=np.ubyte, mode='w+', shape=(h, w, 3))
+    else:
+        out = PngWriter(path, w, h)
+
+    def write(top, strip):
+        if raw:
+            out[top:top + strip.shape[0]] = strip
+        else:
+            out.write_rows(strip)
+
+    with concurrent.futures.ThreadPoolExecutor(1) as encoder:
+        pending = None
+        for y1 in range(h, 0, -rows):
+            y0 = max(0, y1 - rows)
+            if tiles is not None and zr_lo is None:
+                # the tile pixels are rows going up, like the GUI's
+                _, pixels = tiles.render(mode, zr, zi[y0:y1], c, LIMIT, max_iter, palette)
+                strip = pixels.reshape(y1 - y0, w, 3)[::-1]
+            else:
+                color_data = escape_grid(mode, zr, zr_lo, zi[y0:y1], None if zi_lo is None else zi_lo[y0:y1],
+                                         LIMIT, max_iter, c, lanes=lanes)
+                strip = packed_to_rows(parse_color_data(color_data, max_iter, palette))
+            if pending:
+                pending.result()
+            pending = encoder.submit(write, h - y1, strip)
+        pending.result()
+    if raw:
+        out.flush()
+        del out
+    else:
+        out.close()
+
+
+def render_entry(job):
+    """
+    Renders one entry to a file, runs in a pool process
+    :param job: (index, entry, w, h, path, memory, raw, lanes)
+    :return: index, path and render time in seconds
+    """
+    index, (mode, gx, gy, zoom, max_iter, c), w, h, path, memory, raw, lanes = job
+    start = time.time()
+    render_strips(path, mode, w, h, graph_corners(gx, gy, zoom, w, h), max_iter, c, memory, raw, lanes=lanes)
+    return index, path, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Renders saved fractal coordinates to PNG files')
+    parser.add_argument('-f', '--file', default='julia_graph_coords.txt', help='coords file')
+    parser.add_argument('-o', '--out', default='renders', help='output directory')
+    parser.add_argument('-W', '--width', type=int, default=1920, help='image width')
+    parser.add_argument('-H', '--height', type=int, default=1080, help='image height')
+    parser.add_argument('-e', '--entries', default=None, help='entries to render, e.g. 0,2,5-7 (default all)')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(), help='number of processes')
+    parser.add_argument('-m', '--memory', type=int, default=256, help='memory per strip in MB')
+    parser.add_argument('--raw', action='store_true', help='write memory-mapped raw RGB files instead of PNGs')
+    parser.add_argument('--tiles', action='store_true', help='render one image at a time on a tile renderer')
+    parser.add_argument('--lanes', action='store_true', help='render z^2 entries with the lane-batched kernels')
+    args = parser.parse_args()
+
+    entries = load_coords(args.file)
+    indices = parse_entries(args.entries, len(entries))
+    os.makedirs(args.out, exist_ok=True)
+    ext = 'raw' if args.raw else 'png'
+    jobs = [(i, entries[i], args.width, args.height, os.path.join(args.out, '%03i_mode%i.%s' % (i, entries[i][0], ext)),
+             args.memory << 20, args.raw, args.lanes)
+            for i in indices]
+    processes = max(1, min(args.processes, len(jobs)))
+    threads = max(1, os.cpu_count() // processes)
+
+    start = time.time()
+    if args.tiles:
+        from tile_pool import TileRenderer
+        with TileRenderer(args.processes) as tiles:
+            for index, entry, w, h, path, memory, raw, _ in jobs:
+                mode, gx, gy, zoom, max_iter, c = entry
+                image_start = time.time()
+                render_strips(path, mode, w, h, graph_corners(gx, gy, zoom, w, h), max_iter, c, memory, raw, tiles)
+                print('#%i %s: %.3f s' % (index, path, time.time() - image_start))
+        print('%i images in %.3f s with a %i process tile renderer' % (len(jobs), time.time() - start,
+                                                                        tiles.processes))
+        return
+    # spawned processes import numba fresh instead of inheriting a forked thread pool
+    with multiprocessing.get_context('spawn').Pool(processes, init_worker, (threads,)) as pool:
+        for index, path, seconds in pool.imap_unordered(render_entry, jobs):
+            print('#%i %s: %.3f s' % (index, path, seconds))
+    print('%i images in %.3f s with %i processes' % (len(jobs), time.time() - start, processes))
+
+
+if __name__ == '__main__':
+    main()
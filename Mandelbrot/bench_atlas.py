@@ -0,0 +1,68 @@
+"""
+Benchmarks the batched julia atlas kernel against one vectorized call per thumbnail
+
+Renders atlases of the whole mandelbrot set with a few thumbnail sizes, with julia_atlas (one parallel kernel over
+the rows of all the thumbnails) and with julia_z2_vec called for every thumbnail, which can't keep the threads busy
+on small thumbnails and pays a call per thumbnail.
+
+Usage: python bench_atlas.py [size] [max_iter]
+"""
+
+import sys
+import time
+
+import numba
+import numpy as np
+
+from escape_time import atlas_grid, julia_atlas, julia_z2_vec, row_chunks
+
+
+COLUMNS = [4, 16, 64]
+
+
+def bench(func, repeat=3):
+    """
+    Returns the best time of a few calls after a warm-up call
+    :param func: function
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    limit = 20.0
+    zr = np.linspace(-2, 1, size, endpoint=False)
+    zi = np.linspace(-1.5, 1.5, size, endpoint=False)
+    print('%i x %i pixels, max_iter %i, %i threads' % (size, size, max_iter, numba.get_num_threads()))
+    for cols in COLUMNS:
+        cs, cell, tr, ti = atlas_grid(zr, zi, cols)
+        values = np.zeros((size, size), dtype=np.float64)
+        z = tr[:, None] + ti * 1j
+
+        def batched():
+            with row_chunks():
+                julia_atlas(0, cs, tr, ti, cell, limit, max_iter, values)
+
+        def per_thumbnail():
+            for i in range(cs.shape[0]):
+                for j in range(cs.shape[1]):
+                    values[i * cell:i * cell + cell - 1, j * cell:j * cell + cell - 1] = \
+                        julia_z2_vec(z, cs[i, j], limit, max_iter)
+
+        single = bench(per_thumbnail)
+        atlas = bench(batched)
+        print('%2i x %2i thumbnails of %3i px: per thumbnail %8.3f s   atlas %8.3f s   speedup %5.2fx' %
+              (cs.shape[0], cs.shape[1], cell - 1, single, atlas, single / atlas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmarks the double-double z^2 kernels against the float64 ones
+
+Usage: python bench_ddouble.py [size] [max_iter]
+"""
+
+import decimal
+import sys
+import time
+
+import numpy as np
+
+from escape_time import dd_linspace, julia_z2_dd_vec, julia_z2_vec, mandel_z2_dd_vec, mandel_z2_vec, split_decimal
+
+
+def bench(func, *args, repeat=3):
+    """
+    Returns the best time of a few calls
+    :param func: function
+    :param args: arguments
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func(*args)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func(*args)
+        best = min(best, time.time() - start)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    limit = 20.0
+    c = -.25 - .67j
+    # default saved coords, zoomed out enough that both paths see the same boundary
+    gx = decimal.Decimal('-.743643887037151')
+    gy = decimal.Decimal('0.131825904205330')
+    gw = 5 / 1e6
+    bl_x, bl_x_lo = split_decimal(gx - decimal.Decimal(gw / 2))
+    bl_y, bl_y_lo = split_decimal(gy - decimal.Decimal(gw / 2))
+    tr_x, tr_x_lo = split_decimal(gx + decimal.Decimal(gw / 2))
+    tr_y, tr_y_lo = split_decimal(gy + decimal.Decimal(gw / 2))
+
+    zr, zr_lo = dd_linspace(bl_x, bl_x_lo, tr_x, tr_x_lo, size)
+    zi, zi_lo = dd_linspace(bl_y, bl_y_lo, tr_y, tr_y_lo, size)
+    z = zr[:, None] + zi * 1j
+    jz = np.linspace(-1, 1, size, endpoint=False)[:, None] + np.linspace(-1, 1, size, endpoint=False) * 1j
+    jr = jz.real.copy()
+    ji = jz.imag.copy()
+    zeros = np.zeros(size)
+
+    pixels = size * size
+    print('%i x %i pixels, max_iter %i' % (size, size, max_iter))
+    for name, float_args, dd_args in [
+        ('mandelbrot z^2', (mandel_z2_vec, z, limit, max_iter),
+         (mandel_z2_dd_vec, zr[:, None], zr_lo[:, None], zi, zi_lo, limit, max_iter)),
+        ('julia z^2', (julia_z2_vec, jz, c, limit, max_iter),
+         (julia_z2_dd_vec, jr, zeros[:, None], ji, zeros[None, :], c, limit, max_iter)),
+    ]:
+        float_time = bench(*float_args)
+        dd_time = bench(*dd_args)
+        print('%-16s float64: %12.0f pixels/s   double-double: %12.0f pixels/s   (%.1fx slower)'
+              % (name, pixels / float_time, pixels / dd_time, dd_time / float_time))
+
+
+if __name__ == '__main__':
+    main()
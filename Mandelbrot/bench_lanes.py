@@ -0,0 +1,58 @@
+"""
+Benchmarks the lane-batched z^2 kernels against the scalar ones
+
+Renders the whole mandelbrot set (shallow enough for float32) and a view of its boundary with the scalar kernels
+(escape_rows), and with z2_lanes in float64 and float32, and counts the pixels where float32 is off.
+
+Usage: python bench_lanes.py [size] [max_iter]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from escape_time import escape_rows, f32_enough, row_chunks, z2_lanes
+
+
+def bench(func, repeat=3):
+    """
+    Returns the best time of a few calls after a warm-up call
+    :param func: function
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    limit = 20.0
+    print('%i x %i pixels, max_iter %i' % (size, size, max_iter))
+    for name, gx, gy, gw in [('whole set', -.5, 0., 3.), ('boundary', -.7436, .1318, .01)]:
+        bl_x, bl_y, tr_x, tr_y = gx - gw / 2, gy - gw / 2, gx + gw / 2, gy + gw / 2
+        zr = np.linspace(bl_x, tr_x, size, dtype=np.float64, endpoint=False)
+        zi = np.linspace(bl_y, tr_y, size, dtype=np.float64, endpoint=False)
+        zr32, zi32 = zr.astype(np.float32), zi.astype(np.float32)
+        with row_chunks():
+            scalar = bench(lambda: escape_rows(1, zr, zi, 0j, limit, max_iter))
+            lanes = bench(lambda: z2_lanes(True, zr, zi, 0j, limit, max_iter))
+            lanes32 = bench(lambda: z2_lanes(True, zr32, zi32, 0j, limit, max_iter))
+            diff = np.abs(z2_lanes(True, zr32, zi32, 0j, limit, max_iter) - escape_rows(1, zr, zi, 0j, limit, max_iter))
+        used = f32_enough(size, bl_x, bl_y, tr_x, tr_y)
+        print('%s, float32 %s' % (name, 'picked at this zoom' if used else 'too coarse at this zoom'))
+        print('  scalar float64:  %8.3f s' % scalar)
+        print('  lanes float64:   %8.3f s   speedup %5.2fx' % (lanes, scalar / lanes))
+        print('  lanes float32:   %8.3f s   speedup %5.2fx   %.2f%% of pixels off by > 0.01' %
+              (lanes32, scalar / lanes32, (diff > .01).mean() * 100))
+
+
+if __name__ == '__main__':
+    main()
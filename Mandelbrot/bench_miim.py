@@ -0,0 +1,59 @@
+"""
+Benchmarks the inverse iteration (MIIM) julia renderer against the escape time kernel
+
+Renders a few z^2 + c julia sets as a whole with julia_miim and with julia_z2_vec, and compares the escape time
+iterations of the pixels MIIM hits with those of the whole view (the boundary escapes the slowest, the interior
+counts as max_iter).
+
+Usage: python bench_miim.py [size] [max_iter]
+"""
+
+import sys
+import time
+
+import numba
+import numpy as np
+
+from escape_time import MIIM_CAP, julia_miim, julia_z2_vec
+
+
+CS = [1j, -.4 + .6j, -.8 + .156j, -.123 + .745j]
+
+
+def bench(func, repeat=3):
+    """
+    Returns the best time of a few calls after a warm-up call
+    :param func: function
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    limit = 20.0
+    xs = np.linspace(-2, 2, size, endpoint=False)
+    z = xs[:, None] + xs * 1j
+    values = np.empty((size, size), dtype=np.float64)
+    print('%i x %i pixels, max_iter %i, cap %i, %i threads' % (size, size, max_iter, MIIM_CAP,
+                                                                numba.get_num_threads()))
+    for c in CS:
+        escape = bench(lambda: julia_z2_vec(z, c, limit, max_iter))
+        miim = bench(lambda: julia_miim(c, -2., -2., 2., 2., MIIM_CAP, max_iter, values))
+        escaped = julia_z2_vec(z, c, limit, max_iter)
+        escaped[escaped == 0] = max_iter
+        hit = values > 0
+        print('c = %-15s escape time %7.3f s   miim %7.3f s   speedup %6.2fx   %6i px hit, iterations %5.1fx the mean' %
+              (c, escape, miim, escape / miim, hit.sum(), escaped[hit].mean() / escaped.mean()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmarks dynamic row scheduling against the static split of the parallel kernels
+
+On boundary-heavy views a few rows take most of the time, with the static split (one block of rows per thread) the
+threads that get them finish last while the others wait. Renders the explorer's default saved coords (zoom 9.5e21,
+double-double get_data) and a float64 view of the same boundary with the rows split statically (chunk 0) and handed
+out in chunks of a few sizes, and the float64 view with its vectorized function as well.
+
+Usage: python bench_rows.py [size] [max_iter] [float64 max_iter]
+"""
+
+import decimal
+import sys
+import time
+
+import numba
+import numpy as np
+
+from escape_time import ROW_CHUNK, escape_rows, get_data, grid_coords, mandel_z2_vec, row_chunks, split_decimal
+
+
+CHUNKS = [0, 1, ROW_CHUNK, 16]
+
+
+def bench(func, repeat=3):
+    """
+    Returns the best time of a few calls after a warm-up call
+    :param func: function
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def corners(gx, gy, gw):
+    """
+    Returns the split corners of a square view
+    :param gx: center x
+    :param gy: center y
+    :param gw: width
+    :return: bl_x, bl_y, tr_x, tr_y, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo
+    """
+    half = decimal.Decimal(gw) / 2
+    (bl_x, bl_x_lo), (bl_y, bl_y_lo) = split_decimal(gx - half), split_decimal(gy - half)
+    (tr_x, tr_x_lo), (tr_y, tr_y_lo) = split_decimal(gx + half), split_decimal(gy + half)
+    return bl_x, bl_y, tr_x, tr_y, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo
+
+
+def report(name, seconds, static):
+    print('%-26s %8.3f s   speedup %5.2fx' % (name, seconds, static / seconds))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    float_max_iter = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    limit = 20.0
+    palette = np.array([[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]], dtype=np.int32)
+    # default saved coords, see JuliaWindow.default_graph_coords (main screen width 5)
+    gx = decimal.Decimal('-.743643887037151')
+    gy = decimal.Decimal('0.131825904205330')
+    print('%i x %i pixels, %i threads' % (size, size, numba.get_num_threads()))
+
+    print('zoom 9.5e21, double-double get_data, max_iter %i' % max_iter)
+    view = corners(gx, gy, 5 / 9.5e21 ** .5)
+    pixels = np.empty(size * size * 3, dtype=np.ubyte)
+    values = np.empty((size, size), dtype=np.float64)
+    static = None
+    for chunk in CHUNKS:
+        def deep():
+            with row_chunks(chunk):
+                get_data(1, size, size, *view[:4], limit, max_iter, 0j, palette, pixels, values, *view[4:])
+        seconds = bench(deep)
+        static = static or seconds
+        report('rows, chunk %i' % chunk if chunk else 'rows, static', seconds, static)
+
+    print('width 5e-4, float64 kernels, max_iter %i' % float_max_iter)
+    zr, _, zi, _ = grid_coords(1, size, size, *corners(gx, gy, 5e-4))
+    z = zr[:, None] + zi * 1j
+    static = bench(lambda: mandel_z2_vec(z, limit, float_max_iter))
+    report('vectorized', static, static)
+    for chunk in CHUNKS:
+        def shallow():
+            with row_chunks(chunk):
+                escape_rows(1, zr, zi, 0j, limit, float_max_iter)
+        report('rows, chunk %i' % chunk if chunk else 'rows, static', bench(shallow), static)
+
+
+if __name__ == '__main__':
+    main()
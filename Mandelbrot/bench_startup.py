@@ -0,0 +1,99 @@
+"""
+Benchmarks the start-up time of the explorer's kernels
+
+Every run is a fresh process that imports escape_time and perturbation, renders the explorer's first frame (mode 1,
+progressive passes) and then calls every other kernel once on a small frame, so it measures what julia_final pays
+before its first frame and before each of its other paths: compiling, or loading the kernels from numba's cache
+(__pycache__/*.nbi, *.nbc).
+The first run after --clear is a cold start, the following ones start on a warm cache.
+
+Usage: python bench_startup.py [runs] [--clear]
+"""
+
+import glob
+import os
+import subprocess
+import sys
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHED_MODULES = ['escape_time', 'perturbation']
+
+
+def startup():
+    """
+    Imports the kernels and calls each of them once, prints the import, first frame and other kernel times
+    """
+    start = time.time()
+    import numpy as np
+    import escape_time as et
+    import perturbation
+    imported = time.time()
+
+    w, h, max_iter, limit, c = 64, 48, 100, 20.0, -.25 - .67j
+    palette = np.array([[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]], dtype=np.int32)
+    pixels = np.empty(w * h * 3, dtype=np.ubyte)
+    values = np.empty((w, h), dtype=np.float64)
+    # the first frame of the explorer, see JuliaScreen.compute
+    zr, _, zi, _ = et.grid_coords(1, w, h, -2., -1.5, 1., 1.5)
+    z, iters, color_data = et.init_state(1, zr, zi)
+    split = et.symmetric_split(1, zr, zi, 8)
+    for stride in [8, 4, 2, 1]:
+        et.resume_symmetric(1, zr, zi, c, limit, max_iter, z, iters, color_data, split, stride)
+        et.color_pixels(color_data, max_iter, palette, pixels, stride)
+    first_frame = time.time()
+
+    et.get_data(1, w, h, -2., -1.5, 1., 1.5, limit, max_iter, c, palette, pixels, values)
+    et.get_data(1, w, h, -2., -1.5, 1., 1.5, limit, max_iter, c, palette, pixels, values, 0., 0., 0., 0.,
+                et.CHECK_BULB | et.CHECK_PERIOD | et.CHECK_DERIV)
+    et.get_data(1, w, h, -.75, .13, -.75 + 1e-13, .13 + 1e-13, limit, max_iter, c, palette, pixels, values,
+                1e-30, 1e-30, 1e-30, 1e-30)
+    for mode in range(7):
+        zr, _, zi, _ = et.grid_coords(mode, w, h, -2., -1.5, 1., 1.5)
+        z, iters, color_data = et.init_state(mode, zr, zi)
+        et.resume_escape(mode, zr, zi, c, limit, max_iter, z, iters, color_data, 2)
+        et.escape_grid(mode, zr, None, zi, None, limit, max_iter, c)
+    for mode in [0, 1]:
+        zr, _, zi, _ = et.grid_coords(mode, w, h, -2., -1.5, 1., 1.5, lanes=True)
+        et.escape_grid(mode, zr, None, zi, None, limit, max_iter, c, lanes=True)
+        et.escape_grid(mode, zr.astype(np.float64), None, zi.astype(np.float64), None, limit, max_iter, c, lanes=True)
+    et.get_boundary_data(1, w, h, -2., -1.5, 1., 1.5, limit, max_iter, c, palette, pixels, values)
+    et.color_pixels(values, max_iter, palette, pixels, 2)
+    lut = et.palette_lut(palette)
+    et.lut_pixels(values, max_iter, lut, pixels)
+    cdf = et.escape_cdf(et.escape_histogram(values, max_iter), et.COLOR_EQUALIZE)
+    et.cdf_pixels(values, max_iter, cdf, lut, pixels)
+    perturbation.perturb_call(1, w, h, -.75, .13, 1e-3, 1e-3, limit, max_iter, c)
+    called = time.time()
+    print('%.3f %.3f %.3f' % (imported - start, first_frame - imported, called - first_frame))
+
+
+def clear_cache():
+    """
+    Removes the cached kernels of the benchmarked modules
+    """
+    for module in CACHED_MODULES:
+        for path in glob.glob(os.path.join(HERE, '__pycache__', module + '.*.nb[ic]')):
+            os.remove(path)
+
+
+def main():
+    if '--child' in sys.argv:
+        startup()
+        return
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    runs = int(args[0]) if args else 3
+    if '--clear' in sys.argv:
+        clear_cache()
+    print('%-6s %10s %12s %12s %10s' % ('run', 'import', 'first frame', 'other calls', 'total'))
+    for run in range(runs):
+        start = time.time()
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child'], cwd=HERE)
+        total = time.time() - start
+        imported, first_frame, called = map(float, output.split())
+        print('%-6i %9.3fs %11.3fs %11.3fs %9.3fs' % (run, imported, first_frame, called, total))
+
+
+if __name__ == '__main__':
+    main()
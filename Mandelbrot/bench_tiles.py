@@ -0,0 +1,59 @@
+"""
+Benchmarks how the tile renderer scales with its number of processes
+
+Renders a boundary-heavy view near the default saved coords (most tiles are cheap, a few are very expensive) with
+escape_grid (numba threads in one process) and with tile renderers of 1 to N processes.
+
+Usage: python bench_tiles.py [size] [max_iter] [max processes]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from escape_time import escape_grid
+from tile_pool import TileRenderer
+
+
+def bench(func, repeat=3):
+    """
+    Returns the best time of a few calls after a warm-up call
+    :param func: function
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    max_iter = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    max_processes = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    limit = 20.0
+    palette = np.array([[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]], dtype=np.int32)
+    gx, gy, gw = -.743643887037151, .131825904205330, 5e-4
+    zr = np.linspace(gx - gw / 2, gx + gw / 2, size, dtype=np.float64, endpoint=False)
+    zi = np.linspace(gy - gw / 2, gy + gw / 2, size, dtype=np.float64, endpoint=False)
+
+    print('%i x %i pixels, max_iter %i' % (size, size, max_iter))
+    base = bench(lambda: escape_grid(1, zr, None, zi, None, limit, max_iter, 0j))
+    print('escape_grid (numba threads):  %8.3f s' % base)
+    single = None
+    for processes in range(1, max_processes + 1):
+        with TileRenderer(processes) as tiles:
+            seconds = bench(lambda: tiles.render(1, zr, zi, 0j, limit, max_iter, palette))
+        single = single or seconds
+        print('tiles, %2i processes:          %8.3f s   speedup %5.2fx   efficiency %3.0f%%' %
+              (processes, seconds, single / seconds, single / seconds / processes * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1848 @@
+"""
+Escape-time kernels for the Mandelbrot and Julia explorers
+
+Kept apart from julia_final.py so they can be used without pyglet.
+Every kernel is cached on disk (cache=True), and the parallel ufuncs are only built on their first call (lazy), so
+starting the explorer on a warm cache doesn't compile anything.
+"""
+
+import contextlib
+import decimal
+import math
+
+import numpy as np
+from numba import jit, prange, vectorize, guvectorize
+
+from lazy_compile import lazy
+
+try:
+    from numba import parallel_chunksize
+except ImportError:
+    # numba < 0.57 can't hand out chunks dynamically, prange keeps its static split
+    parallel_chunksize = None
+
+
+# pixel spacing relative to the coordinates below which z^2 kernels switch to double-double
+# (float64 has to keep ~24 bits below a pixel for the rounding error of long orbits to grow into)
+DD_RESOLUTION = 2.0 ** -28
+# pixel spacing relative to the coordinates above which the z^2 lane kernels can run in float32
+# (keeps 12 of float32's 24 bits below a pixel, enough for the short orbits of shallow views)
+F32_RESOLUTION = 2.0 ** -12
+# adjacent pixels the lane kernels iterate in lockstep, enough for numba's loop vectorizer (it has no SLP pass on by
+# default) to fill a few AVX2 vectors of float64 or float32 per step
+LANES = 16
+# iterations between the lane kernels' checks if all of their lanes escaped
+LANE_CHECK = 8
+# side of the tiles the mariani-silver renderer splits the frame into, one parallel task per tile
+MS_TILE = 64
+# rectangles narrower than this are evaluated pixel by pixel instead of being split
+MS_MIN_SIZE = 4
+# rows (or columns) a thread takes from prange's queue at a time, threads that get rows on the set boundary keep
+# taking fewer chunks instead of holding up the frame (0 splits the range statically into one block per thread)
+ROW_CHUNK = 4
+# modes whose escape times are the same at conj(z) (mandelbrot sets of real polynomials, mirrored across the real axis)
+# and at -z (julia sets of even and odd maps, point reflection through 0), bit for bit
+CONJ_SYMMETRIC_MODES = [1, 3, 5]
+POINT_SYMMETRIC_MODES = [0, 6]
+# offset from the exact mirror pixel, in pixels, that still counts as aligned
+MIRROR_TOLERANCE = 1e-3
+# adaptive max_iter: max_iter at zoom 1 and its growth, (1 + log10(zoom)) ** ADAPT_POWER times ADAPT_BASE
+ADAPT_BASE = 32
+ADAPT_POWER = 1.5
+# fraction of the pixels allowed to escape in the upper half of max_iter, more means raising it would still change
+# the image
+ADAPT_TAIL = 1e-3
+# highest max_iter the adaptive mode goes to
+ADAPT_MAX = 2 ** 20
+# graph width of the julia set thumbnails of the atlas
+ATLAS_WIDTH = 4.
+# modified inverse iteration (julia_miim): hits per pixel after which the preimages of a pixel's points aren't
+# followed any further, longest chain of preimages followed from the repelling fixed point, levels of the preimage
+# tree expanded before the parallel search (2 ** MIIM_SPLIT subtrees) and side of the grid counting the hits off
+# the screen
+MIIM_CAP = 8
+MIIM_DEPTH = 64
+MIIM_SPLIT = 10
+MIIM_GRID = 1024
+# palette lookup table entries between two palette colors, colors are off by at most 1 from palette_color
+LUT_STEPS = 256
+# bins of the escape value histogram used by the auto-ranged and equalized colorings
+HIST_BINS = 4096
+# colorings: fixed max_iter // 4 iterations per palette color, palette stretched over the range of escape values,
+# palette spread evenly over the escaped pixels (histogram equalization)
+COLOR_FIXED = 0
+COLOR_AUTO = 1
+COLOR_EQUALIZE = 2
+
+# interior checks of the z^2 kernels, combined as bit flags
+CHECK_BULB = 1
+CHECK_PERIOD = 2
+CHECK_DERIV = 4
+# returned next to the escape value by the z^2 interior kernels: no check stopped the orbit, or the check that found
+# the point to be interior (1 + its index in get_data's counts)
+INTERIOR_NONE = 0
+INTERIOR_BULB = 1
+INTERIOR_PERIOD = 2
+INTERIOR_DERIV = 3
+# squared distance at which an orbit is considered to have returned to a saved point
+PERIOD_EPS2 = 1e-30
+# squared derivative magnitude below which an orbit is considered attracted to a cycle
+# (small enough that orbits passing close to the critical point 0 don't trip it)
+DERIV_EPS2 = 1e-60
+# squared derivative magnitude above which the derivative check gives up instead of overflowing
+DERIV_MAX2 = 1e200
+
+
+@jit(nopython=True, cache=True)
+def julia_z2(z, c, limit, max_iter):
+    """
+    Calculates orbit of z under T(z) = z^2 + c with z and c as the input
+    :param z: z
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration
+    """
+    limit2 = limit * limit
+    zr = z.real
+    zi = z.imag
+    cr = c.real
+    ci = c.imag
+    for n in range(max_iter):
+        zr2 = zr * zr
+        zi2 = zi * zi
+        zmag2 = zr2 + zi2
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
+        zi = 2 * zr * zi + ci
+        zr = zr2 - zi2 + cr
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def mandel_z2(c, limit, max_iter):
+    """
+    Calculates orbit of 0 under T(z) = z^2 + c with c as the input
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration
+    """
+    limit2 = limit * limit
+    zr = 0.
+    zi = 0.
+    cr = c.real
+    ci = c.imag
+    for n in range(max_iter):
+        zr2 = zr * zr
+        zi2 = zi * zi
+        zmag2 = zr2 + zi2
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
+        zi = 2 * zr * zi + ci
+        zr = zr2 - zi2 + cr
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def julia_z3(z, c, limit, max_iter):
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return n + 1 - np.log2(np.log2(zmag)) / np.log2(3)
+        z = z * z * z + c
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def mandel_z3(c, limit, max_iter):
+    z = 0j
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return n + 1 - np.log2(np.log2(zmag)) / np.log2(3)
+        z = z * z * z + c
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def julia_z15(z, c, limit, max_iter):
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return n + 1 - np.log2(np.log2(zmag)) / np.log2(1.5)
+        z = np.power(z, 1.5) + c
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def mandel_z15(c, limit, max_iter):
+    z = 0j
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return n + 1 - np.log2(np.log2(zmag)) / np.log2(1.5)
+        z = np.power(z, 1.5) + c
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def julia_sin(z, c, limit, max_iter):
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return n
+        z = c * np.sin(z)
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def julia_z2_interior(z, c, limit, max_iter, checks):
+    """
+    Same as julia_z2() but stops early on interior points
+    :param z: z
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param checks: bit flags of the interior checks to use (CHECK_PERIOD, CHECK_DERIV)
+    :return: normalized escape iteration (0 for interior points) and the INTERIOR_* code of the check that stopped it
+    """
+    limit2 = limit * limit
+    zr = z.real
+    zi = z.imag
+    cr = c.real
+    ci = c.imag
+    dr = 1.
+    di = 0.
+    # brent's cycle detection, compares against the orbit point saved at the last power of 2
+    saved_r = zr
+    saved_i = zi
+    next_save = 1
+    for n in range(max_iter):
+        zr2 = zr * zr
+        zi2 = zi * zi
+        zmag2 = zr2 + zi2
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5))), INTERIOR_NONE
+        if checks & CHECK_DERIV:
+            tmp = 2 * (zr * dr - zi * di)
+            di = 2 * (zr * di + zi * dr)
+            dr = tmp
+            dmag2 = dr * dr + di * di
+            if dmag2 == 0:
+                # the orbit hit the critical point, measure from its image instead
+                dr = 1.
+            elif dmag2 < DERIV_EPS2:
+                return 0., INTERIOR_DERIV
+            if dmag2 > DERIV_MAX2:
+                checks &= ~CHECK_DERIV
+        zi = 2 * zr * zi + ci
+        zr = zr2 - zi2 + cr
+        if checks & CHECK_PERIOD:
+            if (zr - saved_r) * (zr - saved_r) + (zi - saved_i) * (zi - saved_i) < PERIOD_EPS2:
+                return 0., INTERIOR_PERIOD
+            if n + 1 == next_save:
+                saved_r = zr
+                saved_i = zi
+                next_save *= 2
+    return 0., INTERIOR_NONE
+
+
+@jit(nopython=True, cache=True)
+def mandel_z2_interior(c, limit, max_iter, checks):
+    """
+    Same as mandel_z2() but stops early on interior points
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param checks: bit flags of the interior checks to use (CHECK_BULB, CHECK_PERIOD, CHECK_DERIV)
+    :return: normalized escape iteration (0 for interior points) and the INTERIOR_* code of the check that stopped it
+    """
+    cr = c.real
+    ci = c.imag
+    if checks & CHECK_BULB:
+        # main cardioid and period 2 bulb
+        xq = cr - .25
+        q = xq * xq + ci * ci
+        if q * (q + xq) <= .25 * ci * ci or (cr + 1) * (cr + 1) + ci * ci <= .0625:
+            return 0., INTERIOR_BULB
+    limit2 = limit * limit
+    zr = 0.
+    zi = 0.
+    # derivative with respect to z starting from z1 = c, z0 = 0 would make it 0
+    dr = 1.
+    di = 0.
+    saved_r = zr
+    saved_i = zi
+    next_save = 1
+    for n in range(max_iter):
+        zr2 = zr * zr
+        zi2 = zi * zi
+        zmag2 = zr2 + zi2
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5))), INTERIOR_NONE
+        if checks & CHECK_DERIV and n:
+            tmp = 2 * (zr * dr - zi * di)
+            di = 2 * (zr * di + zi * dr)
+            dr = tmp
+            dmag2 = dr * dr + di * di
+            if dmag2 == 0:
+                # the orbit hit the critical point, measure from its image instead
+                dr = 1.
+            elif dmag2 < DERIV_EPS2:
+                return 0., INTERIOR_DERIV
+            if dmag2 > DERIV_MAX2:
+                checks &= ~CHECK_DERIV
+        zi = 2 * zr * zi + ci
+        zr = zr2 - zi2 + cr
+        if checks & CHECK_PERIOD:
+            if (zr - saved_r) * (zr - saved_r) + (zi - saved_i) * (zi - saved_i) < PERIOD_EPS2:
+                return 0., INTERIOR_PERIOD
+            if n + 1 == next_save:
+                saved_r = zr
+                saved_i = zi
+                next_save *= 2
+    return 0., INTERIOR_NONE
+
+
+@jit(nopython=True, cache=True)
+def escape(mode, z, c, limit, max_iter):
+    """
+    Calculates the normalized escape iteration of a single point according to the mode (see vectorize_call)
+    :param mode: mode
+    :param z: z for julia sets, c for mandelbrot sets
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration
+    """
+    if mode == 0 or mode == 7:
+        return julia_z2(z, c, limit, max_iter)
+    elif mode == 1:
+        return mandel_z2(z, limit, max_iter)
+    elif mode == 2:
+        return julia_z3(z, c, limit, max_iter)
+    elif mode == 3:
+        return mandel_z3(z, limit, max_iter)
+    elif mode == 4:
+        return julia_z15(z, c, limit, max_iter)
+    elif mode == 5:
+        return mandel_z15(z, limit, max_iter)
+    return float(julia_sin(z, c, limit, max_iter))
+
+
+@lazy(vectorize('float64(complex128, complex128, float64, int32)', target='parallel', cache=True))
+def julia_z2_vec(z, c, limit, max_iter):
+    return julia_z2(z, c, limit, max_iter)
+
+
+# using guvectorize takes the same time
+@lazy(vectorize('float64(complex128, float64, int32)', target='parallel', cache=True))
+def mandel_z2_vec(c, limit, max_iter):
+    return mandel_z2(c, limit, max_iter)
+
+
+@lazy(vectorize('float64(complex128, complex128, float64, int32)', target='parallel', cache=True))
+def julia_z3_vec(z, c, limit, max_iter):
+    return julia_z3(z, c, limit, max_iter)
+
+
+@lazy(vectorize('float64(complex128, float64, int32)', target='parallel', cache=True))
+def mandel_z3_vec(c, limit, max_iter):
+    return mandel_z3(c, limit, max_iter)
+
+
+@lazy(vectorize('float64(complex128, complex128, float64, int32)', target='parallel', cache=True))
+def julia_z15_vec(z, c, limit, max_iter):
+    return julia_z15(z, c, limit, max_iter)
+
+
+@lazy(vectorize('float64(complex128, float64, int32)', target='parallel', cache=True))
+def mandel_z15_vec(c, limit, max_iter):
+    return mandel_z15(c, limit, max_iter)
+
+
+@lazy(vectorize('float64(complex128, complex128, float64, int32)', target='parallel', cache=True))
+def julia_sin_vec(z, c, limit, max_iter):
+    return julia_sin(z, c, limit, max_iter)
+
+
+@jit(nopython=True, cache=True)
+def two_sum(a, b):
+    """
+    Returns a + b as an unevaluated sum of two floats
+    """
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
+@jit(nopython=True, cache=True)
+def quick_two_sum(a, b):
+    """
+    Returns a + b as an unevaluated sum of two floats, assuming |a| >= |b|
+    """
+    s = a + b
+    return s, b - (s - a)
+
+
+@jit(nopython=True, cache=True)
+def split(a):
+    """
+    Splits a float into two non-overlapping 26 bit halves
+    """
+    t = 134217729.0 * a
+    hi = t - (t - a)
+    return hi, a - hi
+
+
+@jit(nopython=True, cache=True)
+def two_prod(a, b):
+    """
+    Returns a * b as an unevaluated sum of two floats
+    """
+    p = a * b
+    ahi, alo = split(a)
+    bhi, blo = split(b)
+    return p, ((ahi * bhi - p) + ahi * blo + alo * bhi) + alo * blo
+
+
+@jit(nopython=True, cache=True)
+def dd_add(ahi, alo, bhi, blo):
+    """
+    Adds two double-doubles
+    """
+    s, e = two_sum(ahi, bhi)
+    t, f = two_sum(alo, blo)
+    e += t
+    s, e = quick_two_sum(s, e)
+    e += f
+    return quick_two_sum(s, e)
+
+
+@jit(nopython=True, cache=True)
+def dd_mul(ahi, alo, bhi, blo):
+    """
+    Multiplies two double-doubles
+    """
+    p, e = two_prod(ahi, bhi)
+    e += ahi * blo + alo * bhi
+    return quick_two_sum(p, e)
+
+
+@jit(nopython=True, cache=True)
+def dd_sqr(ahi, alo):
+    """
+    Squares a double-double
+    """
+    p, e = two_prod(ahi, ahi)
+    e += 2 * ahi * alo
+    return quick_two_sum(p, e)
+
+
+@jit(nopython=True, cache=True)
+def julia_z2_dd(zr, zr_lo, zi, zi_lo, c, limit, max_iter):
+    """
+    Calculates orbit of z under T(z) = z^2 + c in double-double precision with z and c as the input
+    :param zr: real part of z
+    :param zr_lo: low order part of the real part of z
+    :param zi: imaginary part of z
+    :param zi_lo: low order part of the imaginary part of z
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration
+    """
+    limit2 = limit * limit
+    cr = c.real
+    ci = c.imag
+    for n in range(max_iter):
+        zmag2 = zr * zr + zi * zi
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
+        zr2, zr2_lo = dd_sqr(zr, zr_lo)
+        zi2, zi2_lo = dd_sqr(zi, zi_lo)
+        zri, zri_lo = dd_mul(zr, zr_lo, zi, zi_lo)
+        zi, zi_lo = dd_add(2 * zri, 2 * zri_lo, ci, 0.)
+        zr, zr_lo = dd_add(zr2, zr2_lo, -zi2, -zi2_lo)
+        zr, zr_lo = dd_add(zr, zr_lo, cr, 0.)
+    return 0
+
+
+@jit(nopython=True, cache=True)
+def mandel_z2_dd(cr, cr_lo, ci, ci_lo, limit, max_iter):
+    """
+    Calculates orbit of 0 under T(z) = z^2 + c in double-double precision with c as the input
+    :param cr: real part of c
+    :param cr_lo: low order part of the real part of c
+    :param ci: imaginary part of c
+    :param ci_lo: low order part of the imaginary part of c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration
+    """
+    limit2 = limit * limit
+    zr = 0.
+    zr_lo = 0.
+    zi = 0.
+    zi_lo = 0.
+    for n in range(max_iter):
+        zmag2 = zr * zr + zi * zi
+        if zmag2 > limit2:
+            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
+        zr2, zr2_lo = dd_sqr(zr, zr_lo)
+        zi2, zi2_lo = dd_sqr(zi, zi_lo)
+        zri, zri_lo = dd_mul(zr, zr_lo, zi, zi_lo)
+        zi, zi_lo = dd_add(2 * zri, 2 * zri_lo, ci, ci_lo)
+        zr, zr_lo = dd_add(zr2, zr2_lo, -zi2, -zi2_lo)
+        zr, zr_lo = dd_add(zr, zr_lo, cr, cr_lo)
+    return 0
+
+
+@lazy(vectorize('float64(float64, float64, float64, float64, complex128, float64, int32)', target='parallel',
+                cache=True))
+def julia_z2_dd_vec(zr, zr_lo, zi, zi_lo, c, limit, max_iter):
+    return julia_z2_dd(zr, zr_lo, zi, zi_lo, c, limit, max_iter)
+
+
+@lazy(vectorize('float64(float64, float64, float64, float64, float64, int32)', target='parallel', cache=True))
+def mandel_z2_dd_vec(cr, cr_lo, ci, ci_lo, limit, max_iter):
+    return mandel_z2_dd(cr, cr_lo, ci, ci_lo, limit, max_iter)
+
+
+def split_decimal(value):
+    """
+    Splits a decimal into a double-double
+    :param value: decimal
+    :return: high and low order floats
+    """
+    hi = float(value)
+    return hi, float(value - decimal.Decimal(hi))
+
+
+@jit(nopython=True, cache=True)
+def dd_linspace(start, start_lo, stop, stop_lo, num):
+    """
+    Double-double version of linspace(start, stop, num, endpoint=False)
+    :param start: start
+    :param start_lo: low order part of start
+    :param stop: stop
+    :param stop_lo: low order part of stop
+    :param num: number of samples
+    :return: high and low order arrays
+    """
+    step = ((stop - start) + (stop_lo - start_lo)) / num
+    hi = np.empty(num, dtype=np.float64)
+    lo = np.empty(num, dtype=np.float64)
+    for i in range(num):
+        hi[i], lo[i] = dd_add(start, start_lo, i * step, 0.)
+    return hi, lo
+
+
+@jit(nopython=True, cache=True)
+def dd_needed(w, bl_x, bl_y, tr_x, tr_y):
+    """
+    Returns if the pixel spacing is too fine for the float64 z^2 kernels
+    """
+    mag = max(abs(bl_x), abs(bl_y), abs(tr_x), abs(tr_y))
+    return (tr_x - bl_x) / w < mag * DD_RESOLUTION
+
+
+def f32_enough(w, bl_x, bl_y, tr_x, tr_y):
+    """
+    Returns if the pixel spacing is coarse enough for the float32 z^2 lane kernels
+    """
+    mag = max(abs(bl_x), abs(bl_y), abs(tr_x), abs(tr_y))
+    return (tr_x - bl_x) / w >= mag * F32_RESOLUTION
+
+
+def escape_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c,
+                bl_x_lo=0., bl_y_lo=0., tr_x_lo=0., tr_y_lo=0., checks=0, formula=None, lanes=False, symmetry=False):
+    """
+    Calls the vectorized function according to the mode
+    0 - filled julia set of z^2 + c
+    1 - mandelbrot set of z^2 + c
+    2 - filled julia set of z^3 + c
+    3 - mandelbrot set of z^3 + c
+    4 - filled julia set of z^1.5 + c
+    5 - mandelbrot set of z^1.5 + c
+    6 - julia set of c * sin(z)
+    8 - filled julia set of a user-defined formula
+    9 - mandelbrot set of a user-defined formula
+    z^2 modes switch to double-double kernels when the pixel spacing is below float64 resolution
+    Returns a 2d array of normalized escape iterations, points the interior checks stopped are 0 like capped ones
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :param bl_x_lo: low order part of bl_x
+    :param bl_y_lo: low order part of bl_y
+    :param tr_x_lo: low order part of tr_x
+    :param tr_y_lo: low order part of tr_y
+    :param checks: bit flags of the interior checks for the float64 z^2 kernels
+    :param formula: compiled formula of modes 8 and 9, see formula.load_formula
+    :param lanes: if the z^2 modes run the lane kernels, in float32 at shallow zooms
+    :param symmetry: if only one half of symmetric views is computed, see symmetric_split()
+    :return: 2d array of normalized escape iterations ([x][y])
+    """
+    zr, zr_lo, zi, zi_lo = grid_coords(mode, w, h, bl_x, bl_y, tr_x, tr_y, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo, lanes)
+    split = symmetric_split(mode, zr, zi) if symmetry and zr_lo is None else None
+    if split is not None:
+        return symmetric_grid(split, zr, zi, lambda xs, ys: escape_grid(mode, xs, None, ys, None, limit, max_iter, c,
+                                                                          checks, formula, lanes))
+    return escape_grid(mode, zr, zr_lo, zi, zi_lo, limit, max_iter, c, checks, formula, lanes)
+
+
+def grid_coords(mode, w, h, bl_x, bl_y, tr_x, tr_y, bl_x_lo=0., bl_y_lo=0., tr_x_lo=0., tr_y_lo=0., lanes=False):
+    """
+    Returns the coordinates of the columns and rows of the graph
+    The low order parts are only computed for the z^2 modes when the pixel spacing is below float64 resolution
+    The coordinates of the lane kernels are float32 when the pixel spacing is above float32 resolution
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param bl_x_lo: low order part of bl_x
+    :param bl_y_lo: low order part of bl_y
+    :param tr_x_lo: low order part of tr_x
+    :param tr_y_lo: low order part of tr_y
+    :param lanes: if the coordinates are for the lane kernels, see escape_grid()
+    :return: column coordinates and their low order parts, row coordinates and their low order parts (None if unused)
+    """
+    if mode in [0, 1, 7] and dd_needed(w, bl_x, bl_y, tr_x, tr_y):
+        zr, zr_lo = dd_linspace(bl_x, bl_x_lo, tr_x, tr_x_lo, w)
+        zi, zi_lo = dd_linspace(bl_y, bl_y_lo, tr_y, tr_y_lo, h)
+        return zr, zr_lo, zi, zi_lo
+    dtype = np.float64
+    if lanes and mode in [0, 1, 7] and f32_enough(w, bl_x, bl_y, tr_x, tr_y):
+        dtype = np.float32
+    zr = np.linspace(bl_x, tr_x, w, dtype=dtype, endpoint=False)
+    zi = np.linspace(bl_y, tr_y, h, dtype=dtype, endpoint=False)
+    return zr, None, zi, None
+
+
+def mirror_axis(coords):
+    """
+    Finds the pixels of an evenly spaced axis whose negated coordinates are pixels of the axis too
+    :param coords: coordinates of the pixels
+    :return: k such that pixel k - i is the mirror of pixel i, None if 0 isn't on a pixel or between two pixels or
+        no pixel has its mirror on the axis
+    """
+    n = coords.shape[0]
+    if n < 2:
+        return None
+    mirror = -2 * float(coords[0]) * (n - 1) / float(coords[-1] - coords[0])
+    k = round(mirror)
+    if abs(mirror - k) > MIRROR_TOLERANCE or k < 1 or k > 2 * n - 3:
+        return None
+    return k
+
+
+def symmetric_split(mode, zr, zi, align=1):
+    """
+    Splits a grid of a symmetric mode into the pixels that are computed and the ones that are copies of their mirror
+    pixels, rows y0:y1 are computed, the other rows y copy row ky - y, for point reflection only in the columns x0:x1
+    (copied from column kx - x), their other columns are computed too (see mirrored_ranges)
+    :param mode: mode
+    :param zr: column coordinates
+    :param zi: row coordinates
+    :param align: multiple the computed ranges start at, so progressive passes keep iterating the same pixels
+    :return: point, kx, ky, y0, y1, x0, x1 (point is if the mirror is a point reflection, otherwise kx is unused),
+        None if the mode isn't symmetric or the grid has no mirrored part
+    """
+    point = mode in POINT_SYMMETRIC_MODES
+    if not point and mode not in CONJ_SYMMETRIC_MODES:
+        return None
+    w = zr.shape[0]
+    h = zi.shape[0]
+    ky = mirror_axis(zi)
+    if ky is None:
+        return None
+    kx, x0, x1 = 0, 0, w
+    if point:
+        kx = mirror_axis(zr)
+        if kx is None:
+            return None
+        x0, x1 = max(0, kx - w + 1), min(w, kx + 1)
+        if x0 == 0:
+            x1 -= x1 % align
+    # the computed half is the one with the rows that have no mirror
+    if ky < h:
+        y0, y1 = (ky + 1) // 2, h
+        y0 -= y0 % align
+    else:
+        y0, y1 = 0, min(h, -(-(ky // 2 + 1) // align) * align)
+    if y1 - y0 == h or x0 >= x1:
+        return None
+    return point, kx, ky, y0, y1, x0, x1
+
+
+def mirrored_ranges(split, w, h):
+    """
+    Returns the rows of a split grid that are mirrored and the columns of them that are computed anyway
+    :param split: split returned by symmetric_split
+    :param w: grid width
+    :param h: grid height
+    :return: first and last + 1 mirrored row, first and last + 1 computed column of the mirrored rows
+    """
+    point, kx, ky, y0, y1, x0, x1 = split
+    my0, my1 = (0, y0) if y0 > 0 else (y1, h)
+    ux0, ux1 = (x1, w) if x0 == 0 else (0, x0)
+    return my0, my1, ux0, ux1
+
+
+def symmetric_grid(split, zr, zi, escape):
+    """
+    Calculates the escape values of a symmetric grid, computing only the pixels without a mirror among them
+    :param split: split returned by symmetric_split
+    :param zr: column coordinates
+    :param zi: row coordinates
+    :param escape: function of column and row coordinates returning their 2d array of escape values ([x][y])
+    :return: 2d array of normalized escape iterations ([x][y])
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    point, kx, ky, y0, y1, x0, x1 = split
+    my0, my1, ux0, ux1 = mirrored_ranges(split, w, h)
+    values = np.empty((w, h), dtype=np.float64)
+    values[:, y0:y1] = escape(zr, zi[y0:y1])
+    if ux0 < ux1:
+        values[ux0:ux1, my0:my1] = escape(zr[ux0:ux1], zi[my0:my1])
+    mirror_values(values, point, kx, ky, y0, y1, x0, x1)
+    return values
+
+
+def resume_symmetric(mode, zr, zi, c, limit, max_iter, z, iters, color_data, split, stride=1):
+    """
+    Same as resume_escape() but only iterates the pixels of a symmetric grid without a mirror among them
+    The passes with a stride copy the mirrored pixels' values for the preview, the last one copies their whole state
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param z: 2d array of orbit points
+    :param iters: 2d array of iterations done, -1 for points that escaped
+    :param color_data: 2d array of normalized escape iterations
+    :param split: split returned by symmetric_split, aligned to the largest stride
+    :param stride: distance between the iterated columns and rows
+    :return: number of points that were iterated
+    """
+    point, kx, ky, y0, y1, x0, x1 = split
+    my0, my1, ux0, ux1 = mirrored_ranges(split, zr.shape[0], zi.shape[0])
+    resumed = resume_escape(mode, zr, zi[y0:y1], c, limit, max_iter, z[:, y0:y1], iters[:, y0:y1],
+                            color_data[:, y0:y1], stride)
+    if ux0 < ux1:
+        resumed += resume_escape(mode, zr[ux0:ux1], zi[my0:my1], c, limit, max_iter, z[ux0:ux1, my0:my1],
+                                 iters[ux0:ux1, my0:my1], color_data[ux0:ux1, my0:my1], stride)
+    if stride == 1:
+        mirror_state(mode, z, iters, color_data, point, kx, ky, y0, y1, x0, x1)
+    else:
+        mirror_values(color_data, point, kx, ky, y0, y1, x0, x1, stride)
+    return resumed
+
+
+def row_chunks(chunk=ROW_CHUNK):
+    """
+    Makes the parallel kernels called inside it hand out their prange iterations in chunks as the threads become
+    free, instead of one block per thread (the kernels stay cacheable, numba's chunk size can't be set inside them)
+    :param chunk: iterations per chunk, see ROW_CHUNK
+    :return: context manager
+    """
+    if parallel_chunksize is None:
+        return contextlib.nullcontext()
+    return parallel_chunksize(chunk)
+
+
+def escape_grid(mode, zr, zr_lo, zi, zi_lo, limit, max_iter, c, checks=0, formula=None, lanes=False):
+    """
+    Calculates the escape iterations of a grid of coordinates according to the mode, see escape_call()
+    The float64 modes run escape_rows() with rows scheduled in chunks, the others their vectorized functions
+    The lane kernels give the same values as the others in float64, float32 coordinates (see grid_coords) run them
+    in float32
+    Any slice of the rows gives the same values as the full grid, so a graph can be computed in strips
+    :param mode: mode
+    :param zr: column coordinates
+    :param zr_lo: low order parts of zr, None for the float64 kernels
+    :param zi: row coordinates
+    :param zi_lo: low order parts of zi, None for the float64 kernels
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :param checks: bit flags of the interior checks for the float64 z^2 kernels
+    :param formula: compiled formula of modes 8 and 9, see formula.load_formula
+    :param lanes: if the z^2 modes without interior checks run the lane kernels
+    :return: 2d array of normalized escape iterations ([x][y])
+    """
+    if zr_lo is not None:
+        if mode == 1:
+            return mandel_z2_dd_vec(zr[:, None], zr_lo[:, None], zi, zi_lo, limit, max_iter)
+        return julia_z2_dd_vec(zr[:, None], zr_lo[:, None], zi, zi_lo, c, limit, max_iter)
+
+    if lanes and mode in [0, 1, 7] and not checks:
+        with row_chunks():
+            return z2_lanes(mode == 1, zr, zi, c, limit, max_iter)
+    if mode < 8:
+        # rows are scheduled dynamically, the ufuncs split the grid evenly and wait on the boundary's threads
+        with row_chunks():
+            return escape_rows(mode, zr, zi, c, limit, max_iter, checks)
+    z = zr[:, None] + zi * 1j  # [x][y]
+    if mode == 8:
+        return formula.julia_vec(z, c, limit, max_iter)
+    return formula.mandel_vec(z, limit, max_iter)
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def escape_rows(mode, zr, zi, c, limit, max_iter, checks=0):
+    """
+    Calculates the normalized escape iterations of a grid with the float64 kernels one row per prange iteration,
+    call it inside row_chunks() so the rows are handed out in chunks as the threads finish their previous ones
+    Gives the same values as the vectorized kernels (points the interior checks stopped are 0)
+    :param mode: mode (0 - 7)
+    :param zr: column coordinates
+    :param zi: row coordinates
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param checks: bit flags of the interior checks for the z^2 kernels
+    :return: 2d array of normalized escape iterations ([x][y])
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    color_data = np.empty((w, h), dtype=np.float64)
+    for y in prange(h):
+        for x in range(w):
+            z = zr[x] + zi[y] * 1j
+            if checks and (mode == 0 or mode == 7):
+                color_data[x, y] = julia_z2_interior(z, c, limit, max_iter, checks)[0]
+            elif checks and mode == 1:
+                color_data[x, y] = mandel_z2_interior(z, limit, max_iter, checks)[0]
+            else:
+                color_data[x, y] = escape(mode, z, c, limit, max_iter)
+    return color_data
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def z2_lanes(mandel, zr, zi, c, limit, max_iter):
+    """
+    Calculates the normalized escape iterations of z^2 + c over a grid, LANES adjacent pixels of a row at a time
+    The lanes are iterated in lockstep without branches (escaped lanes keep iterating, their escape is masked), so the
+    lane loop is vectorized, until all of them escaped or max_iter, then each lane's smooth value is written
+    Runs in the precision of the coordinates, with float64 coordinates it gives the same values as julia_z2/mandel_z2
+    :param mandel: if the grid is the mandelbrot set (c is the coordinate), otherwise a julia set of c
+    :param zr: column coordinates (float32 or float64)
+    :param zi: row coordinates (float32 or float64)
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: 2d array of normalized escape iterations ([x][y])
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    color_data = np.empty((w, h), dtype=np.float64)
+    # constants in the coordinates' precision, float64 operands would make numba widen the float32 lanes
+    consts = np.array([0., 1., max_iter, limit * limit, c.real, c.imag]).astype(zr.dtype)
+    zero, one, never, limit2, cr, ci = consts[0], consts[1], consts[2], consts[3], consts[4], consts[5]
+    # the lane count is only known at run time, so the loops stay loops for the vectorizer instead of being unrolled
+    lanes = min(LANES, w)
+    for y in prange(h):
+        a = np.empty(lanes, dtype=zr.dtype)
+        b = np.empty(lanes, dtype=zr.dtype)
+        pr = np.empty(lanes, dtype=zr.dtype)
+        pi = np.empty(lanes, dtype=zr.dtype)
+        mag = np.empty(lanes, dtype=zr.dtype)
+        # escape iteration of each lane, never while it is still iterating
+        esc = np.empty(lanes, dtype=zr.dtype)
+        for x0 in range(0, w, lanes):
+            for k in range(lanes):
+                # lanes past the end of the row repeat its last pixel
+                p = zr[min(x0 + k, w - 1)]
+                if mandel:
+                    a[k] = zero
+                    b[k] = zero
+                    pr[k] = p
+                    pi[k] = zi[y]
+                else:
+                    a[k] = p
+                    b[k] = zi[y]
+                    pr[k] = cr
+                    pi[k] = ci
+                mag[k] = zero
+                esc[k] = never
+            n_float = zero
+            for n in range(max_iter):
+                for k in range(lanes):
+                    p = a[k]
+                    q = b[k]
+                    p2 = p * p
+                    q2 = q * q
+                    m = p2 + q2
+                    escaped = (m > limit2) & (esc[k] == never)
+                    esc[k] = n_float if escaped else esc[k]
+                    mag[k] = m if escaped else mag[k]
+                    t = p * q
+                    b[k] = t + t + pi[k]
+                    a[k] = p2 - q2 + pr[k]
+                n_float += one
+                if n % LANE_CHECK == LANE_CHECK - 1:
+                    running = 0
+                    for k in range(lanes):
+                        running += esc[k] == never
+                    if running == 0:
+                        break
+            for k in range(min(lanes, w - x0)):
+                if esc[k] != never:
+                    color_data[x0 + k, y] = int(esc[k]) + 1 - np.log2(np.log2(np.power(float(mag[k]), .5)))
+                else:
+                    color_data[x0 + k, y] = 0
+    return color_data
+
+
+def zoom_max_iter(zoom):
+    """
+    Returns the starting max_iter of the adaptive mode at a zoom
+    :param zoom: total zoom
+    :return: max_iter
+    """
+    return int(ADAPT_BASE * (1 + max(0., math.log10(zoom))) ** ADAPT_POWER)
+
+
+def max_iter_needed(color_data, tail=ADAPT_TAIL):
+    """
+    Finds the smallest max_iter that leaves at most a fraction tail of the pixels escaping in its upper half, from the
+    escape values of a frame (any max_iter)
+    Above it, raising max_iter only turns the last few capped pixels into escaped ones
+    :param color_data: 2d array of normalized escape iterations, 0 for capped pixels
+    :param tail: fraction of the pixels
+    :return: fraction of capped pixels (not counting the interior codes), max_iter needed
+    """
+    capped = np.count_nonzero(color_data == 0) / color_data.size
+    escaped = color_data[color_data > 0]
+    k = int(color_data.size * tail)
+    if escaped.shape[0] <= k:
+        return capped, 1
+    # the escape value with k pixels escaping after it
+    last = np.partition(escaped, escaped.shape[0] - k - 1)[escaped.shape[0] - k - 1]
+    return capped, int(2 * last) + 1
+
+
+def vectorize_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette,
+                   bl_x_lo=0., bl_y_lo=0., tr_x_lo=0., tr_y_lo=0., checks=0, formula=None, lanes=False,
+                   symmetry=False):
+    """
+    Calls escape_call() and colors the escape iterations with the palette
+    Returns a 2d RGB array
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :param palette: color palette
+    :param bl_x_lo: low order part of bl_x
+    :param bl_y_lo: low order part of bl_y
+    :param tr_x_lo: low order part of tr_x
+    :param tr_y_lo: low order part of tr_y
+    :param checks: bit flags of the interior checks for the float64 z^2 kernels
+    :param formula: compiled formula of modes 8 and 9, see formula.load_formula
+    :param lanes: if the z^2 modes run the lane kernels, see escape_call()
+    :param symmetry: if only one half of symmetric views is computed, see escape_call()
+    :return: 2d RGB array
+    """
+    color_data = escape_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c,
+                             bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo, checks, formula, lanes, symmetry)
+    return parse_color_data(color_data, max_iter, palette)
+
+
+@jit(nopython=True, cache=True)
+def resume_point(mode, z, c, limit, start, max_iter):
+    """
+    Continues the orbit of z from iteration start according to the mode
+    Uses the same arithmetic as the mode's kernel so resumed orbits match uninterrupted ones
+    :param mode: mode
+    :param z: orbit point after start iterations
+    :param c: c (the point itself for mandelbrot sets)
+    :param limit: escape radius
+    :param start: iterations already done
+    :param max_iter: maximum iterations
+    :return: normalized escape iteration (0 if it didn't escape), the last orbit point and the iteration reached
+    """
+    if mode == 0 or mode == 1 or mode == 7:
+        limit2 = limit * limit
+        zr = z.real
+        zi = z.imag
+        cr = c.real
+        ci = c.imag
+        for n in range(start, max_iter):
+            zr2 = zr * zr
+            zi2 = zi * zi
+            zmag2 = zr2 + zi2
+            if zmag2 > limit2:
+                return n + 1 - np.log2(np.log2(np.power(zmag2, .5))), zr + zi * 1j, n
+            zi = 2 * zr * zi + ci
+            zr = zr2 - zi2 + cr
+        return 0., zr + zi * 1j, max_iter
+    for n in range(start, max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            if mode == 2 or mode == 3:
+                return n + 1 - np.log2(np.log2(zmag)) / np.log2(3), z, n
+            elif mode == 4 or mode == 5:
+                return n + 1 - np.log2(np.log2(zmag)) / np.log2(1.5), z, n
+            return float(n), z, n
+        if mode == 2 or mode == 3:
+            z = z * z * z + c
+        elif mode == 4 or mode == 5:
+            z = np.power(z, 1.5) + c
+        else:
+            z = c * np.sin(z)
+    return 0., z, max_iter
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def init_state(mode, zr, zi):
+    """
+    Creates the iteration state of a frame that hasn't been iterated yet
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :return: 2d arrays of orbit points, iterations done and normalized escape iterations ([x][y])
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    z = np.zeros((w, h), dtype=np.complex128)
+    if mode != 1 and mode != 3 and mode != 5:
+        for x in range(w):
+            for y in range(h):
+                z[x, y] = zr[x] + zi[y] * 1j
+    return z, np.zeros((w, h), dtype=np.int32), np.zeros((w, h), dtype=np.float64)
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def resume_escape(mode, zr, zi, c, limit, max_iter, z, iters, color_data, stride=1):
+    """
+    Continues the orbits of the points that haven't escaped yet up to max_iter, updating the state in place
+    With a stride, only every stride-th column and row is iterated (progressive rendering)
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param z: 2d array of orbit points
+    :param iters: 2d array of iterations done, -1 for points that escaped
+    :param color_data: 2d array of normalized escape iterations
+    :param stride: distance between the iterated columns and rows
+    :return: number of points that were iterated
+    """
+    resumed = 0
+    for i in prange((zr.shape[0] + stride - 1) // stride):
+        x = i * stride
+        for y in range(0, zi.shape[0], stride):
+            start = iters[x, y]
+            if start < 0 or start >= max_iter:
+                continue
+            if mode == 1 or mode == 3 or mode == 5:
+                pc = zr[x] + zi[y] * 1j
+            else:
+                pc = c
+            val, z[x, y], n = resume_point(mode, z[x, y], pc, limit, start, max_iter)
+            if n < max_iter:
+                color_data[x, y] = val
+                iters[x, y] = -1
+            else:
+                iters[x, y] = max_iter
+            resumed += 1
+    return resumed
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def mirror_values(values, point, kx, ky, y0, y1, x0, x1, stride=1):
+    """
+    Copies the escape values of the mirrored pixels of a split grid from their mirror pixels, see symmetric_split()
+    With a stride, every stride-th column and row of them copies the iterated pixel of its mirror's block
+    :param values: 2d array of normalized escape iterations ([x][y])
+    :param point: if the mirror is a point reflection (otherwise columns aren't mirrored)
+    :param kx: column mirror sum
+    :param ky: row mirror sum
+    :param y0: first computed row
+    :param y1: last + 1 computed row
+    :param x0: first mirrored column
+    :param x1: last + 1 mirrored column
+    :param stride: distance between the copied columns and rows
+    """
+    w = values.shape[0]
+    h = values.shape[1]
+    my0, my1 = (0, y0) if y0 > 0 else (y1, h)
+    first_x = (x0 + stride - 1) // stride * stride
+    first_y = (my0 + stride - 1) // stride * stride
+    for i in prange((x1 - first_x + stride - 1) // stride):
+        x = first_x + i * stride
+        sx = kx - x if point else x
+        sx -= sx % stride
+        for y in range(first_y, my1, stride):
+            sy = ky - y
+            values[x, y] = values[sx, sy - sy % stride]
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def mirror_state(mode, z, iters, color_data, point, kx, ky, y0, y1, x0, x1):
+    """
+    Copies the iteration state of the mirrored pixels of a split grid from their mirror pixels, see symmetric_split()
+    The orbits of conj(z) are the conjugates of the orbits of z, the ones of -z are the same (even maps) or negated
+    (odd maps) after their first iteration
+    :param mode: mode
+    :param z: 2d array of orbit points
+    :param iters: 2d array of iterations done, -1 for points that escaped
+    :param color_data: 2d array of normalized escape iterations
+    :param point: if the mirror is a point reflection (otherwise columns aren't mirrored)
+    :param kx: column mirror sum
+    :param ky: row mirror sum
+    :param y0: first computed row
+    :param y1: last + 1 computed row
+    :param x0: first mirrored column
+    :param x1: last + 1 mirrored column
+    """
+    h = z.shape[1]
+    my0, my1 = (0, y0) if y0 > 0 else (y1, h)
+    for x in prange(x0, x1):
+        sx = kx - x if point else x
+        for y in range(my0, my1):
+            sy = ky - y
+            iters[x, y] = iters[sx, sy]
+            color_data[x, y] = color_data[sx, sy]
+            if not point:
+                z[x, y] = np.conj(z[sx, sy])
+            elif mode == 6:
+                z[x, y] = -z[sx, sy]
+            else:
+                z[x, y] = z[sx, sy]
+
+
+@jit(nopython=True, cache=True)
+def mariani_silver_tile(mode, zr, zi, c, limit, max_iter, color_data, done, x0, y0, x1, y1):
+    """
+    Renders a rectangle by recursive subdivision
+    A rectangle whose border has a single escape value is filled without evaluating its inside
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param color_data: 2d array of normalized escape iterations ([x][y])
+    :param done: 2d array of evaluated or filled pixels
+    :param x0: left column
+    :param y0: bottom row
+    :param x1: right column (inclusive)
+    :param y1: top row (inclusive)
+    :return: number of pixels filled without being evaluated
+    """
+    skipped = 0
+    stack = np.empty((64, 4), dtype=np.int64)
+    stack[0, 0] = x0
+    stack[0, 1] = y0
+    stack[0, 2] = x1
+    stack[0, 3] = y1
+    sp = 1
+    while sp:
+        sp -= 1
+        x0, y0, x1, y1 = stack[sp, 0], stack[sp, 1], stack[sp, 2], stack[sp, 3]
+        if x1 - x0 < MS_MIN_SIZE or y1 - y0 < MS_MIN_SIZE:
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    if not done[x, y]:
+                        color_data[x, y] = escape(mode, zr[x] + zi[y] * 1j, c, limit, max_iter)
+                        done[x, y] = 1
+            continue
+
+        for x in range(x0, x1 + 1):
+            for y in (y0, y1):
+                if not done[x, y]:
+                    color_data[x, y] = escape(mode, zr[x] + zi[y] * 1j, c, limit, max_iter)
+                    done[x, y] = 1
+        for y in range(y0 + 1, y1):
+            for x in (x0, x1):
+                if not done[x, y]:
+                    color_data[x, y] = escape(mode, zr[x] + zi[y] * 1j, c, limit, max_iter)
+                    done[x, y] = 1
+
+        val = color_data[x0, y0]
+        same = True
+        for x in range(x0, x1 + 1):
+            if color_data[x, y0] != val or color_data[x, y1] != val:
+                same = False
+                break
+        if same:
+            for y in range(y0 + 1, y1):
+                if color_data[x0, y] != val or color_data[x1, y] != val:
+                    same = False
+                    break
+
+        if same:
+            for x in range(x0 + 1, x1):
+                for y in range(y0 + 1, y1):
+                    if not done[x, y]:
+                        color_data[x, y] = val
+                        done[x, y] = 1
+                        skipped += 1
+        else:
+            # the halves share the middle row and column so their borders are only evaluated once
+            xm = (x0 + x1) // 2
+            ym = (y0 + y1) // 2
+            stack[sp, 0], stack[sp, 1], stack[sp, 2], stack[sp, 3] = x0, y0, xm, ym
+            stack[sp + 1, 0], stack[sp + 1, 1], stack[sp + 1, 2], stack[sp + 1, 3] = xm, y0, x1, ym
+            stack[sp + 2, 0], stack[sp + 2, 1], stack[sp + 2, 2], stack[sp + 2, 3] = x0, ym, xm, y1
+            stack[sp + 3, 0], stack[sp + 3, 1], stack[sp + 3, 2], stack[sp + 3, 3] = xm, ym, x1, y1
+            sp += 4
+    return skipped
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def mariani_silver(mode, zr, zi, c, limit, max_iter):
+    """
+    Calculates the normalized escape iterations with the Mariani-Silver algorithm
+    The frame is split into MS_TILE sized tiles that are subdivided in parallel
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :return: 2d array of normalized escape iterations ([x][y]) and the number of pixels that weren't evaluated
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    color_data = np.zeros((w, h), dtype=np.float64)
+    done = np.zeros((w, h), dtype=np.uint8)
+    tiles_x = (w + MS_TILE - 1) // MS_TILE
+    tiles_y = (h + MS_TILE - 1) // MS_TILE
+    skipped = 0
+    for t in prange(tiles_x * tiles_y):
+        x0 = (t % tiles_x) * MS_TILE
+        y0 = (t // tiles_x) * MS_TILE
+        x1 = min(x0 + MS_TILE, w) - 1
+        y1 = min(y0 + MS_TILE, h) - 1
+        skipped += mariani_silver_tile(mode, zr, zi, c, limit, max_iter, color_data, done, x0, y0, x1, y1)
+    return color_data, skipped
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def tile_costs(mode, zr, zi, c, limit, max_iter, tile, samples):
+    """
+    Estimates the cost of every tile of a frame from a samples x samples grid of points inside it
+    Points that don't escape cost max_iter
+    :param mode: mode
+    :param zr: real coordinates of the columns
+    :param zi: imaginary coordinates of the rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param tile: tile side
+    :param samples: sampled points per tile side
+    :return: 2d array of estimated iterations per tile ([tile x][tile y])
+    """
+    w = zr.shape[0]
+    h = zi.shape[0]
+    tiles_x = (w + tile - 1) // tile
+    tiles_y = (h + tile - 1) // tile
+    costs = np.zeros((tiles_x, tiles_y), dtype=np.float64)
+    for t in prange(tiles_x * tiles_y):
+        tx = t % tiles_x
+        ty = t // tiles_x
+        x0 = tx * tile
+        y0 = ty * tile
+        tw = min(tile, w - x0)
+        th = min(tile, h - y0)
+        cost = 0.
+        for i in range(samples):
+            x = x0 + (2 * i + 1) * tw // (2 * samples)
+            for j in range(samples):
+                y = y0 + (2 * j + 1) * th // (2 * samples)
+                value = escape(mode, zr[x] + zi[y] * 1j, c, limit, max_iter)
+                cost += value if value > 0 else max_iter
+        costs[tx, ty] = cost * tw * th / (samples * samples)
+    return costs
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def escape_tile(mode, zr, zi, c, limit, max_iter, palette, values, pixels, x0, y0):
+    """
+    Calculates and colors one tile of a frame into the frame's buffers, single threaded (runs in a tile worker)
+    Gives the same values as escape_grid and the same colors as color_pixels
+    :param mode: mode
+    :param zr: real coordinates of the tile's columns
+    :param zi: imaginary coordinates of the tile's rows
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param palette: color palette
+    :param values: 2d array of normalized escape iterations of the frame ([x][y])
+    :param pixels: 1d RGB array of the frame with separate RGB values
+    :param x0: first column of the tile
+    :param y0: first row of the tile
+    """
+    w = values.shape[0]
+    div = max(1, max_iter // 4)
+    for j in range(zi.shape[0]):
+        y = y0 + j
+        for i in range(zr.shape[0]):
+            x = x0 + i
+            value = escape(mode, zr[i] + zi[j] * 1j, c, limit, max_iter)
+            values[x, y] = value
+            color = palette_color(value, div, palette)
+            idx = (y * w + x) * 3
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def julia_miim(c, bl_x, bl_y, tr_x, tr_y, cap, max_iter, values):
+    """
+    Draws the julia set of z^2 + c with the modified inverse iteration method
+    The preimages z -> +-sqrt(z - c) of the repelling fixed point are followed depth first, and a point's preimages
+    are dropped once its pixel was hit cap times, so the cost grows with the number of pixels on the julia set instead
+    of the number of pixels and iterations. Points off the screen are counted on a coarse grid over the whole set.
+    The subtrees below the first MIIM_SPLIT levels are searched in parallel, sharing the hit counts (a few extra hits
+    of racing threads don't matter)
+    Works best on julia sets with little or no interior, zoomed in views miss the parts of the set only reached
+    through pixels that were capped off the screen
+    :param c: c
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param cap: hits per pixel
+    :param max_iter: maximum iterations, only sets the colors like the escape time values (hit pixels are between
+        palette colors 1 and 2, the others get color 0)
+    :param values: 2d array ([x][y]) the values are written to
+    """
+    w = values.shape[0]
+    h = values.shape[1]
+    step_x = (tr_x - bl_x) / w
+    step_y = (tr_y - bl_y) / h
+    hits = np.zeros((w, h), dtype=np.int32)
+    # the julia set is inside the disk of radius r around 0
+    r = .5 + np.sqrt(.25 + abs(c))
+    grid_step = 2 * r / MIIM_GRID
+    grid = np.zeros((MIIM_GRID, MIIM_GRID), dtype=np.int32)
+
+    # repelling fixed point, the root of z^2 - z + c with |2z| > 1
+    root = np.sqrt(1 - 4 * c + 0j)
+    z0 = (1 + root) / 2
+    if abs(2 * z0) <= 1:
+        z0 = (1 - root) / 2
+    seeds = np.empty(1 << MIIM_SPLIT, dtype=np.complex128)
+    seeds[0] = z0
+    for level in range(MIIM_SPLIT):
+        n = 1 << level
+        for i in range(n):
+            pre = np.sqrt(seeds[i] - c)
+            seeds[i] = pre
+            seeds[i + n] = -pre
+
+    for s in prange(seeds.shape[0]):
+        stack = np.empty(2 * MIIM_DEPTH + 2, dtype=np.complex128)
+        depths = np.empty(2 * MIIM_DEPTH + 2, dtype=np.int64)
+        stack[0] = seeds[s]
+        depths[0] = MIIM_SPLIT
+        top = 1
+        while top > 0:
+            top -= 1
+            z = stack[top]
+            depth = depths[top]
+            fx = (z.real - bl_x) / step_x
+            fy = (z.imag - bl_y) / step_y
+            if 0 <= fx < w and 0 <= fy < h:
+                x = int(fx)
+                y = int(fy)
+                if hits[x, y] >= cap:
+                    continue
+                hits[x, y] += 1
+            else:
+                gx = min(max(int((z.real + r) / grid_step), 0), MIIM_GRID - 1)
+                gy = min(max(int((z.imag + r) / grid_step), 0), MIIM_GRID - 1)
+                if grid[gx, gy] >= cap:
+                    continue
+                grid[gx, gy] += 1
+            if depth < MIIM_DEPTH:
+                pre = np.sqrt(z - c)
+                stack[top] = pre
+                stack[top + 1] = -pre
+                depths[top] = depth + 1
+                depths[top + 1] = depth + 1
+                top += 2
+
+    div = max(1, max_iter // 4)
+    for x in prange(w):
+        for y in range(h):
+            values[x, y] = div * (1 + hits[x, y] / cap) if hits[x, y] else 0.
+
+
+def atlas_grid(zr, zi, cols, width=ATLAS_WIDTH):
+    """
+    Lays out a julia set atlas over a mandelbrot view, the view is split into cols columns of square cells and as
+    many rows as fit (cells are no taller than the view), every cell shows the julia set of the c at its center
+    :param zr: real coordinates of the view's columns
+    :param zi: imaginary coordinates of the view's rows
+    :param cols: number of columns
+    :param width: graph width of the thumbnails
+    :return: cs of the cells ([column][row]), cell size in pixels, coordinates of a thumbnail's columns and rows
+    """
+    w, h = zr.shape[0], zi.shape[0]
+    # julia_atlas doesn't check bounds, every cell has to fit in the view
+    cell = max(2, min(w // cols, h))
+    cols, rows = w // cell, h // cell
+    centers = cell // 2 + np.arange(max(cols, rows)) * cell
+    cs = zr[centers[:cols], None] + zi[centers[:rows]] * 1j
+    # thumbnails are a pixel apart
+    size = cell - 1
+    coords = (np.arange(size) - size / 2) * (width / size)
+    return cs, cell, coords, coords.copy()
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def julia_atlas(mode, cs, zr, zi, cell, limit, max_iter, values):
+    """
+    Calculates a grid of julia set thumbnails into one frame, one thumbnail per c
+    Runs one prange iteration per row of every thumbnail, so small thumbnails keep every thread busy too (call it
+    inside row_chunks())
+    :param mode: julia mode (0, 2, 4 or 6)
+    :param cs: 2d array of c, one per cell ([column][row])
+    :param zr: real coordinates of a thumbnail's columns
+    :param zi: imaginary coordinates of a thumbnail's rows
+    :param cell: cell size in pixels, the thumbnail of cell (i, j) starts at pixel (i * cell, j * cell)
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param values: 2d array of normalized escape iterations of the frame ([x][y])
+    """
+    rows = cs.shape[1]
+    th = zi.shape[0]
+    for k in prange(cs.shape[0] * rows * th):
+        i = k // (rows * th)
+        j = k // th % rows
+        y = k % th
+        c = cs[i, j]
+        for x in range(zr.shape[0]):
+            values[i * cell + x, j * cell + y] = escape(mode, zr[x] + zi[y] * 1j, c, limit, max_iter)
+
+
+@jit(nopython=True, cache=True)
+def escape_offset(mode, cx, cx_lo, cy, cy_lo, dx, dy, c, limit, max_iter, dd):
+    """
+    Calculates the normalized escape iteration of a point given by its offset from a center (see escape())
+    :param mode: mode
+    :param cx: center x
+    :param cx_lo: low order part of cx
+    :param cy: center y
+    :param cy_lo: low order part of cy
+    :param dx: x offset
+    :param dy: y offset
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param dd: if the point is computed in double-double precision (z^2 modes)
+    :return: normalized escape iteration
+    """
+    if dd:
+        zr, zr_lo = dd_add(cx, cx_lo, dx, 0.)
+        zi, zi_lo = dd_add(cy, cy_lo, dy, 0.)
+        if mode == 1:
+            return mandel_z2_dd(zr, zr_lo, zi, zi_lo, limit, max_iter)
+        return julia_z2_dd(zr, zr_lo, zi, zi_lo, c, limit, max_iter)
+    return escape(mode, (cx + dx) + (cy + dy) * 1j, c, limit, max_iter)
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def exp_map_rows(mode, cx, cx_lo, cy, cy_lo, s_max, ds, j0, c, limit, max_iter, dd, rows):
+    """
+    Calculates rows of an exponential map around a center, row j samples the circle of radius exp(s_max - j * ds)
+    at rows.shape[1] evenly spaced angles (ds apart in log space, so the samples are square), call it inside
+    row_chunks()
+    :param mode: mode
+    :param cx: center x
+    :param cx_lo: low order part of cx
+    :param cy: center y
+    :param cy_lo: low order part of cy
+    :param s_max: log of the radius of row 0
+    :param ds: log radius step between rows
+    :param j0: index of the first row
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param dd: if the points are computed in double-double precision (z^2 modes)
+    :param rows: 2d array of normalized escape iterations ([row][angle]) the rows are written to
+    """
+    angles = rows.shape[1]
+    for j in prange(rows.shape[0]):
+        r = np.exp(s_max - (j0 + j) * ds)
+        for t in range(angles):
+            theta = 2 * np.pi * t / angles
+            rows[j, t] = escape_offset(mode, cx, cx_lo, cy, cy_lo, r * np.cos(theta), r * np.sin(theta), c, limit,
+                                       max_iter, dd)
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def exp_map_frame(mode, strip, s_max, ds, cx, cx_lo, cy, cy_lo, pixel, center, c, limit, max_iter, dd, values):
+    """
+    Reprojects a frame centered on the exponential map's center from its rows, the pixels closer to the center than
+    the given radius are calculated directly
+    The strip is a ring buffer, row j of the map is at strip[j % strip.shape[0]]
+    :param mode: mode
+    :param strip: 2d array of exponential map rows, see exp_map_rows()
+    :param s_max: log of the radius of row 0
+    :param ds: log radius step between rows
+    :param cx: center x
+    :param cx_lo: low order part of cx
+    :param cy: center y
+    :param cy_lo: low order part of cy
+    :param pixel: pixel size of the frame
+    :param center: radius in pixels of the region calculated directly
+    :param c: c
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param dd: if the directly calculated pixels are computed in double-double precision (z^2 modes)
+    :param values: 2d array of normalized escape iterations of the frame ([x][y])
+    """
+    w = values.shape[0]
+    h = values.shape[1]
+    cap = strip.shape[0]
+    angles = strip.shape[1]
+    for y in prange(h):
+        py = y - h / 2
+        for x in range(w):
+            px = x - w / 2
+            rp = np.sqrt(px * px + py * py)
+            if rp < center:
+                values[x, y] = escape_offset(mode, cx, cx_lo, cy, cy_lo, px * pixel, py * pixel, c, limit, max_iter,
+                                             dd)
+                continue
+            j = int(np.rint((s_max - np.log(rp * pixel)) / ds))
+            t = int(np.rint(np.arctan2(py, px) * angles / (2 * np.pi))) % angles
+            values[x, y] = strip[j % cap, t]
+
+
+@jit(nopython=True, cache=True)
+def palette_color(value, div, palette):
+    """
+    Interpolates the palette at a normalized escape iteration
+    :param value: normalized escape iteration
+    :param div: escape iterations between palette colors
+    :param palette: color palette
+    :return: packed RGB color
+    """
+    norm = value / div
+    intnorm = int(norm)
+    c1 = palette[intnorm % len(palette)]
+    c2 = palette[(intnorm + 1) % len(palette)]
+    t = norm % 1
+    r = int(c1[0] + (c2[0] - c1[0]) * t)
+    g = int(c1[1] + (c2[1] - c1[1]) * t)
+    b = int(c1[2] + (c2[2] - c1[2]) * t)
+    return ((r & 0xff) << 16) | ((g & 0xff) << 8) | (b & 0xff)
+
+
+@lazy(guvectorize('(float64[:], int32[:], int32[:,:], int32[:])', '(n),(),(p,q)->(n)', target='parallel',
+                  cache=True))
+def parse_color_data(color_data, max_iter, palette, output):
+    """
+    Turns an array of normalized escape iterations into an array of RGB colors according to the palette
+    :param color_data: array of normalized escape iterations
+    :param max_iter: maximum iterations
+    :param palette: color palette
+    :param output: the array of RGB colors
+    """
+    div = max(1, max_iter[0] // 4)
+    for i in range(color_data.shape[0]):
+        output[i] = palette_color(color_data[i], div, palette)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def palette_lut(palette):
+    """
+    Samples the palette interpolation of palette_color into a dense lookup table
+    :param palette: color palette
+    :return: array of packed RGB colors, LUT_STEPS per palette color
+    """
+    lut = np.empty(len(palette) * LUT_STEPS, dtype=np.int32)
+    for i in range(lut.shape[0]):
+        lut[i] = palette_color(i / LUT_STEPS, 1, palette)
+    return lut
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def lut_pixels(color_data, max_iter, lut, pixels):
+    """
+    Colors a 2d array of normalized escape iterations into the 1d RGB pixel buffer with a palette lookup table
+    Used to recolor a frame without iterating it again
+    :param color_data: 2d array of normalized escape iterations ([x][y])
+    :param max_iter: maximum iterations
+    :param lut: palette lookup table, see palette_lut
+    :param pixels: 1d RGB array with separate RGB values
+    """
+    w = color_data.shape[0]
+    h = color_data.shape[1]
+    scale = LUT_STEPS / max(1, max_iter // 4)
+    for y in prange(h):
+        for x in range(w):
+            color = lut[int(color_data[x, y] * scale) % lut.shape[0]]
+            idx = (y * w + x) * 3
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def escape_histogram(color_data, max_iter, stride=1):
+    """
+    Counts the escaped points per escape value bin
+    Rows are split into chunks with their own histograms, which are summed at the end
+    :param color_data: 2d array of normalized escape iterations ([x][y])
+    :param max_iter: maximum iterations
+    :param stride: distance between the counted columns and rows
+    :return: array of HIST_BINS counts over escape values 0 to max_iter + 1
+    """
+    w = color_data.shape[0]
+    h = color_data.shape[1]
+    scale = HIST_BINS / (max_iter + 1)
+    rows = (h + stride - 1) // stride
+    chunks = min(rows, 64)
+    partial = np.zeros((chunks, HIST_BINS), dtype=np.int64)
+    for k in prange(chunks):
+        for j in range(k * rows // chunks, (k + 1) * rows // chunks):
+            y = j * stride
+            for x in range(0, w, stride):
+                value = color_data[x, y]
+                if value > 0:
+                    partial[k, min(int(value * scale), HIST_BINS - 1)] += 1
+    hist = np.zeros(HIST_BINS, dtype=np.int64)
+    for b in prange(HIST_BINS):
+        for k in range(chunks):
+            hist[b] += partial[k, b]
+    return hist
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def escape_cdf(hist, coloring):
+    """
+    Turns an escape value histogram into the positions of the bin edges on the palette (0 to 1)
+    COLOR_EQUALIZE uses the cumulative distribution, COLOR_AUTO stretches the occupied bins linearly
+    :param hist: escape value histogram
+    :param coloring: COLOR_AUTO or COLOR_EQUALIZE
+    :return: array of HIST_BINS + 1 positions
+    """
+    cdf = np.zeros(HIST_BINS + 1, dtype=np.float64)
+    total = hist.sum()
+    if total == 0:
+        return cdf
+    if coloring == COLOR_EQUALIZE:
+        running = 0
+        for b in range(HIST_BINS):
+            running += hist[b]
+            cdf[b + 1] = running / total
+        return cdf
+    lo = 0
+    while hist[lo] == 0:
+        lo += 1
+    hi = HIST_BINS
+    while hist[hi - 1] == 0:
+        hi -= 1
+    for b in range(HIST_BINS + 1):
+        cdf[b] = min(max((b - lo) / (hi - lo), 0.), 1.)
+    return cdf
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def cdf_pixels(color_data, max_iter, cdf, lut, pixels, stride=1):
+    """
+    Colors a 2d array of normalized escape iterations into the 1d RGB pixel buffer, placing every escaped point on
+    the palette (first to last color) by its position in cdf, points that didn't escape get the first color
+    :param color_data: 2d array of normalized escape iterations ([x][y])
+    :param max_iter: maximum iterations
+    :param cdf: palette positions of the histogram bin edges, see escape_cdf
+    :param lut: palette lookup table, see palette_lut
+    :param pixels: 1d RGB array with separate RGB values
+    :param stride: distance between the colored columns and rows, see color_pixels
+    """
+    w = color_data.shape[0]
+    h = color_data.shape[1]
+    scale = HIST_BINS / (max_iter + 1)
+    span = lut.shape[0] - LUT_STEPS
+    for y in prange(h):
+        for x in range(w):
+            value = color_data[x - x % stride, y - y % stride]
+            color = lut[0]
+            if value > 0:
+                pos = min(value * scale, HIST_BINS - 1e-9)
+                b = int(pos)
+                t = cdf[b] + (cdf[b + 1] - cdf[b]) * (pos - b)
+                color = lut[int(t * span)]
+            idx = (y * w + x) * 3
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def color_pixels(color_data, max_iter, palette, pixels, stride=1):
+    """
+    Colors a 2d array of normalized escape iterations straight into the 1d RGB pixel buffer
+    With a stride, every stride-th column and row colors its stride x stride block (progressive rendering)
+    :param color_data: 2d array of normalized escape iterations ([x][y])
+    :param max_iter: maximum iterations
+    :param palette: color palette
+    :param pixels: 1d RGB array with separate RGB values
+    :param stride: distance between the colored columns and rows
+    """
+    w = color_data.shape[0]
+    h = color_data.shape[1]
+    div = max(1, max_iter // 4)
+    for y in prange(h):
+        for x in range(w):
+            color = palette_color(color_data[x - x % stride, y - y % stride], div, palette)
+            idx = (y * w + x) * 3
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
+
+
+@jit('int32(int32, int32, int32)', cache=True)
+def get_pos(x, y, w):
+    return (y * w + x) * 3
+
+
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def get_data(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette, pixels, values,
+             bl_x_lo=0., bl_y_lo=0., tr_x_lo=0., tr_y_lo=0., checks=0, y0=0, y1=-1):
+    """
+    Renders the graph straight into the 1d RGB pixel buffer in a single parallel pass
+    Every pixel's coordinates are generated in place (the same values as escape_call's linspaces), iterated with the
+    kernel escape_call would use and colored like parse_color_data, so no intermediate frame arrays are allocated
+    The escape values are also stored in values, so the frame can be recolored with lut_pixels
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :param palette: color palette
+    :param pixels: 1d RGB array with separate RGB values
+    :param values: 2d array ([x][y]) the normalized escape iterations are stored in
+    :param bl_x_lo: low order part of bl_x
+    :param bl_y_lo: low order part of bl_y
+    :param tr_x_lo: low order part of tr_x
+    :param tr_y_lo: low order part of tr_y
+    :param checks: bit flags of the interior checks for the float64 z^2 kernels
+    :param y0: first row computed
+    :param y1: end of the rows computed, -1 for h (so a frame can be computed in strips)
+    :return: array of counts for the bulb, periodicity and derivative checks
+    """
+    if y1 < 0:
+        y1 = h
+    dd = (mode == 0 or mode == 1 or mode == 7) and dd_needed(w, bl_x, bl_y, tr_x, tr_y)
+    step_x = (tr_x - bl_x) / w
+    step_y = (tr_y - bl_y) / h
+    # see dd_linspace
+    dd_step_x = ((tr_x - bl_x) + (tr_x_lo - bl_x_lo)) / w
+    dd_step_y = ((tr_y - bl_y) + (tr_y_lo - bl_y_lo)) / h
+    div = max(1, max_iter // 4)
+    row_counts = np.zeros((h, 3), dtype=np.int64)
+    for y in prange(y0, y1):
+        zi = y * step_y + bl_y
+        zi_lo = 0.
+        if dd:
+            zi, zi_lo = dd_add(bl_y, bl_y_lo, y * dd_step_y, 0.)
+        for x in range(w):
+            if dd:
+                zr, zr_lo = dd_add(bl_x, bl_x_lo, x * dd_step_x, 0.)
+                if mode == 1:
+                    value = mandel_z2_dd(zr, zr_lo, zi, zi_lo, limit, max_iter)
+                else:
+                    value = julia_z2_dd(zr, zr_lo, zi, zi_lo, c, limit, max_iter)
+            else:
+                z = complex(x * step_x + bl_x, zi)
+                stopped = INTERIOR_NONE
+                if checks and (mode == 0 or mode == 7):
+                    value, stopped = julia_z2_interior(z, c, limit, max_iter, checks)
+                elif checks and mode == 1:
+                    value, stopped = mandel_z2_interior(z, limit, max_iter, checks)
+                else:
+                    value = escape(mode, z, c, limit, max_iter)
+                if stopped != INTERIOR_NONE:
+                    row_counts[y, stopped - 1] += 1
+            values[x, y] = value
+            color = palette_color(value, div, palette)
+            idx = (y * w + x) * 3
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
+    counts = np.zeros(3, dtype=np.int64)
+    for y in range(h):
+        counts += row_counts[y]
+    return counts
+
+
+def get_boundary_data(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette, pixels, values):
+    """
+    Same as get_data() but renders with the Mariani-Silver algorithm
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param bl_x: bottom left x coordinate of the graph
+    :param bl_y: bottom left y coordinate of the graph
+    :param tr_x: top right x coordinate of the graph
+    :param tr_y: top right y coordinate of the graph
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :param palette: color palette
+    :param pixels: 1d RGB array with separate RGB values
+    :param values: 2d array ([x][y]) the normalized escape iterations are stored in
+    :return: number of pixels that weren't evaluated
+    """
+    zr = np.linspace(bl_x, tr_x, w, dtype=np.float64, endpoint=False)
+    zi = np.linspace(bl_y, tr_y, h, dtype=np.float64, endpoint=False)
+    # tiles are handed out one at a time
+    with row_chunks(1):
+        color_data, skipped = mariani_silver(mode, zr, zi, c, limit, max_iter)
+    values[:] = color_data
+    color_pixels(color_data, max_iter, palette, pixels)
+    return skipped
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def unpack_colors(color_data, w, h, pixels):
+    """
+    Converts the 2d RGB array into a 1d RGB array with separate RGB values
+    :param color_data: 2d RGB array
+    :param w: screen width
+    :param h: screen height
+    :param pixels: 1d RGB array with separate RGB values
+    """
+    # colors = np.zeros(idx_max, dtype=np.int16)
+    for y in range(h):
+        for x in range(w):
+            idx = get_pos(x, y, w)
+            color = color_data[x][y]
+            pixels[idx] = (color >> 16) & 0xff
+            pixels[idx + 1] = (color >> 8) & 0xff
+            pixels[idx + 2] = color & 0xff
@@ -0,0 +1,221 @@
+"""
+User-defined iteration formulas
+
+A formula in z and c (e.g. z**4 + c, c*exp(z), z**2 + c/z) is translated into the source of a julia and a
+mandelbrot escape kernel with the same layout as the built-in ones in escape_time (julia_z3 / julia_z3_vec, ...).
+Integer powers are expanded into repeated multiplication (square and multiply), other powers use np.power.
+The source is written to FORMULA_CACHE under the hash of the generated code and imported from there, with every
+kernel compiled with cache=True, so numba keeps the compiled kernels next to it and reopening a formula only loads
+them from disk.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import os
+import sys
+
+
+FORMULA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'formula_cache')
+# functions a formula may call, all map to numpy ufuncs
+FUNCTIONS = ['exp', 'log', 'sqrt', 'sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh']
+CONSTANTS = {'pi': 'np.pi', 'e': 'np.e'}
+# integer powers up to this are expanded into multiplications
+MAX_EXPANDED_POWER = 64
+
+KERNEL_TEMPLATE = '''"""
+Generated by formula.py from: {text}
+"""
+
+import numpy as np
+from numba import jit, vectorize
+
+
+@jit(nopython=True, cache=True)
+def step(z, c):
+{body}
+
+
+@jit(nopython=True, cache=True)
+def julia(z, c, limit, max_iter):
+    for n in range(max_iter):
+        zmag = np.abs(z)
+        if zmag > limit:
+            return {escaped}
+        z = step(z, c)
+    return 0.
+
+
+@jit(nopython=True, cache=True)
+def mandel(c, limit, max_iter):
+    return julia({start}, c, limit, max_iter)
+
+
+@vectorize('float64(complex128, complex128, float64, int32)', target='parallel', cache=True)
+def julia_vec(z, c, limit, max_iter):
+    return julia(z, c, limit, max_iter)
+
+
+@vectorize('float64(complex128, float64, int32)', target='parallel', cache=True)
+def mandel_vec(c, limit, max_iter):
+    return mandel(c, limit, max_iter)
+'''
+
+# compiled formulas of this session by formula text
+_loaded = {}
+
+
+class FormulaCompiler:
+    def __init__(self):
+        """
+        Translates a formula's syntax tree into statements of step(z, c)
+        Every power is bound to a temporary, so the base is only evaluated once
+        """
+        self.lines = []
+        self.temps = 0
+        # z appears in a denominator, a negative power or a log, so the mandelbrot kernels can't start at 0
+        self.singular = False
+
+    def temp(self, expr):
+        name = 't%i' % self.temps
+        self.temps += 1
+        self.lines.append('    %s = %s' % (name, expr))
+        return name
+
+    def power(self, base, n):
+        """
+        Expands base ** n (n > 0) into square and multiply
+        :param base: name of the base
+        :param n: exponent
+        :return: name of the result
+        """
+        result = None
+        square = base
+        while True:
+            if n & 1:
+                result = square if result is None else self.temp('%s * %s' % (result, square))
+            n >>= 1
+            if not n:
+                return result
+            square = self.temp('%s * %s' % (square, square))
+
+    def visit(self, node):
+        """
+        Compiles an expression node
+        :param node: ast node
+        :return: source of the value and its degree in z (None if it isn't polynomial-like)
+        """
+        if isinstance(node, ast.Name):
+            if node.id in ['z', 'c']:
+                return node.id, 1 if node.id == 'z' else 0
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id], 0
+            raise ValueError('unknown name %s' % node.id)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, complex)) \
+                and not isinstance(node.value, bool):
+            return repr(node.value), 0
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand, degree = self.visit(node.operand)
+            return '(%s%s)' % ('-' if isinstance(node.op, ast.USub) else '+', operand), degree
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            return self.visit_power(node)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div)):
+            left, left_degree = self.visit(node.left)
+            right, right_degree = self.visit(node.right)
+            degree = None
+            if left_degree is not None and right_degree is not None:
+                if isinstance(node.op, ast.Mult):
+                    degree = left_degree + right_degree
+                elif isinstance(node.op, ast.Div):
+                    degree = left_degree - right_degree
+                else:
+                    degree = max(left_degree, right_degree)
+            if isinstance(node.op, ast.Div) and right_degree != 0:
+                self.singular = True
+            op = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}[type(node.op)]
+            return '(%s %s %s)' % (left, op, right), degree
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS \
+                and len(node.args) == 1 and not node.keywords:
+            arg, degree = self.visit(node.args[0])
+            if node.func.id == 'log' and degree != 0:
+                self.singular = True
+            return 'np.%s(%s)' % (node.func.id, arg), 0 if degree == 0 else None
+        raise ValueError('unsupported expression %s' % ast.dump(node))
+
+    def visit_power(self, node):
+        base, degree = self.visit(node.left)
+        exponent = None
+        if isinstance(node.right, ast.Constant):
+            exponent = node.right.value
+        elif isinstance(node.right, ast.UnaryOp) and isinstance(node.right.op, ast.USub) \
+                and isinstance(node.right.operand, ast.Constant):
+            exponent = -node.right.operand.value
+        if isinstance(exponent, float) and exponent.is_integer():
+            exponent = int(exponent)
+        if isinstance(exponent, int) and not isinstance(exponent, bool) and 0 < abs(exponent) <= MAX_EXPANDED_POWER:
+            result = self.power(self.temp(base), abs(exponent))
+            if exponent < 0:
+                if degree != 0:
+                    self.singular = True
+                result = '(1 / %s)' % result
+            return result, None if degree is None else degree * exponent
+        if exponent == 0:
+            return '(1 + 0j)', 0
+        exponent_source, exponent_degree = self.visit(node.right)
+        if isinstance(exponent, (int, float)) and not isinstance(exponent, bool):
+            if exponent < 0 and degree != 0:
+                self.singular = True
+            return 'np.power(%s, %s)' % (base, exponent_source), None if degree is None else degree * exponent
+        return 'np.power(%s, %s)' % (base, exponent_source), 0 if exponent_degree == 0 and degree == 0 else None
+
+
+def formula_source(text):
+    """
+    Generates the source of the kernel module of a formula
+    The julia kernel smooths the escape iteration with the formula's degree in z when it is above 1 (like julia_z3),
+    otherwise it returns the plain escape iteration (like julia_sin)
+    The mandelbrot kernel starts at 0, or at c when the formula isn't defined at z = 0
+    :param text: formula in z and c
+    :return: module source
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError('invalid formula %s' % text)
+    compiler = FormulaCompiler()
+    expr, degree = compiler.visit(tree.body)
+    body = '\n'.join(compiler.lines + ['    return %s + 0j' % expr])
+    if degree is not None and degree > 1:
+        escaped = 'n + 1 - np.log2(np.log2(zmag)) / np.log2(%r)' % float(degree)
+    else:
+        escaped = 'float(n)'
+    # the parsed formula instead of the text, which could close the docstring in a comment
+    return KERNEL_TEMPLATE.format(text=ast.unparse(tree), body=body, escaped=escaped,
+                                  start='c' if compiler.singular else '0j')
+
+
+def load_formula(text):
+    """
+    Returns the compiled kernels of a formula, see KERNEL_TEMPLATE
+    The module is written to FORMULA_CACHE once per hash, numba caches its compiled kernels next to it
+    :param text: formula in z and c
+    :return: module with julia, mandel, julia_vec and mandel_vec
+    """
+    if text in _loaded:
+        return _loaded[text]
+    source = formula_source(text)
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(FORMULA_CACHE, 'formula_%s.py' % key)
+    if not os.path.exists(path):
+        os.makedirs(FORMULA_CACHE, exist_ok=True)
+        tmp_path = '%s.%i.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as file:
+            file.write(source)
+        os.replace(tmp_path, path)
+    spec = importlib.util.spec_from_file_location('formula_%s' % key, path)
+    module = importlib.util.module_from_spec(spec)
+    # numba looks the module up by name when it loads cached kernels
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    _loaded[text] = module
+    return module
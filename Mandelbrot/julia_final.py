@@ -10,228 +10,61 @@ Arrow keys to move screen
 Click to use buttons
 Click to select fields, type to enter characters, enter to parse input
 Click and hold to move sliders
+f(z) field: formula of the f Julia and f Mandel modes in z and c, e.g. z**4 + c, c*exp(z), z**2 + c/z
 Keys
 r: resets screen
 c: toggles mouse c
+v: toggles the inverse iteration (MIIM) preview of the z^2+c julia set while mouse c moves
+d: toggles deep zoom (perturbation, z^2+c only)
+b: toggles boundary tracing (Mariani-Silver)
+1, 2, 3: toggle the bulb, periodicity and derivative interior checks (z^2+c only)
+a: toggles auto-ranged coloring
+e: toggles histogram-equalized coloring
+t: toggles the multi-process tile renderer
+l: toggles the lane-batched z^2 kernels (float32 at shallow zooms)
+x: toggles the julia set atlas over mandelbrot views (z^2, z^3, z^1.5), click a thumbnail to go to its julia set
+-, =: fewer or more atlas columns
+i: toggles the adaptive max_iter (picked from the zoom and raised while more iterations still change the frame)
+m: toggles computing only one half of symmetric views (mirrored across the real axis or through 0)
 j: previous saved coords
 k: next saved coords
 s: save current coords
 g: goto selected coords
 p: delete selected coords
+The saved coords around the selected ones (or all of them with Fetch All) are rendered ahead in idle time, a goto to
+cached coords is shown at once. MB field: memory cap of the cache
 
-Note: split screen is really slow because of some stupid bug
+Split z^2+c shows the julia set (left) next to the mandelbrot set (right), both halves render on their own. The
+mandelbrot half is kept until it is zoomed or reset, with mouse c on only the julia half renders while c moves.
 """
 
 import ctypes
+import decimal
 import time
 
 import numpy as np
 import pyglet
-from numba import jit, vectorize, guvectorize
 
 import pyg
-
-
-@vectorize('float64(complex128, complex128, float64, int32)', target='parallel')
-def julia_z2_vec(z, c, limit, max_iter):
-    """
-    Calculates orbit of z under T(z) = z^2 + c with z and c as the input
-    :param z: z
-    :param c: c
-    :param limit: escape radius
-    :param max_iter: maximum iterations
-    :return: normalized escape iteration
-    """
-    limit2 = limit * limit
-    zr = z.real
-    zi = z.imag
-    cr = c.real
-    ci = c.imag
-    for n in range(max_iter):
-        zr2 = zr * zr
-        zi2 = zi * zi
-        zmag2 = zr2 + zi2
-        if zmag2 > limit2:
-            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
-        zi = 2 * zr * zi + ci
-        zr = zr2 - zi2 + cr
-    return 0
-
-
-
-@vectorize('float64(complex128, float64, int32)', target='parallel')  # using guvectorize takes the same time
-def mandel_z2_vec(c, limit, max_iter):
-    """
-    Calculates orbit of 0 under T(z) = z^2 + c with c as the input
-    :param c: c
-    :param limit: escape radius
-    :param max_iter: maximum iterations
-    :return: normalized escape iteration
-    """
-    limit2 = limit * limit
-    zr = 0
-    zi = 0
-    cr = c.real
-    ci = c.imag
-    for n in range(max_iter):
-        zr2 = zr * zr
-        zi2 = zi * zi
-        zmag2 = zr2 + zi2
-        if zmag2 > limit2:
-            return n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
-        zi = 2 * zr * zi + ci
-        zr = zr2 - zi2 + cr
-    return 0
-
-
-@vectorize('float64(complex128, complex128, float64, int32)', target='parallel')
-def julia_z3_vec(z, c, limit, max_iter):
-    for n in range(max_iter):
-        zmag = np.abs(z)
-        if zmag > limit:
-            return n + 1 - np.log2(np.log2(zmag)) / np.log2(3)
-        z = z * z * z + c
-    return 0
-
-
-@vectorize('float64(complex128, float64, int32)', target='parallel')
-def mandel_z3_vec(c, limit, max_iter):
-    z = 0
-    for n in range(max_iter):
-        zmag = np.abs(z)
-        if zmag > limit:
-            return n + 1 - np.log2(np.log2(zmag)) / np.log2(3)
-        z = z * z * z + c
-    return 0
-
-
-@vectorize('float64(complex128, complex128, float64, int32)', target='parallel')
-def julia_z15_vec(z, c, limit, max_iter):
-    for n in range(max_iter):
-        zmag = np.abs(z)
-        if zmag > limit:
-            return n + 1 - np.log2(np.log2(zmag)) / np.log2(1.5)
-        z = np.power(z, 1.5) + c
-    return 0
-
-
-@vectorize('float64(complex128, float64, int32)', target='parallel')
-def mandel_z15_vec(c, limit, max_iter):
-    z = 0
-    for n in range(max_iter):
-        zmag = np.abs(z)
-        if zmag > limit:
-            return n + 1 - np.log2(np.log2(zmag)) / np.log2(1.5)
-        z = np.power(z, 1.5) + c
-    return 0
-
-
-@vectorize('float64(complex128, complex128, float64, int32)', target='parallel')
-def julia_sin_vec(z, c, limit, max_iter):
-    for n in range(max_iter):
-        zmag = np.abs(z)
-        if zmag > limit:
-            return n
-        z = c * np.sin(z)
-    return 0
-
-
-@jit
-def vectorize_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette):
-    """
-    Calls the vectorized function according to the mode
-    0 - filled julia set of z^2 + c
-    1 - mandelbrot set of z^2 + c
-    2 - filled julia set of z^3 + c
-    Returns a 2d RGB array
-    :param mode: mode
-    :param w: screen width
-    :param h: screen height
-    :param bl_x: bottom left x coordinate of the graph
-    :param bl_y: bottom left y coordinate of the graph
-    :param tr_x: top right x coordinate of the graph
-    :param tr_y: top right y coordinate of the graph
-    :param limit: escape radius
-    :param max_iter: maximum iterations
-    :param c: c
-    :param palette: color palette
-    :return: 2d RGB array
-    """
-    zr = np.linspace(bl_x, tr_x, w, dtype=np.float64, endpoint=False)
-    zi = np.linspace(bl_y, tr_y, h, dtype=np.float64, endpoint=False)
-    z = zr[:, None] + zi * 1j  # [x][y]
-    if mode in [0, 7]:
-        color_data = julia_z2_vec(z, c, limit, max_iter)
-    elif mode == 1:
-        color_data = mandel_z2_vec(z, limit, max_iter)
-    elif mode == 2:
-        color_data = julia_z3_vec(z, c, limit, max_iter)
-    elif mode == 3:
-        color_data = mandel_z3_vec(z, limit, max_iter)
-    elif mode == 4:
-        color_data = julia_z15_vec(z, c, limit, max_iter)
-    elif mode == 5:
-        color_data = mandel_z15_vec(z, limit, max_iter)
-    else:
-        color_data = julia_sin_vec(z, c, limit, max_iter)
-
-    return parse_color_data(color_data, max_iter, palette)
-
-
-@guvectorize('(float64[:], int32[:], int32[:,:], int32[:])', '(n),(),(p,q)->(n)', target='parallel')
-def parse_color_data(color_data, max_iter, palette, output):
-    """
-    Turns an array of normalized escape iterations into an array of RGB colors according to the palette
-    :param color_data: array of normalized escape iterations
-    :param max_iter: maximum iterations
-    :param palette: color palette
-    :param output: the array of RGB colors
-    """
-    div = max_iter[0] // 4
-    for i in range(color_data.shape[0]):
-        norm = color_data[i] / div
-        intnorm = int(norm)
-        c1 = palette[intnorm % len(palette)]
-        c2 = palette[(intnorm + 1) % len(palette)]
-        t = norm % 1
-        r = int(c1[0] + (c2[0] - c1[0]) * t)
-        g = int(c1[1] + (c2[1] - c1[1]) * t)
-        b = int(c1[2] + (c2[2] - c1[2]) * t)
-        output[i] = ((r & 0xff) << 16) | ((g & 0xff) << 8) | (b & 0xff)
-
-
-@jit('int32(int32, int32, int32)')
-def get_pos(x, y, w):
-    return (y * w + x) * 3
-
-
-@jit
-def get_data(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette, pixels):
-    """
-    Passes arguments to vectorize_call() since it can't have a for loop without breaking for some stupid reason
-    Then converts and returns the 2d RGB array into a 1d RGB array with separate RGB values
-    :param mode: mode
-    :param w: screen width
-    :param h: screen height
-    :param bl_x: bottom left x coordinate of the graph
-    :param bl_y: bottom left y coordinate of the graph
-    :param tr_x: top right x coordinate of the graph
-    :param tr_y: top right y coordinate of the graph
-    :param limit: escape radius
-    :param max_iter: maximum iterations
-    :param c: c
-    :param palette: color palette
-    :return: 1d RGB array with separate RGB values
-    """
-    color_data = vectorize_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette)
-    # colors = np.zeros(idx_max, dtype=np.int16)
-    for y in range(h):
-        for x in range(w):
-            idx = get_pos(x, y, w)
-            color = color_data[x][y]
-            pixels[idx] = (color >> 16) & 0xff
-            pixels[idx + 1] = (color >> 8) & 0xff
-            pixels[idx + 2] = color & 0xff
+import perturbation
+from escape_time import ADAPT_MAX, CHECK_BULB, CHECK_DERIV, CHECK_PERIOD, COLOR_AUTO, COLOR_EQUALIZE, COLOR_FIXED
+from escape_time import color_pixels, dd_needed, escape_grid, get_boundary_data, get_data, init_state
+from escape_time import cdf_pixels, escape_cdf, escape_histogram, lut_pixels, palette_lut, resume_escape
+from escape_time import f32_enough, grid_coords, max_iter_needed, resume_symmetric, row_chunks, split_decimal
+from escape_time import atlas_grid, julia_atlas, symmetric_grid, symmetric_split, zoom_max_iter
+from escape_time import MIIM_CAP, julia_miim
+from formula import formula_source, load_formula
+from render_cache import CACHE_MB, RenderCache
+from tile_pool import TileRenderer
+from worker import RenderWorker, kernel_lock
+
+
+# strides of the progressive passes, the first image is at 1/8 resolution
+PASSES = [8, 4, 2, 1]
+# rows of a prefetched frame computed between checks for a waiting render
+PREFETCH_ROWS = 32
+# rows of the mandelbrot half of the split view computed per turn on the kernels, so the julia half can cut in
+KERNEL_ROWS = 32
 
 
 class JuliaScreen(pyg.screen.GraphScreen):
@@ -245,6 +78,37 @@ class JuliaScreen(pyg.screen.GraphScreen):
 
         self.palette = np.array([[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]], dtype=np.int32)
 
+        # iteration state of the last frame, see resume()
+        self.state_key = None
+        self.state_view = None
+        self.state_max_iter = 0
+        self.state_z = None
+        self.state_iters = None
+        self.state_data = None
+        # escape values of the last full frame, see recolor()
+        self.frame_values = None
+        self.frame_max_iter = 0
+        # coloring of the last full frame and its cdf (None for the fixed coloring), reused while dragging c
+        self.frame_coloring = COLOR_FIXED
+        self.frame_cdf = None
+
+        # worker processes of the tile renderer, started on first use
+        self.tiles = None
+
+        # max_iter the adaptive mode picked from the last frame, see adapt()
+        self.adapt_iter = None
+        # cs and cell size of the atlas shown, None when the frame isn't an atlas
+        self.atlas = None
+
+        # escape values of saved coords rendered ahead, see prefetch()
+        self.cache = RenderCache(self.get_val('cache_mb'))
+        # values and rows done of the prefetched views that aren't finished, by cache key
+        self.partial = {}
+
+        # frames are computed on a worker thread and uploaded on the pyglet thread, see render()
+        self.worker = RenderWorker()
+        pyglet.clock.schedule_interval(self.upload, 1 / 60)
+
     def set_mode(self, mode):
         """
         Sets the mode and resets
@@ -258,75 +122,484 @@ class JuliaScreen(pyg.screen.GraphScreen):
         Resets the graph
         """
         self.set_val('max_iter', 24)
+        self.adapt_iter = None
         super().reset_screen()
 
-    def render(self):
+    def render(self, drag=False):
         """
-        Renders the screen and creates an image with the pixel data
+        Requests a frame of the current view from the render worker
+        The values are read here, the frame is computed by compute() on the worker thread and shown by upload()
+        :param drag: if the frame is part of an interactive drag, which keeps the last cdf if keep_cdf is on and draws
+            the z^2+c julia set by inverse iteration if miim is on
         """
-        # calc
-        start = time.time()
-        bl_x, bl_y = self.on_plot(0, 0)
-        tr_x, tr_y = self.on_plot(self.w, self.h)
-        c = self.get_val('c')
+        if self.mode in [8, 9]:
+            try:
+                formula_source(self.get_val('formula'))
+            except ValueError:
+                self.valset.set_val('stats', ' invalid formula')
+                return
+        adaptive = self.get_val('adaptive') and self.mode != 7
+        if adaptive:
+            self.set_val('max_iter', max(zoom_max_iter(self.total_zoom), self.adapt_iter or 0))
+        pbl_x, pbl_y = self.on_plot_precise(0, 0)
+        ptr_x, ptr_y = self.on_plot_precise(self.w, self.h)
+        self.update_palette()
+        view = self.lattice_view()
+        zr, zi = self.lattice_coords(view)
+        coloring = self.coloring()
+        cdf = None
+        if drag and self.get_val('keep_cdf') and coloring == self.frame_coloring:
+            cdf = self.frame_cdf
+        frame = {
+            'mode': self.mode,
+            'w': self.w,
+            'h': self.h,
+            'corners': [split_decimal(pbl_x), split_decimal(pbl_y), split_decimal(ptr_x), split_decimal(ptr_y)],
+            'center': (self.pgx, self.pgy, self.gw, self.gh),
+            'view': view,
+            'zr': zr,
+            'zi': zi,
+            'c': self.get_val('c'),
+            'max_iter': self.get_val('max_iter'),
+            'limit': self.get_val('limit'),
+            'palette': self.palette.copy(),
+            'coloring': coloring,
+            'cdf': cdf,
+            'checks': self.checks(),
+            'perturb': self.get_val('perturb'),
+            'boundary': self.get_val('boundary'),
+            'formula': self.get_val('formula'),
+            'tiles': self.get_val('tiles'),
+            'lanes': self.get_val('lanes'),
+            'symmetry': self.get_val('symmetry'),
+            'adaptive': adaptive and not drag,
+            'atlas': self.get_val('atlas') and self.mode in [1, 3, 5],
+            'atlas_cols': self.get_val('atlas_cols'),
+            'miim': self.get_val('miim') and drag and self.mode in [0, 7],
+            'start': time.time(),
+        }
+        # recoloring waits for this frame instead of showing the old one
+        self.frame_values = None
+        self.worker.submit(self.compute, frame)
+
+    def compute(self, generation, frame):
+        """
+        Computes a frame on the worker thread and posts its pixel data
+        The default escape time path is computed in progressive passes and stops early if a newer frame was requested
+        :param generation: generation of the render job
+        :param frame: values read by render()
+        """
+        mode, w, h = frame['mode'], frame['w'], frame['h']
+        (bl_x, bl_x_lo), (bl_y, bl_y_lo), (tr_x, tr_x_lo), (tr_y, tr_y_lo) = frame['corners']
+        c, max_iter, limit = frame['c'], frame['max_iter'], frame['limit']
+        palette, checks = frame['palette'], frame['checks']
+        coloring, cdf = frame['coloring'], frame['cdf']
+        pixels = np.empty(w * h * 3, dtype=np.ubyte)
+        values = np.empty((w, h), dtype=np.float64)
+        # the fused kernels color the pixels themselves
+        fused = False
+        if frame['atlas']:
+            cs, cell, zr, zi = atlas_grid(frame['zr'], frame['zi'], frame['atlas_cols'])
+            values = np.zeros((w, h), dtype=np.float64)
+            with kernel_lock, row_chunks():
+                # the julia modes are the mandelbrot modes' predecessors
+                julia_atlas(mode - 1, cs, zr, zi, cell, limit, max_iter, values)
+            frame['atlas'] = cs, cell
+            stats = '      atlas: %ix%i' % cs.shape
+        elif frame['miim']:
+            # only the julia set's boundary, as a preview while c moves
+            with kernel_lock:
+                julia_miim(c, bl_x, bl_y, tr_x, tr_y, MIIM_CAP, max_iter, values)
+            stats = '       miim: cap %i' % MIIM_CAP
+        elif frame['perturb'] and mode in [0, 1]:
+            pgx, pgy, gw, gh = frame['center']
+            with kernel_lock:
+                values, refs = perturbation.perturb_call(mode, w, h, pgx, pgy, gw, gh, limit, max_iter, c)
+            stats = ' references: %i' % refs
+        elif mode in [8, 9]:
+            # compiles the formula on first use, or loads it from the kernel cache
+            formula = load_formula(frame['formula'])
+            with kernel_lock:
+                values = escape_grid(mode, frame['zr'], None, frame['zi'], None, limit, max_iter, c, formula=formula)
+            stats = ''
+        elif frame['boundary']:
+            with kernel_lock:
+                skipped = get_boundary_data(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette, pixels,
+                                            values)
+            fused = True
+            stats = '    skipped: %.1f%%' % (skipped * 100 / (w * h))
+        elif mode in [0, 1, 7] and (checks or dd_needed(w, bl_x, bl_y, tr_x, tr_y)):
+            with kernel_lock, row_chunks():
+                counts = get_data(mode, w, h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, palette, pixels, values,
+                                  bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo, checks)
+            stats = ' B %.0f%% P %.0f%% D %.0f%%' % tuple(counts * 100 / (w * h)) if checks else ''
+            fused = True
+        elif frame['tiles']:
+            if self.tiles is None:
+                self.tiles = TileRenderer()
+            rendered = self.tiles.render(mode, frame['zr'], frame['zi'], c, limit, max_iter, palette,
+                                         lambda: self.worker.cancelled(generation))
+            if rendered is None:
+                return
+            values, pixels = rendered
+            stats = '  processes: %i' % self.tiles.processes
+            fused = True
+        elif frame['lanes'] and mode in [0, 1, 7]:
+            zr, zi = frame['zr'], frame['zi']
+            if f32_enough(w, bl_x, bl_y, tr_x, tr_y):
+                zr, zi = zr.astype(np.float32), zi.astype(np.float32)
+            split = symmetric_split(mode, zr, zi) if frame['symmetry'] else None
+            with kernel_lock:
+                if split is None:
+                    values = escape_grid(mode, zr, None, zi, None, limit, max_iter, c, lanes=True)
+                else:
+                    values = symmetric_grid(split, zr, zi, lambda xs, ys: escape_grid(mode, xs, None, ys, None, limit,
+                                                                                      max_iter, c, lanes=True))
+            stats = '      lanes: %s' % zr.dtype
+        else:
+            zr, zi = frame['zr'], frame['zi']
+            self.resume(mode, frame['view'], zr, zi, limit, max_iter, c)
+            first = None
+            resumed = 0
+            passes = PASSES
+            # the mirrored pixels of symmetric views are copied instead of iterated
+            split = symmetric_split(mode, zr, zi, passes[0]) if frame['symmetry'] else None
+            for stride in passes:
+                if self.worker.cancelled(generation):
+                    return
+                # every iterated pixel covers its stride x stride block until a finer pass reaches it
+                pixels = np.empty(w * h * 3, dtype=np.ubyte)
+                with kernel_lock:
+                    with row_chunks():
+                        if split is None:
+                            resumed += resume_escape(mode, zr, zi, c, limit, max_iter, self.state_z,
+                                                     self.state_iters, self.state_data, stride)
+                        else:
+                            resumed += resume_symmetric(mode, zr, zi, c, limit, max_iter, self.state_z,
+                                                        self.state_iters, self.state_data, split, stride)
+                    frame_cdf = self.color(self.state_data, max_iter, palette, coloring, cdf, pixels, stride)
+                calctime = (time.time() - frame['start']) * 1000
+                if first is None:
+                    first = calctime
+                # the escape values of the last pass are kept for recoloring
+                values = self.state_data if stride == passes[-1] else None
+                self.worker.post(generation, (frame, pixels, values, frame_cdf,
+                                              '   iterated: %.1f%%' % (resumed * 100 / (w * h)), first, calctime))
+            return
+        if not fused or coloring != COLOR_FIXED:
+            with kernel_lock:
+                cdf = self.color(values, max_iter, palette, coloring, cdf, pixels)
+        calctime = (time.time() - frame['start']) * 1000
+        self.worker.post(generation, (frame, pixels, values, cdf, stats, calctime, calctime))
+
+    def checks(self):
+        """
+        Returns the bit flags of the selected interior checks
+        """
+        return ((CHECK_BULB if self.get_val('bulb_check') else 0) |
+                (CHECK_PERIOD if self.get_val('period_check') else 0) |
+                (CHECK_DERIV if self.get_val('deriv_check') else 0))
+
+    def cache_key(self, mode, gx, gy, zoom, max_iter, c):
+        """
+        Returns the cache key of a view at the current size and settings
+        :param mode: mode
+        :param gx: graph center x
+        :param gy: graph center y
+        :param zoom: graph zoom
+        :param max_iter: maximum iterations
+        :param c: c
+        """
+        return (mode, self.w, self.h, str(gx), str(gy), zoom, max_iter, c if mode in [0, 2, 4, 6] else None,
+                self.get_val('limit'), self.checks())
+
+    def prefetch(self, views):
+        """
+        Queues the views that aren't cached to be rendered in the render worker's idle time, replaces the queued ones
+        Views are rendered with the escape time kernels, so nothing is prefetched with deep zoom on
+        :param views: list of (mode, gx, gy, zoom, max_iter, c), in order
+        """
+        self.worker.clear_idle()
+        self.cache.set_limit(self.get_val('cache_mb'))
+        if self.get_val('perturb'):
+            return
+        partial = {}
+        for mode, gx, gy, zoom, max_iter, c in views:
+            key = self.cache_key(mode, gx, gy, zoom, max_iter, c)
+            if self.cache.has(key):
+                continue
+            bl_x, bl_y, tr_x, tr_y, zr, zi = self.view_coords(gx, gy, zoom)
+            corners = [split_decimal(bl_x), split_decimal(bl_y), split_decimal(tr_x), split_decimal(tr_y)]
+            # a view that was dropped from the queue before it was finished carries on where it stopped
+            values, progress = self.partial.get(key) or (np.empty((self.w, self.h), dtype=np.float64), [0])
+            partial[key] = values, progress
+            self.worker.submit_idle(self.prefetch_frame, key, corners, zr, zi, c, max_iter, values, progress)
+        self.partial = partial
+
+    def prefetch_frame(self, interrupted, key, corners, zr, zi, c, max_iter, values, progress):
+        """
+        Renders a prefetched view into the cache on the worker thread, a strip of rows at a time
+        Gives way to a render job between strips
+        :param interrupted: function returning if a render job is waiting
+        :param key: cache key, see cache_key()
+        :param corners: split corners of the view
+        :param zr: real coordinates of the columns
+        :param zi: imaginary coordinates of the rows
+        :param c: c
+        :param max_iter: maximum iterations
+        :param values: escape values of the view
+        :param progress: list with the number of rows done
+        :return: False if interrupted
+        """
+        mode, w, h, limit, checks = key[0], key[1], key[2], key[8], key[9]
+        (bl_x, bl_x_lo), (bl_y, bl_y_lo), (tr_x, tr_x_lo), (tr_y, tr_y_lo) = corners
+        zr_lo = zi_lo = None
+        if mode in [0, 1] and dd_needed(w, bl_x, bl_y, tr_x, tr_y):
+            zr, zr_lo, zi, zi_lo = grid_coords(mode, w, h, bl_x, bl_y, tr_x, tr_y, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo)
+        while progress[0] < h:
+            if interrupted():
+                return False
+            y0 = progress[0]
+            y1 = min(y0 + PREFETCH_ROWS, h)
+            with kernel_lock:
+                values[:, y0:y1] = escape_grid(mode, zr, zr_lo, zi[y0:y1], None if zi_lo is None else zi_lo[y0:y1],
+                                               limit, max_iter, c, checks)
+            progress[0] = y1
+        # finished views are dropped from self.partial by the next prefetch(), on the pyglet thread
+        self.cache.put(key, values)
+        return True
+
+    def show_cached(self):
+        """
+        Shows the current view from the cache without rendering it
+        :return: if the view was cached
+        """
+        if self.mode not in [0, 1, 2, 3, 4, 5, 6] or self.get_val('perturb'):
+            return False
         max_iter = self.get_val('max_iter')
+        values = self.cache.get(self.cache_key(self.mode, self.pgx, self.pgy, self.total_zoom, max_iter,
+                                               self.get_val('c')))
+        if values is None:
+            return False
+        start = time.time()
+        # a frame still being computed would replace this one
+        self.worker.cancel()
+        self.update_palette()
+        # the next frames carry over pixels from this view's lattice
+        self.lattice_view()
+        coloring = self.coloring()
+        pixels = np.empty(self.w * self.h * 3, dtype=np.ubyte)
+        self.frame_cdf = self.color(values, max_iter, self.palette, coloring, None, pixels)
+        self.frame_values = values
+        self.frame_max_iter = max_iter
+        self.frame_coloring = coloring
+        calctime = (time.time() - start) * 1000
+        self.valset.set_val('stats', '     cached: %i/%i' % (self.cache.hits, self.cache.hits + self.cache.misses))
+        self.valset.set_val('firsttime', calctime)
+        self.valset.set_val('calctime', calctime)
+        self.show(pixels)
+        return True
+
+    def color(self, values, max_iter, palette, coloring, cdf, pixels, stride=1):
+        """
+        Colors escape values into pixels, builds the cdf of the auto-ranged and equalized colorings if none is given
+        :param values: 2d array of normalized escape iterations ([x][y])
+        :param max_iter: maximum iterations
+        :param palette: palette
+        :param coloring: COLOR_FIXED, COLOR_AUTO or COLOR_EQUALIZE
+        :param cdf: cdf to reuse or None
+        :param pixels: 1d RGB array with separate RGB values
+        :param stride: distance between the iterated columns and rows, see color_pixels
+        :return: cdf used, None for the fixed coloring
+        """
+        if coloring == COLOR_FIXED:
+            color_pixels(values, max_iter, palette, pixels, stride)
+            return None
+        if cdf is None:
+            cdf = escape_cdf(escape_histogram(values, max_iter, stride), coloring)
+        cdf_pixels(values, max_iter, cdf, palette_lut(palette), pixels, stride)
+        return cdf
+
+    def coloring(self):
+        """
+        Returns the coloring selected by the coloring toggles, equalizing takes precedence over auto-ranging
+        """
+        if self.get_val('equalize'):
+            return COLOR_EQUALIZE
+        if self.get_val('auto_range'):
+            return COLOR_AUTO
+        return COLOR_FIXED
+
+    def upload(self, dt):
+        """
+        Uploads the latest frame posted by the worker, scheduled on the pyglet clock
+        :param dt: time since the last call
+        """
+        result = self.worker.take()
+        if result is None:
+            return
+        frame, pixels, values, cdf, stats, first, calctime = result
+        if pixels.shape[0] != self.pixels.shape[0]:
+            # the screen was resized after the frame was requested
+            return
+        self.atlas = frame['atlas'] or None
+        if values is not None:
+            self.frame_values = values
+            self.frame_max_iter = frame['max_iter']
+            self.frame_coloring = frame['coloring']
+            self.frame_cdf = cdf
+            if not np.array_equal(frame['palette'], self.palette):
+                # the palette was edited while the frame was computed
+                self.paint(pixels)
+        self.valset.set_val('stats', stats)
+        self.valset.set_val('firsttime', first)
+        self.valset.set_val('calctime', calctime)
+        self.show(pixels)
+        if values is not None and frame['adaptive']:
+            self.adapt(frame['max_iter'], values)
+
+    def adapt(self, max_iter, values):
+        """
+        Picks the max_iter of the adaptive mode from a finished frame
+        If more iterations would still change the frame, max_iter is doubled and the frame is rendered again (the
+        progressive path only continues the capped pixels), otherwise the next frames keep this max_iter (or the zoom's
+        starting max_iter when it is higher)
+        max_iter never goes down between frames, resume() would drop the iteration state of the last frame
+        :param max_iter: maximum iterations of the frame
+        :param values: 2d array of normalized escape iterations ([x][y])
+        """
+        capped, needed = max_iter_needed(values)
+        if capped and needed > max_iter and max_iter < ADAPT_MAX:
+            self.adapt_iter = min(2 * max_iter, ADAPT_MAX)
+            self.render()
+        else:
+            self.adapt_iter = max_iter
+
+    def recolor(self):
+        """
+        Recolors the last full frame with the current palette without iterating it again
+        A frame that is still being computed is recolored by upload() when it arrives
+        """
+        self.update_palette()
+        if self.frame_values is None or self.frame_values.shape != (self.w, self.h):
+            return
+        start = time.time()
+        pixels = np.empty(self.w * self.h * 3, dtype=np.ubyte)
+        self.paint(pixels)
+        self.valset.set_val('calctime', ((time.time() - start) * 1000))
+        self.show(pixels)
+
+    def paint(self, pixels):
+        """
+        Colors the last full frame with the current palette and the frame's cdf
+        :param pixels: 1d RGB array with separate RGB values
+        """
+        lut = palette_lut(self.palette)
+        if self.frame_cdf is None:
+            lut_pixels(self.frame_values, self.frame_max_iter, lut, pixels)
+        else:
+            cdf_pixels(self.frame_values, self.frame_max_iter, self.frame_cdf, lut, pixels)
+
+    def update_palette(self):
+        """
+        Sets the selected palette color from the palette sliders
+        """
         self.palette[self.get_val('pal_idx')] = [self.get_val('pal_r'), self.get_val('pal_g'), self.get_val('pal_b')]
-        limit = self.get_val('limit')
-        # colors = get_data(self.mode, self.w, self.h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, self.palette)
-        get_data(self.mode, self.w, self.h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, self.palette, self.pixels)
-        end = time.time()
-        self.valset.set_val('calctime', ((end - start) * 1000))
+
+    def show(self, pixels):
+        """
+        Uploads a frame's pixel data to the image
+        :param pixels: 1d RGB array with separate RGB values
+        """
+        # every frame gets its own buffer, so it is uploaded without a copy
+        self.pixels = pixels
+        self.ctpixels = np.ctypeslib.as_ctypes(pixels)
 
         # flush
         start = time.time()
-        if self.mode != 7:
-            # convert to ctypes ubyte array
-            # rawdata = colors.astype(np.ubyte).ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte))
-            # self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', rawdata)
-            self.img.set_data('RGB', self.img.width * 3, self.ctpixels)
-        else:
-            points = []
-            point_colors = []
-            for i in range(self.w):
-                for j in range(self.h):
-                    idx = get_pos(i, j, self.w)
-                    points.extend([i, j, 0])
-                    point_colors.extend([self.pixels[idx], self.pixels[idx + 1], self.pixels[idx + 2]])
-            self.set_points(points, point_colors)
-            self.flush()
+        # convert to ctypes ubyte array
+        # rawdata = colors.astype(np.ubyte).ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte))
+        # self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', rawdata)
+        self.img.set_data('RGB', self.img.width * 3, self.ctpixels)
         end = time.time()
         self.valset.set_val('flushtime', ((end - start) * 1000))
 
+    def resume(self, mode, view, zr, zi, limit, max_iter, c):
+        """
+        Sets up the iteration state of the frame, carrying over the points of the last frame with the same mode,
+        c and limit
+        Pixels of a pan or a zoom by 0.5 that land on pixels of the last frame are copied, and points that haven't
+        escaped are only continued when max_iter goes up, so only the new pixels start from scratch
+        :param mode: mode
+        :param view: lattice view of the frame
+        :param zr: real coordinates of the columns
+        :param zi: imaginary coordinates of the rows
+        :param limit: escape radius
+        :param max_iter: maximum iterations
+        :param c: c
+        """
+        z, iters, color_data = init_state(mode, zr, zi)
+        key = (mode, c, limit)
+        if key == self.state_key and max_iter >= self.state_max_iter:
+            overlap = self.lattice_overlap(self.state_view, self.state_data.shape[0], self.state_data.shape[1],
+                                           view, zr.shape[0], zi.shape[0])
+            if overlap:
+                new_index, old_index = overlap
+                z[new_index] = self.state_z[old_index]
+                iters[new_index] = self.state_iters[old_index]
+                color_data[new_index] = self.state_data[old_index]
+        self.state_z, self.state_iters, self.state_data = z, iters, color_data
+        self.state_key = key
+        self.state_view = view
+        self.state_max_iter = max_iter
+
     def draw(self):
         """
         Draws the image created in render()
         """
-        if self.mode != 7:
-            self.img.blit(self.x, self.y)
-        else:
-            super().draw()
+        self.img.blit(self.x, self.y)
 
     def resize(self, width, height):
-        # renders after resizing
-        if self.mode != 7:
-            self.refit(width, height - 200)
-            del self.img, self.pixels, self.ctpixels
-            self.pixels = np.zeros(self.w * self.h * 3, dtype=np.ubyte)
-            self.ctpixels = np.ctypeslib.as_ctypes(self.pixels)
-            self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', self.ctpixels)
-        else:
-            self.refit(width // 2, height - 200)
+        # renders after resizing, the split view takes the left half
+        self.refit(width if self.mode != 7 else width // 2, height - 200)
+        del self.img, self.pixels, self.ctpixels
+        self.pixels = np.zeros(self.w * self.h * 3, dtype=np.ubyte)
+        self.ctpixels = np.ctypeslib.as_ctypes(self.pixels)
+        self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', self.ctpixels)
 
     def mouse_move(self, x, y, dx, dy):
         if self.is_inside(x + self.x, y + self.y) and self.get_val('mouse_c'):
             cx, cy = self.on_plot(x, y)
             self.set_val('c', cx + cy * 1j)
 
+    def mouse_up(self, x, y, button, modifiers):
+        # a left click on an atlas thumbnail goes to its julia set, other clicks zoom the mandelbrot view
+        if self.atlas is not None and button == pyglet.window.mouse.LEFT:
+            cs, cell = self.atlas
+            i, j = int(x) // cell, int(y) // cell
+            if 0 <= i < cs.shape[0] and 0 <= j < cs.shape[1]:
+                self.set_val('c', cs[i, j])
+                self.parent.set_mode(self.mode - 1)
+                return
+        super().mouse_up(x, y, button, modifiers)
+
 
 class MandelScreen(pyg.screen.GraphScreen):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.palette = np.array([[0, 0, 0], [100, 0, 100], [255, 255, 255], [255, 161, 3]], dtype=np.int32)
+        self.pixels = np.zeros(self.w * self.h * 3, dtype=np.ubyte)
+        self.ctpixels = np.ctypeslib.as_ctypes(self.pixels)
+        self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', self.ctpixels)
+
+        # view and settings of the frame shown (or being computed) and its escape values, see render()
+        self.frame_key = None
+        self.frame_values = None
+        self.frame_max_iter = 0
+
+        # renders on its own worker, so moving c on the julia half doesn't cancel it
+        self.worker = RenderWorker()
+        pyglet.clock.schedule_interval(self.upload, 1 / 60)
 
     def reset_screen(self):
         """
@@ -337,41 +610,101 @@ class MandelScreen(pyg.screen.GraphScreen):
 
     def render(self):
         """
-        Renders the screen and creates an image with the pixel data
+        Requests a frame of the current view from the render worker
+        The frame shown is kept if the view and the settings haven't changed, it is only recolored for a new palette
         """
-        #calc
-        start = time.time()
-        bl_x, bl_y = self.on_plot(0, 0)
-        tr_x, tr_y = self.on_plot(self.w, self.h)
-        c = self.get_val('c')
-        max_iter = self.get_val('max_iter')
         self.palette[self.get_val('pal_idx')] = [self.get_val('pal_r'), self.get_val('pal_g'), self.get_val('pal_b')]
-        limit = self.get_val('limit')
-        colors = get_data(1, self.w, self.h, bl_x, bl_y, tr_x, tr_y, limit, max_iter, c, self.palette)
-        end = time.time()
+        pbl_x, pbl_y = self.on_plot_precise(0, 0)
+        ptr_x, ptr_y = self.on_plot_precise(self.w, self.h)
+        key = (self.w, self.h, pbl_x, pbl_y, ptr_x, ptr_y, self.get_val('max_iter'), self.get_val('limit'))
+        if key == self.frame_key:
+            self.recolor()
+            return
+        self.frame_key = key
+        self.frame_values = None
+        frame = {
+            'w': self.w,
+            'h': self.h,
+            'corners': [split_decimal(pbl_x), split_decimal(pbl_y), split_decimal(ptr_x), split_decimal(ptr_y)],
+            'max_iter': self.get_val('max_iter'),
+            'limit': self.get_val('limit'),
+            'palette': self.palette.copy(),
+            'start': time.time(),
+        }
+        self.worker.submit(self.compute, frame)
+
+    def compute(self, generation, frame):
+        """
+        Computes a frame on the worker thread and posts its pixel data
+        :param generation: generation of the render job
+        :param frame: values read by render()
+        """
+        w, h = frame['w'], frame['h']
+        (bl_x, bl_x_lo), (bl_y, bl_y_lo), (tr_x, tr_x_lo), (tr_y, tr_y_lo) = frame['corners']
+        pixels = np.empty(w * h * 3, dtype=np.ubyte)
+        values = np.empty((w, h), dtype=np.float64)
+        # computed in strips, the julia half's frames take their turn on the kernels in between
+        for y0 in range(0, h, KERNEL_ROWS):
+            if self.worker.cancelled(generation):
+                return
+            with kernel_lock, row_chunks():
+                get_data(1, w, h, bl_x, bl_y, tr_x, tr_y, frame['limit'], frame['max_iter'], 0j, frame['palette'],
+                         pixels, values, bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo, 0, y0, min(y0 + KERNEL_ROWS, h))
+        self.worker.post(generation, (frame, pixels, values))
+
+    def upload(self, dt):
+        """
+        Uploads the latest frame posted by the worker, scheduled on the pyglet clock
+        :param dt: time since the last call
+        """
+        result = self.worker.take()
+        if result is None:
+            return
+        frame, pixels, values = result
+        if pixels.shape[0] != self.pixels.shape[0]:
+            # the screen was resized after the frame was requested
+            return
+        self.frame_values = values
+        self.frame_max_iter = frame['max_iter']
+        if not np.array_equal(frame['palette'], self.palette):
+            # the palette was edited while the frame was computed
+            color_pixels(values, self.frame_max_iter, self.palette, pixels)
+        self.show(pixels)
+
+    def recolor(self):
+        """
+        Recolors the frame shown with the current palette without iterating it again
+        """
+        self.palette[self.get_val('pal_idx')] = [self.get_val('pal_r'), self.get_val('pal_g'), self.get_val('pal_b')]
+        if self.frame_values is None or self.frame_values.shape != (self.w, self.h):
+            return
+        pixels = np.empty(self.w * self.h * 3, dtype=np.ubyte)
+        color_pixels(self.frame_values, self.frame_max_iter, self.palette, pixels)
+        self.show(pixels)
 
-        #flush
-        start = time.time()
-        points = []
-        point_colors = []
-        for i in range(self.w):
-            for j in range(self.h):
-                idx = get_pos(i, j, self.w)
-                points.extend([i, j, 0])
-                point_colors.extend([colors[idx], colors[idx + 1], colors[idx + 2]])
-        self.set_points(points, point_colors)
-        self.flush()
-        end = time.time()
+    def show(self, pixels):
+        """
+        Uploads a frame's pixel data to the image
+        :param pixels: 1d RGB array with separate RGB values
+        """
+        self.pixels = pixels
+        self.ctpixels = np.ctypeslib.as_ctypes(pixels)
+        self.img.set_data('RGB', self.img.width * 3, self.ctpixels)
 
     def draw(self):
         """
         Draws the image created in render()
         """
-        super().draw()
+        self.img.blit(self.x, self.y)
 
     def resize(self, width, height):
         self.refit(width // 2, height - 200)
         self.set_pos(width // 2, 200)
+        del self.img, self.pixels, self.ctpixels
+        self.pixels = np.zeros(self.w * self.h * 3, dtype=np.ubyte)
+        self.ctpixels = np.ctypeslib.as_ctypes(self.pixels)
+        self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', self.ctpixels)
+        self.frame_key = None
 
     def mouse_move(self, x, y, dx, dy):
         if self.is_inside(x + self.x, y + self.y) and self.get_val('mouse_c'):
@@ -401,15 +734,15 @@ class JuliaWindow(pyg.window.Window):
             args = line.split(',')
             coords_mode = int(args[0])
             if coords_mode in [0, 2, 4, 6]:
-                gx = float(args[1])
-                gy = float(args[2])
+                gx = decimal.Decimal(args[1])
+                gy = decimal.Decimal(args[2])
                 zoom = float(args[3])
                 max_iter = int(args[4])
                 c = complex(args[5])
                 self.saved_coords[coords_mode].append([gx, gy, zoom, max_iter, c])
             elif coords_mode in [1, 3, 5]:
-                gx = float(args[1])
-                gy = float(args[2])
+                gx = decimal.Decimal(args[1])
+                gy = decimal.Decimal(args[2])
                 zoom = float(args[3])
                 max_iter = int(args[4])
                 self.saved_coords[coords_mode].append([gx, gy, zoom, max_iter])
@@ -449,12 +782,32 @@ class JuliaWindow(pyg.window.Window):
         self.valset.add_float_value('limit', 20.0, limit='l', inclusive='', low=0)
         self.valset.add_complex_value('c', -.25 -.67j)
         self.valset.add_float_value('calctime', 0)
+        self.valset.add_float_value('firsttime', 0)
         self.valset.add_float_value('flushtime', 0)
         self.valset.add_int_value('pal_idx', 0, limit='ul', low=0, high=3)
         self.valset.add_int_value('pal_r', 0)
         self.valset.add_int_value('pal_g', 0)
         self.valset.add_int_value('pal_b', 0)
         self.valset.add_bool_value('mouse_c', False)
+        self.valset.add_bool_value('perturb', False)
+        self.valset.add_bool_value('boundary', False)
+        self.valset.add_bool_value('bulb_check', False)
+        self.valset.add_bool_value('period_check', False)
+        self.valset.add_bool_value('deriv_check', False)
+        self.valset.add_bool_value('auto_range', False)
+        self.valset.add_bool_value('equalize', False)
+        self.valset.add_bool_value('keep_cdf', True)
+        self.valset.add_string_value('formula', 'z**4 + c')
+        self.valset.add_bool_value('tiles', False)
+        self.valset.add_bool_value('lanes', False)
+        self.valset.add_bool_value('symmetry', True)
+        self.valset.add_bool_value('adaptive', False)
+        self.valset.add_bool_value('atlas', False)
+        self.valset.add_bool_value('miim', False)
+        self.valset.add_int_value('atlas_cols', 8, limit='l', low=1)
+        self.valset.add_bool_value('prefetch_all', False)
+        self.valset.add_int_value('cache_mb', CACHE_MB, limit='l', low=0)
+        self.valset.add_string_value('stats', '')
         self.valset.add_float_value('saved_gx', 0)
         self.valset.add_float_value('saved_gy', 0)
         self.valset.add_float_value('saved_gw', 0)
@@ -475,33 +828,52 @@ class JuliaWindow(pyg.window.Window):
         self.add_button('m4b', 10, 90, 50, 15, 'z^1.5+c', lambda: self.set_mode(4))
         self.add_button('m5b', 80, 90, 50, 15, 'z^1.5+c', lambda: self.set_mode(5))
         self.add_button('m6b', 10, 70, 50, 15, 'c*sin(z)', lambda: self.set_mode(6))
-        self.add_button('m7b', 10, 50, 120, 15, 'Split z^2+c', lambda: self.set_mode(7))
+        self.add_button('m7b', 10, 50, 60, 15, 'Split', lambda: self.set_mode(7))
+        self.add_toggle_button('miim', 75, 50, 55, 15, 'MIIM(v)', self.get_valobj('miim'))
+        self.add_toggle_button('tiles', 280, 160, 55, 15, 'Tiles(t)', self.get_valobj('tiles'))
+        self.add_button('m8b', 280, 140, 55, 15, 'f Julia', lambda: self.set_mode(8))
+        self.add_button('m9b', 280, 120, 55, 15, 'f Mandel', lambda: self.set_mode(9))
+        self.add_toggle_button('lanes', 280, 100, 55, 15, 'Lanes(l)', self.get_valobj('lanes'))
+        self.add_toggle_button('symmetry', 280, 10, 50, 15, 'Sym(m)', self.get_valobj('symmetry'))
         self.add_button('resetb', 10, 10, 40, 15, 'Reset(r)', self.reset)
         self.add_toggle_button('mouse_c', 55, 10, 60, 15, 'Mouse C(c)', self.get_valobj('mouse_c'))
-
-        self.add_int_field('max_iter', 150, 180, 120, 15, 'Max Iter', self.get_valobj('max_iter'))
+        self.add_toggle_button('perturb', 10, 30, 60, 15, 'Deep(d)', self.get_valobj('perturb'))
+        self.add_toggle_button('atlas', 75, 30, 55, 15, 'Atlas(x)', self.get_valobj('atlas'))
+        self.add_toggle_button('boundary', 80, 70, 50, 15, 'M-S(b)', self.get_valobj('boundary'))
+        self.add_toggle_button('bulb_check', 10, 165, 35, 15, 'Bulb', self.get_valobj('bulb_check'))
+        self.add_toggle_button('period_check', 50, 165, 35, 15, 'Per', self.get_valobj('period_check'))
+        self.add_toggle_button('deriv_check', 90, 165, 40, 15, 'Der', self.get_valobj('deriv_check'))
+
+        self.add_int_field('max_iter', 150, 180, 80, 15, 'Max Iter', self.get_valobj('max_iter'))
+        self.add_toggle_button('adaptive', 235, 180, 35, 15, 'Adapt', self.get_valobj('adaptive'))
         self.add_float_field('limit', 150, 160, 120, 15, 'Limit', self.get_valobj('limit'))
         self.add_complex_field('c', 150, 140, 120, 15, 'C', self.get_valobj('c'))
         self.add_float_field('zoomfield', 150, 120, 120, 15, 'Zoom Ratio', self.get_valobj('gz'))
+        self.add_string_field('formula', 150, 100, 120, 15, 'f(z)', self.get_valobj('formula'))
 
         self.add_button('pal_left', 150, 5, 55, 15, 'Idx Left', self.palette_left)
         self.add_button('pal_right', 215, 5, 55, 15, 'Idx Right', self.palette_right)
         self.add_int_hslider('pal_r', 150, 70, 120, 15, 'Red  ', self.get_valobj('pal_r'), low=0, high=255)
         self.add_int_hslider('pal_g', 150, 50, 120, 15, 'Green', self.get_valobj('pal_g'), low=0, high=255)
         self.add_int_hslider('pal_b', 150, 30, 120, 15, 'Blue ', self.get_valobj('pal_b'), low=0, high=255)
-        self.add_label('pal_label', 160, 90, 'Palette Index: %i' % self.get_val('pal_idx'))
+        self.add_label('pal_label', 160, 87, 'Palette Index: %i' % self.get_val('pal_idx'))
+        self.add_toggle_button('auto_range', 280, 70, 50, 15, 'Auto(a)', self.get_valobj('auto_range'))
+        self.add_toggle_button('equalize', 280, 50, 50, 15, 'Eq(e)', self.get_valobj('equalize'))
+        self.add_toggle_button('keep_cdf', 280, 30, 50, 15, 'Keep', self.get_valobj('keep_cdf'))
 
         self.saved_coords_idx = 0
-        self.add_label('saved_coords_idx', 340, 130, 'Saved Coords #%i' % (self.saved_coords_idx + 1))
-        self.add_label('saved_coords_c', 340, 115, '   C: ')
-        self.add_label('saved_coords_gx', 340, 100, '  GX: ')
-        self.add_label('saved_coords_gy', 340, 85, '  GY: ')
-        self.add_label('saved_coords_zoom', 340, 70, 'Zoom: ')
+        self.add_label('saved_coords_idx', 340, 120, 'Saved Coords #%i' % (self.saved_coords_idx + 1))
+        self.add_label('saved_coords_c', 340, 105, '   C: ')
+        self.add_label('saved_coords_gx', 340, 90, '  GX: ')
+        self.add_label('saved_coords_gy', 340, 75, '  GY: ')
+        self.add_label('saved_coords_zoom', 340, 60, 'Zoom: ')
         self.add_button('saved_coords_prev', 340, 40, 40, 15, 'Prev(j)', self.saved_coords_prev)
         self.add_button('saved_coords_next', 390, 40, 40, 15, 'Next(k)', self.saved_coords_next)
         self.add_button('saved_coords_goto', 340, 20, 40, 15, 'Goto(g)', self.saved_coords_goto)
         self.add_button('saved_coords_save', 390, 20, 40, 15, 'Save(s)', self.saved_coords_save)
         self.add_button('saved_coords_delete', 440, 20, 60, 15, 'Delete(y)', self.saved_coords_delete)
+        self.add_toggle_button('prefetch_all', 340, 0, 90, 15, 'Fetch All', self.get_valobj('prefetch_all'))
+        self.add_int_field('cache_mb', 440, 0, 60, 15, 'MB', self.get_valobj('cache_mb'))
 
         self.add_label('leftlabel', 10, 180, '%.5f' % self.get_screen('main').min_gx, color=(255, 0, 255))
         self.add_label('rightlabel', self.width - 60, 180, '%.5f' % self.get_screen('main').max_gx, color=(255, 0, 255))
@@ -509,11 +881,13 @@ class JuliaWindow(pyg.window.Window):
         self.add_label('bottomlabel', 10, 210, '%.5f' % self.get_screen('main').min_gy, color=(255, 0, 255))
         self.add_label('zoomlabel', self.width * 3 // 5, 180, 'Zoom: %.5E' % self.get_screen('main').total_zoom)
 
-        self.add_label('calclabel', self.width - 140, 170, '  calc time: %.3f' % self.valset.get_val('calctime'), color=(0, 240, 120))
+        self.add_label('calclabel', self.width - 140, 170, '  calc time: %.1f/%.1f' % (self.valset.get_val('firsttime'), self.valset.get_val('calctime')), color=(0, 240, 120))
         self.add_label('flushlabel', self.width - 140, 155, ' flush time: %.3f' % self.valset.get_val('flushtime'), color=(0, 240, 120))
+        self.add_label('statlabel', self.width - 140, 140, self.valset.get_val('stats'), color=(0, 240, 120))
 
         self.saved_coords = [[], [], [], [], [], [], []]
         self.load_graph_coords()
+        self.prefetch_saved()
 
     def palette_left(self):
         self.get_valobj('pal_idx').decr()
@@ -534,6 +908,27 @@ class JuliaWindow(pyg.window.Window):
         # self.get_slider('pal_g').update()
         # self.get_slider('pal_b').update()
 
+    def prefetch_saved(self):
+        """
+        Renders the selected saved coords and the ones before and after it ahead, or all of them with Fetch All
+        """
+        main = self.get_screen('main')
+        mode = main.mode
+        if mode not in [0, 1, 2, 3, 4, 5, 6]:
+            main.prefetch([])
+            return
+        saved = self.saved_coords[mode]
+        order = [self.saved_coords_idx, self.saved_coords_idx + 1, self.saved_coords_idx - 1]
+        if self.get_val('prefetch_all'):
+            order += range(len(saved))
+        views = []
+        for i in dict.fromkeys(order):
+            if 0 <= i < len(saved):
+                gx, gy, zoom, max_iter = saved[i][:4]
+                c = saved[i][4] if mode in [0, 2, 4, 6] else self.get_val('c')
+                views.append((mode, gx, gy, zoom, max_iter, c))
+        main.prefetch(views)
+
     def saved_coords_prev(self):
         mode = self.get_screen('main').mode
         if mode in [0, 1, 2, 3, 4, 5, 6]:
@@ -543,6 +938,7 @@ class JuliaWindow(pyg.window.Window):
                 if self.saved_coords_idx < 0:
                     self.saved_coords_idx = 0
                 self.update_labels()
+                self.prefetch_saved()
 
     def saved_coords_next(self):
         mode = self.get_screen('main').mode
@@ -553,6 +949,7 @@ class JuliaWindow(pyg.window.Window):
                 if self.saved_coords_idx >= saved_len:
                     self.saved_coords_idx = saved_len - 1
                 self.update_labels()
+                self.prefetch_saved()
 
     def saved_coords_goto(self):
         mode = self.get_screen('main').mode
@@ -564,28 +961,32 @@ class JuliaWindow(pyg.window.Window):
             main.set_graph_view(gx, gy, zoom)
             self.set_val('max_iter', max_iter)
             self.set_val('c', c)
-            self.render()
+            if not main.show_cached():
+                self.render()
         elif mode in [1, 3, 5]:
             gx, gy, zoom, max_iter = self.saved_coords[mode][self.saved_coords_idx]
             main = self.get_screen('main')
             main.set_graph_view(gx, gy, zoom)
             self.set_val('max_iter', max_iter)
-            self.render()
+            if not main.show_cached():
+                self.render()
 
     def saved_coords_save(self):
         main = self.get_screen('main')
         mode = main.mode
         if mode in [0, 2, 4, 6]:
-            gx, gy, zoom = main.gx, main.gy, main.total_zoom
+            gx, gy, zoom = main.pgx, main.pgy, main.total_zoom
             max_iter = self.get_val('max_iter')
             c = self.get_val('c')
             self.saved_coords[mode].append([gx, gy, zoom, max_iter, c])
             self.save_graph_coords()
+            self.prefetch_saved()
         elif mode in [1, 3, 5]:
-            gx, gy, zoom = main.gx, main.gy, main.total_zoom
+            gx, gy, zoom = main.pgx, main.pgy, main.total_zoom
             max_iter = self.get_val('max_iter')
             self.saved_coords[mode].append([gx, gy, zoom, max_iter])
             self.save_graph_coords()
+            self.prefetch_saved()
 
     def saved_coords_delete(self):
         main = self.get_screen('main')
@@ -598,6 +999,7 @@ class JuliaWindow(pyg.window.Window):
                     self.saved_coords_idx = len(self.saved_coords[mode]) - 1
                 if self.saved_coords_idx < 0:
                     self.saved_coords_idx = 0
+                self.prefetch_saved()
 
     def reset(self):
         self.screens['main'].reset_screen()
@@ -611,7 +1013,7 @@ class JuliaWindow(pyg.window.Window):
         """
         if mode == self.screens['main'].mode:
             return
-        if mode in [7, ]:
+        if mode in [7, 8, 9]:
             self.get_button('saved_coords_goto').off()
             self.get_button('saved_coords_prev').off()
             self.get_button('saved_coords_next').off()
@@ -629,6 +1031,7 @@ class JuliaWindow(pyg.window.Window):
             self.screens['mandel'].off()
         self.screens['main'].set_mode(mode)
         self.on_resize(self.width, self.height)
+        self.prefetch_saved()
         # self.mouse_up(100, 250, pyglet.window.mouse.RIGHT, None)
 
     def update_labels(self):
@@ -665,27 +1068,84 @@ class JuliaWindow(pyg.window.Window):
             self.get_label('saved_coords_zoom').set_text('')
             self.get_label('saved_coords_idx').set_text('')
 
-        self.labels['calclabel'].set_text('  calc time: %.3f ms' % self.valset.get_val('calctime'))
+        # time to the first progressive pass / time to the full resolution image
+        self.labels['calclabel'].set_text('  calc time: %.1f/%.1f ms' % (self.valset.get_val('firsttime'),
+                                                                         self.valset.get_val('calctime')))
         self.labels['calclabel'].set_pos(self.width - 140, 165)
         self.labels['flushlabel'].set_text(' flush time: %.3f ms' % self.valset.get_val('flushtime'))
         self.labels['flushlabel'].set_pos(self.width - 140, 150)
+        self.labels['statlabel'].set_text(self.valset.get_val('stats'))
+        if self.get_val('adaptive') and self.focus is not self.fields['max_iter']:
+            # max_iter set by the adaptive mode
+            self.fields['max_iter'].update_label()
+        self.labels['statlabel'].set_pos(self.width - 140, 135)
 
     def mouse_move(self, x, y, dx, dy):
         super().mouse_move(x, y, dx, dy)
         if self.get_val('mouse_c'):
             self.fields['c'].update_label()
-            self.screens['main'].render()
+            self.screens['main'].render(drag=True)
 
     def mouse_drag(self, x, y, dx, dy, buttons, modifiers):
         super().mouse_drag(x, y, dx, dy, buttons, modifiers)
         if isinstance(self.focus, pyg.gui.Slider):
-            self.screens['main'].render()
+            # only the palette sliders, the frame doesn't need to be iterated again
+            self.screens['main'].recolor()
+            if self.screens['mandel'].visible:
+                self.screens['mandel'].recolor()
 
     def key_down(self, symbol, modifiers):
         super().key_down(symbol, modifiers)
         if not self.focus:
             if symbol == pyglet.window.key.C:
                 self.get_button('mouse_c').toggle()
+                if not self.get_val('mouse_c') and self.get_val('miim'):
+                    # replaces the last preview with the escape time frame
+                    self.screens['main'].render()
+            if symbol == pyglet.window.key.V:
+                self.get_button('miim').toggle()
+            if symbol == pyglet.window.key.D:
+                self.get_button('perturb').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.B:
+                self.get_button('boundary').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.A:
+                self.get_button('auto_range').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.E:
+                self.get_button('equalize').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.T:
+                self.get_button('tiles').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.L:
+                self.get_button('lanes').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.X:
+                self.get_button('atlas').toggle()
+                self.screens['main'].render()
+            if symbol in [pyglet.window.key.MINUS, pyglet.window.key.EQUAL] and self.get_val('atlas'):
+                if symbol == pyglet.window.key.MINUS:
+                    self.get_valobj('atlas_cols').decr()
+                else:
+                    self.get_valobj('atlas_cols').incr()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.I:
+                self.get_button('adaptive').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key.M:
+                self.get_button('symmetry').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key._1:
+                self.get_button('bulb_check').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key._2:
+                self.get_button('period_check').toggle()
+                self.screens['main'].render()
+            if symbol == pyglet.window.key._3:
+                self.get_button('deriv_check').toggle()
+                self.screens['main'].render()
             if symbol == pyglet.window.key.R:
                 self.reset()
             if self.get_screen('main').mode in [0, 1, 2, 3, 4, 5, 6]:
@@ -701,4 +1161,6 @@ class JuliaWindow(pyg.window.Window):
                     self.saved_coords_delete()
 
 
-pyg.run(JuliaWindow, 500, 700, caption='Mandelbrot Explorer')
+# the tile renderer's spawned processes import this module too
+if __name__ == '__main__':
+    pyg.run(JuliaWindow, 500, 700, caption='Mandelbrot Explorer')
@@ -0,0 +1,48 @@
+"""
+Deferred compilation of numba ufuncs
+
+Parallel ufuncs (@vectorize / @guvectorize with target='parallel') compile their signatures when they are defined,
+and build their threading wrapper every time, even when the kernel itself comes from the cache (cache=True).
+Wrapping the decorator in lazy() moves that cost to the first call, so importing a module only pays for the
+ufuncs that are actually used.
+"""
+
+import functools
+import threading
+
+
+class LazyKernel:
+    def __init__(self, decorator, func):
+        """
+        Keeps a function and the numba decorator to apply on its first call
+        :param decorator: numba decorator, e.g. vectorize(signature, target='parallel', cache=True)
+        :param func: python function
+        """
+        self.decorator = decorator
+        self.py_func = func
+        self.kernel = None
+        self.lock = threading.Lock()
+        functools.update_wrapper(self, func)
+
+    def compile(self):
+        """
+        Compiles the kernel (or loads it from the cache) if it wasn't yet
+        :return: compiled kernel
+        """
+        with self.lock:
+            if self.kernel is None:
+                self.kernel = self.decorator(self.py_func)
+        return self.kernel
+
+    def __call__(self, *args, **kwargs):
+        kernel = self.kernel if self.kernel is not None else self.compile()
+        return kernel(*args, **kwargs)
+
+
+def lazy(decorator):
+    """
+    Defers a numba decorator to the first call of the decorated function
+    :param decorator: numba decorator
+    :return: decorator returning a LazyKernel
+    """
+    return lambda func: LazyKernel(decorator, func)
@@ -0,0 +1,189 @@
+"""
+Perturbation theory deep zoom for z^2 + c
+
+One reference orbit is iterated at the center of the view in arbitrary precision (decimal),
+then every pixel only iterates its float64 offset from the reference:
+    dz -> 2 * Z * dz + dz^2 + dc
+Pixels that get too close to the reference orbit lose their precision (glitch), so they are detected
+with Pauldelbrot's criterion and recomputed against a new reference picked from the glitched pixels.
+Pixels that are still glitched after MAX_REFS references are iterated directly in double-double precision when it can
+resolve them, deeper than that new references are picked until no glitched pixels are left.
+"""
+
+import decimal
+import math
+
+import numpy as np
+from numba import guvectorize
+
+from escape_time import julia_z2_dd_vec, mandel_z2_dd_vec, split_decimal
+from lazy_compile import lazy
+
+
+# returned by the delta kernel for pixels that need a new reference
+GLITCH = -1.0
+# |Z + dz|^2 < GLITCH_TOL * |Z|^2 marks a glitch (1e-2 on the magnitudes, 1e-3 misses pixels that lose their
+# precision while passing close to 0 less often)
+GLITCH_TOL = 1e-4
+# references per frame after which the remaining glitched pixels are iterated in double-double
+MAX_REFS = 16
+# pixel spacing relative to the coordinates below which double-double can't resolve the glitched pixels either
+# (like DD_RESOLUTION, ~24 bits below a pixel out of double-double's ~104)
+DD_LIMIT = 2.0 ** -80
+
+
+def get_precision(gw, w):
+    """
+    Returns the number of decimal digits needed to resolve a pixel
+    :param gw: graph width
+    :param w: screen width
+    :return: decimal digits
+    """
+    return max(28, int(-math.log10(gw / w)) + 20)
+
+
+def reference_orbit(z, c, limit, max_iter, prec):
+    """
+    Iterates T(z) = z^2 + c in arbitrary precision and rounds every step to complex128
+    The orbit stops at the first point outside the escape radius, so its length can be less than max_iter + 1
+    :param z: starting point as a (real, imag) tuple of decimals
+    :param c: c as a (real, imag) tuple of decimals
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param prec: decimal digits
+    :return: array of the orbit
+    """
+    ctx = decimal.Context(prec=prec)
+    zr, zi = ctx.plus(decimal.Decimal(z[0])), ctx.plus(decimal.Decimal(z[1]))
+    cr, ci = ctx.plus(decimal.Decimal(c[0])), ctx.plus(decimal.Decimal(c[1]))
+    limit2 = limit * limit
+    orbit = np.empty(max_iter + 1, dtype=np.complex128)
+    for n in range(max_iter + 1):
+        orbit[n] = complex(float(zr), float(zi))
+        if orbit[n].real * orbit[n].real + orbit[n].imag * orbit[n].imag > limit2:
+            return orbit[:n + 1]
+        zr2 = ctx.multiply(zr, zr)
+        zi2 = ctx.multiply(zi, zi)
+        zi = ctx.add(ctx.multiply(2 * zr, zi), ci)
+        zr = ctx.add(ctx.subtract(zr2, zi2), cr)
+    return orbit
+
+
+@lazy(guvectorize('(complex128[:], complex128[:], complex128[:], float64[:], int32[:], float64[:])',
+                   '(),(),(n),(),()->()', target='parallel', cache=True))
+def z2_perturb(dz0, dc, ref, limit, max_iter, output):
+    """
+    Calculates the orbit of Z + dz under T(z) = z^2 + c by only iterating dz in float64
+    Covers both the julia set (dz0 is the pixel's offset, dc = 0) and the mandelbrot set (dz0 = 0, dc is the pixel's offset)
+    :param dz0: starting offset from the reference orbit
+    :param dc: offset of c from the reference's c
+    :param ref: reference orbit
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param output: normalized escape iteration, or GLITCH
+    """
+    limit2 = limit[0] * limit[0]
+    dzr = dz0[0].real
+    dzi = dz0[0].imag
+    dcr = dc[0].real
+    dci = dc[0].imag
+    ref_len = ref.shape[0]
+    for n in range(max_iter[0]):
+        if n >= ref_len:
+            # the reference escaped before this pixel
+            output[0] = GLITCH
+            return
+        refr = ref[n].real
+        refi = ref[n].imag
+        zr = refr + dzr
+        zi = refi + dzi
+        zmag2 = zr * zr + zi * zi
+        if zmag2 > limit2:
+            output[0] = n + 1 - np.log2(np.log2(np.power(zmag2, .5)))
+            return
+        if zmag2 < GLITCH_TOL * (refr * refr + refi * refi):
+            output[0] = GLITCH
+            return
+        tr = 2 * refr + dzr
+        ti = 2 * refi + dzi
+        tmp = tr * dzr - ti * dzi + dcr
+        dzi = tr * dzi + ti * dzr + dci
+        dzr = tmp
+    output[0] = 0
+
+
+def dd_offsets(center, offsets):
+    """
+    Adds float64 offsets to a decimal in double-double precision
+    :param center: decimal
+    :param offsets: array of offsets
+    :return: high and low order parts of the sums
+    """
+    hi, lo = split_decimal(center)
+    # two-sum of hi and the offsets, then the low order parts are added and the result renormalized
+    s = hi + offsets
+    bb = s - hi
+    err = (hi - (s - bb)) + (offsets - bb) + lo
+    total = s + err
+    return total, err - (total - s)
+
+
+def perturb_call(mode, w, h, gx, gy, gw, gh, limit, max_iter, c):
+    """
+    Calculates the normalized escape iterations of the view using perturbation
+    0 - filled julia set of z^2 + c
+    1 - mandelbrot set of z^2 + c
+    :param mode: mode
+    :param w: screen width
+    :param h: screen height
+    :param gx: graph center x coordinate as a decimal
+    :param gy: graph center y coordinate as a decimal
+    :param gw: graph width
+    :param gh: graph height
+    :param limit: escape radius
+    :param max_iter: maximum iterations
+    :param c: c
+    :return: 2d array of normalized escape iterations ([x][y]) and the number of references used
+    """
+    prec = get_precision(gw, w)
+    # same pixel positions as linspace(bl, tr, w, endpoint=False), but relative to the center
+    dr = np.arange(w, dtype=np.float64) * (gw / w) - gw / 2
+    di = np.arange(h, dtype=np.float64) * (gh / h) - gh / 2
+    offsets = dr[:, None] + di * 1j  # [x][y]
+    zero = np.zeros(w * h, dtype=np.complex128)
+    dd_c = c
+    c = (decimal.Decimal(c.real), decimal.Decimal(c.imag))
+
+    def iterate(ref_x, ref_y, deltas):
+        if mode == 1:
+            ref = reference_orbit((0, 0), (ref_x, ref_y), limit, max_iter, prec)
+            return z2_perturb(zero[:deltas.shape[0]], deltas, ref, limit, max_iter)
+        ref = reference_orbit((ref_x, ref_y), c, limit, max_iter, prec)
+        return z2_perturb(deltas, zero[:deltas.shape[0]], ref, limit, max_iter)
+
+    color_data = iterate(gx, gy, offsets.ravel()).reshape(w, h)
+    refs = 1
+    # deeper than double-double resolution only references can resolve the glitched pixels, they are picked until none
+    # are left (the loop ends, every reference resolves at least its own pixel)
+    dd = gw / w >= max(abs(float(gx)), abs(float(gy))) * DD_LIMIT
+    while True:
+        glitched = np.nonzero(color_data == GLITCH)
+        if not glitched[0].shape[0] or (dd and refs >= MAX_REFS):
+            break
+        # new reference at the glitched pixel closest to the middle of the glitched pixels
+        glitched_offsets = offsets[glitched]
+        center = glitched_offsets.mean()
+        new_ref = glitched_offsets[np.argmin(np.abs(glitched_offsets - center))]
+        ctx = decimal.Context(prec=prec)
+        ref_x = ctx.add(gx, decimal.Decimal(new_ref.real))
+        ref_y = ctx.add(gy, decimal.Decimal(new_ref.imag))
+        color_data[glitched] = iterate(ref_x, ref_y, glitched_offsets - new_ref)
+        refs += 1
+    if glitched[0].shape[0]:
+        zr, zr_lo = dd_offsets(gx, offsets[glitched].real)
+        zi, zi_lo = dd_offsets(gy, offsets[glitched].imag)
+        if mode == 1:
+            color_data[glitched] = mandel_z2_dd_vec(zr, zr_lo, zi, zi_lo, limit, max_iter)
+        else:
+            color_data[glitched] = julia_z2_dd_vec(zr, zr_lo, zi, zi_lo, dd_c, limit, max_iter)
+    return color_data, refs
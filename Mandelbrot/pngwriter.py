@@ -0,0 +1,97 @@
+"""
+Minimal streaming PNG encoder (8 bit RGB, no filtering) using only zlib
+
+Rows are written top to bottom in any number of chunks, so images larger than memory can be encoded as they are
+rendered.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+
+# IDAT chunks are flushed once this many compressed bytes are buffered
+IDAT_SIZE = 1 << 20
+
+
+class PngWriter:
+    def __init__(self, path, w, h, level=6):
+        """
+        Opens a PNG file and writes its header
+        :param path: file path
+        :param w: image width
+        :param h: image height
+        :param level: zlib compression level
+        """
+        self.file = open(path, 'wb')
+        self.w = w
+        self.h = h
+        self.rows = 0
+        self.compressor = zlib.compressobj(level)
+        self.buffer = []
+        self.buffered = 0
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
+
+    def write_chunk(self, tag, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(tag)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(tag)) & 0xffffffff))
+
+    def write_rows(self, rows):
+        """
+        Compresses a chunk of rows
+        :param rows: ubyte array of shape (n, w, 3), top row first
+        """
+        n = rows.shape[0]
+        scanlines = np.zeros((n, self.w * 3 + 1), dtype=np.ubyte)
+        # the first byte of every scanline is its filter type (0, none)
+        scanlines[:, 1:] = rows.reshape(n, self.w * 3)
+        self.push(self.compressor.compress(scanlines.tobytes()))
+        self.rows += n
+
+    def push(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= IDAT_SIZE:
+            self.write_chunk(b'IDAT', b''.join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+    def close(self):
+        """
+        Finishes the compressed stream and closes the file
+        """
+        if self.rows != self.h:
+            raise ValueError('expected %i rows, got %i' % (self.h, self.rows))
+        self.buffer.append(self.compressor.flush())
+        self.write_chunk(b'IDAT', b''.join(self.buffer))
+        self.write_chunk(b'IEND', b'')
+        self.file.close()
+
+
+def packed_to_rows(color_data):
+    """
+    Converts packed colors ([x][y], y going up) into RGB rows (top row first)
+    :param color_data: 2d array of packed RGB colors
+    :return: ubyte array of shape (h, w, 3)
+    """
+    color_data = color_data.T[::-1]
+    rows = np.empty(color_data.shape + (3,), dtype=np.ubyte)
+    rows[:, :, 0] = (color_data >> 16) & 0xff
+    rows[:, :, 1] = (color_data >> 8) & 0xff
+    rows[:, :, 2] = color_data & 0xff
+    return rows
+
+
+def write_png(path, color_data):
+    """
+    Writes packed colors ([x][y], y going up) to a PNG file
+    :param path: file path
+    :param color_data: 2d array of packed RGB colors
+    """
+    writer = PngWriter(path, color_data.shape[0], color_data.shape[1])
+    writer.write_rows(packed_to_rows(color_data))
+    writer.close()
@@ -0,0 +1,92 @@
+"""
+Bounded LRU cache of rendered frames
+
+Holds the escape values of frames rendered ahead of time (see JuliaScreen.prefetch), keyed by everything the values
+depend on. Least recently used frames are evicted when the cache goes over its memory cap.
+Frames are added on the render worker thread and read on the pyglet thread, so every access takes the lock.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+# default memory cap in MB, a 500 x 500 frame takes 2 MB
+CACHE_MB = 64
+
+
+class RenderCache:
+    def __init__(self, max_mb=CACHE_MB):
+        """
+        :param max_mb: memory cap in MB
+        """
+        self.lock = threading.Lock()
+        self.frames = OrderedDict()
+        self.max_bytes = max_mb * 2 ** 20
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns a cached frame and marks it as recently used, counts a hit or a miss
+        :param key: frame key
+        :return: escape values or None
+        """
+        with self.lock:
+            values = self.frames.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.frames.move_to_end(key)
+            return values
+
+    def has(self, key):
+        """
+        Returns if a frame is cached, without counting it or marking it as used
+        :param key: frame key
+        """
+        with self.lock:
+            return key in self.frames
+
+    def put(self, key, values):
+        """
+        Caches a frame, evicting the least recently used ones over the memory cap
+        Frames larger than the cap are not cached
+        :param key: frame key
+        :param values: escape values
+        """
+        with self.lock:
+            if key in self.frames:
+                self.nbytes -= self.frames.pop(key).nbytes
+            if values.nbytes > self.max_bytes:
+                return
+            self.frames[key] = values
+            self.nbytes += values.nbytes
+            self.evict()
+
+    def set_limit(self, max_mb):
+        """
+        Changes the memory cap, evicts frames over the new one
+        :param max_mb: memory cap in MB
+        """
+        with self.lock:
+            self.max_bytes = max_mb * 2 ** 20
+            self.evict()
+
+    def evict(self):
+        # called with the lock held
+        while self.nbytes > self.max_bytes:
+            _, values = self.frames.popitem(last=False)
+            self.nbytes -= values.nbytes
+
+    def clear(self):
+        """
+        Drops every frame, the counters are kept
+        """
+        with self.lock:
+            self.frames.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self.frames)
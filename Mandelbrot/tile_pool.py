@@ -0,0 +1,151 @@
+"""
+Multi-process tile renderer
+
+A frame is split into TILE x TILE tiles that are rendered by a pool of worker processes straight into a frame buffer
+in shared memory (escape values followed by RGB pixels, the layout color_pixels writes).
+Every tile's cost is estimated from a few sampled points first, and tiles are handed out most expensive first, one
+at a time, so the slow tiles along the boundary don't end up last on one worker.
+The workers are started once and warmed up (their kernels are compiled or loaded from the cache when they start),
+each one runs single threaded numba kernels.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# side of the tiles
+TILE = 64
+# sampled points per tile side for the cost estimate
+COST_SAMPLES = 4
+
+# worker state: generation shared with the renderer and the attached frame buffer
+_generation = None
+_buffer = None
+
+
+def init_worker(generation):
+    """
+    Sets up a worker process, compiles (or loads) its kernels before the first tile
+    :param generation: shared frame counter, tiles of older frames are skipped
+    """
+    global _generation
+    _generation = generation
+    from escape_time import escape_tile
+    palette = np.zeros((4, 3), dtype=np.int32)
+    coords = np.zeros(1, dtype=np.float64)
+    escape_tile(0, coords, coords, 0j, 2., 4, palette, np.zeros((1, 1), dtype=np.float64),
+                np.zeros(3, dtype=np.ubyte), 0, 0)
+
+
+def attach(name, w, h):
+    """
+    Attaches a worker to a frame buffer, the previous one is released
+    :param name: shared memory name
+    :param w: frame width
+    :param h: frame height
+    :return: escape values and pixels of the frame
+    """
+    global _buffer
+    if _buffer is None or _buffer[0].name != name:
+        if _buffer is not None:
+            shm = _buffer[0]
+            _buffer = None
+            shm.close()
+        shm = shared_memory.SharedMemory(name)
+        values = np.ndarray((w, h), dtype=np.float64, buffer=shm.buf)
+        pixels = np.ndarray(w * h * 3, dtype=np.ubyte, buffer=shm.buf, offset=w * h * 8)
+        _buffer = (shm, values, pixels)
+    return _buffer[1], _buffer[2]
+
+
+def render_tile(task):
+    """
+    Renders one tile into the shared frame buffer, runs in a worker
+    :param task: (generation, buffer name, w, h, mode, zr, zi, c, limit, max_iter, palette, x0, y0)
+    :return: if the tile was rendered
+    """
+    generation, name, w, h, mode, zr, zi, c, limit, max_iter, palette, x0, y0 = task
+    if generation != _generation.value:
+        return False
+    from escape_time import escape_tile
+    values, pixels = attach(name, w, h)
+    escape_tile(mode, zr, zi, c, limit, max_iter, palette, values, pixels, x0, y0)
+    return True
+
+
+class TileRenderer:
+    def __init__(self, processes=None, tile=TILE):
+        """
+        Starts the worker processes
+        :param processes: number of workers, defaults to the number of cores
+        :param tile: tile side
+        """
+        self.processes = processes or os.cpu_count()
+        self.tile = tile
+        # spawned workers import numba fresh instead of inheriting the parent's threads
+        context = multiprocessing.get_context('spawn')
+        self.generation = context.Value('i', 0)
+        self.pool = context.Pool(self.processes, init_worker, (self.generation,))
+
+    def render(self, mode, zr, zi, c, limit, max_iter, palette, cancelled=None):
+        """
+        Renders a frame with the float64 kernels of escape(), same values as escape_grid and colors as color_pixels
+        :param mode: mode (0 - 7)
+        :param zr: real coordinates of the columns
+        :param zi: imaginary coordinates of the rows
+        :param c: c
+        :param limit: escape radius
+        :param max_iter: maximum iterations
+        :param palette: color palette
+        :param cancelled: function returning if the frame is no longer needed, checked after every tile
+        :return: 2d array of normalized escape iterations ([x][y]) and 1d RGB pixels, None if cancelled
+        """
+        from escape_time import tile_costs
+        w, h = zr.shape[0], zi.shape[0]
+        with self.generation.get_lock():
+            self.generation.value += 1
+            generation = self.generation.value
+        costs = tile_costs(mode, zr, zi, c, limit, max_iter, self.tile, COST_SAMPLES)
+        order = np.argsort(-costs, axis=None, kind='stable')
+        tiles_x, tiles_y = costs.shape
+
+        shm = shared_memory.SharedMemory(create=True, size=w * h * 11)
+        try:
+            tasks = []
+            for t in order:
+                x0 = (t // tiles_y) * self.tile
+                y0 = (t % tiles_y) * self.tile
+                tasks.append((generation, shm.name, w, h, mode, zr[x0:x0 + self.tile], zi[y0:y0 + self.tile],
+                              c, limit, max_iter, palette, x0, y0))
+            results = self.pool.imap_unordered(render_tile, tasks)
+            for _ in results:
+                if cancelled is not None and cancelled():
+                    # the queued tiles of this frame are skipped by the workers, the buffer is only unlinked once the
+                    # tiles being rendered are done with it
+                    with self.generation.get_lock():
+                        self.generation.value += 1
+                    for _ in results:
+                        pass
+                    return None
+            values = np.ndarray((w, h), dtype=np.float64, buffer=shm.buf).copy()
+            pixels = np.ndarray(w * h * 3, dtype=np.ubyte, buffer=shm.buf, offset=w * h * 8).copy()
+            return values, pixels
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,152 @@
+"""
+Background render worker
+
+Renders run on a single daemon thread so the pyglet thread only handles events and texture uploads.
+Only the latest submitted job is kept: submitting a job supersedes the pending one, and a running job checks
+cancelled() between its passes to give way to the newer one.
+The numba kernels release the GIL (nogil), so the pyglet thread keeps running while a pass is computed.
+Idle jobs (prefetching) run on the same thread when no render job is queued, so they never compete with a render
+for the cores, and give way to a render job as soon as one is submitted.
+Every screen can have its own worker (the halves of the split view), their jobs hold kernel_lock only around each
+kernel call or strip of rows, so a long frame of one half doesn't hold up the other's for its whole length.
+"""
+
+import threading
+import traceback
+from collections import deque
+
+
+# the workers share numba's thread pool, which can't run two parallel kernels at once (workqueue threading layer),
+# jobs take it around their kernel calls
+kernel_lock = threading.Lock()
+# render jobs running in all the workers, idle jobs give way to them
+rendering = 0
+rendering_lock = threading.Lock()
+
+
+class RenderWorker:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.job = None
+        self.generation = 0
+        self.result = None
+        self.idle = deque()
+        self.idle_generation = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args):
+        """
+        Queues a job, replacing the queued one and cancelling the running one
+        The job is called as func(generation, *args)
+        :param func: job function
+        :param args: job arguments
+        """
+        with self.cond:
+            self.generation += 1
+            self.job = (func, args)
+            self.cond.notify()
+
+    def submit_idle(self, func, *args):
+        """
+        Queues a job that runs when no render job is queued
+        The job is called as func(interrupted, *args), it should return False if it stopped because interrupted()
+        returned True, it is then queued again to run after the render job
+        :param func: job function
+        :param args: job arguments
+        """
+        with self.cond:
+            self.idle.append((func, args))
+            self.cond.notify()
+
+    def clear_idle(self):
+        """
+        Drops the queued idle jobs, an interrupted one isn't queued again
+        """
+        with self.cond:
+            self.idle.clear()
+            self.idle_generation += 1
+
+    def interrupted(self):
+        """
+        Returns if a render job (of any worker) is queued or running, the running idle job should give way to it
+        """
+        return self.job is not None or rendering > 0
+
+    def cancel(self):
+        """
+        Drops the queued render job and the result that wasn't taken yet, and cancels the running one
+        """
+        with self.cond:
+            self.generation += 1
+            self.job = None
+            self.result = None
+
+    def cancelled(self, generation):
+        """
+        Returns if a newer job was submitted
+        :param generation: generation of the job
+        :return: if the job should stop
+        """
+        return generation != self.generation
+
+    def post(self, generation, result):
+        """
+        Hands a result to the pyglet thread, replacing the one that wasn't taken yet
+        Results of superseded jobs are dropped
+        :param generation: generation of the job
+        :param result: result
+        """
+        with self.cond:
+            if generation == self.generation:
+                self.result = result
+
+    def take(self):
+        """
+        Takes the latest result, called on the pyglet thread
+        :return: result or None
+        """
+        with self.cond:
+            result = self.result
+            self.result = None
+        return result
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.job is None and not self.idle:
+                    self.cond.wait()
+                if self.job is not None:
+                    (func, args), generation = self.job, self.generation
+                    self.job = None
+                    idle = None
+                else:
+                    idle, generation = self.idle.popleft(), self.idle_generation
+            try:
+                if idle is None:
+                    self.run_job(func, generation, args)
+                else:
+                    done = idle[0](self.interrupted, *idle[1])
+                    if done is False:
+                        with self.cond:
+                            if generation == self.idle_generation:
+                                self.idle.appendleft(idle)
+            except Exception:
+                traceback.print_exc()
+
+    @staticmethod
+    def run_job(func, generation, args):
+        """
+        Runs a render job, idle jobs of all the workers give way to it until it returns
+        :param func: job function
+        :param generation: generation of the job
+        :param args: job arguments
+        """
+        global rendering
+        with rendering_lock:
+            rendering += 1
+        try:
+            func(generation, *args)
+        finally:
+            with rendering_lock:
+                rendering -= 1
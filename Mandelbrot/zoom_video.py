@@ -0,0 +1,187 @@
+"""
+Zoom video renderer using an exponential map
+
+Renders the frames of a zoom into saved coordinates (an entry of julia_graph_coords.txt) to numbered PNGs or raw
+RGB frames. Instead of computing every frame, the points along the whole zoom path are computed once as an
+exponential map around the zoom center: row j samples the circle of radius exp(s_max - j * ds) at T angles, with T
+chosen so the samples are about a pixel apart on the frames' outer corners. Every frame is reprojected from the
+rows covering its radii, and only its central disk (a few pixels wide, where the map's rows would get infinitely
+dense) is computed directly.
+The rows are computed in bands as the zoom goes deeper and kept in a ring buffer that only holds the rows of one
+frame, so the memory used doesn't depend on the length of the zoom. The z^2 modes switch to double-double
+kernels per band and per frame, like the GUI.
+An N-frame zoom costs about T x (rows of the whole path) samples instead of N x w x h, see the summary printed at
+the end, --direct renders every frame directly for comparison.
+
+Usage: python zoom_video.py [-f coords file] [-e entry] [-o output dir] [-W width] [-H height] [-n frames]
+                            [-z start zoom] [-r center radius] [--raw] [--direct]
+"""
+
+import argparse
+import concurrent.futures
+import math
+import os
+import time
+
+import numpy as np
+
+from batch_render import GRAPH_WIDTH, LIMIT, PALETTE, graph_corners, load_coords
+
+
+# map rows computed at a time
+BAND = 256
+# radius in pixels of the central disk of every frame that is computed directly
+CENTER_RADIUS = 16
+
+
+def write_frame(path, rows, raw):
+    """
+    Writes a frame to a PNG or a raw RGB file
+    :param path: output file
+    :param rows: ubyte array of shape (h, w, 3), top row first
+    :param raw: if the frame is written as raw RGB
+    """
+    from pngwriter import PngWriter
+    if raw:
+        rows.tofile(path)
+        return
+    out = PngWriter(path, rows.shape[1], rows.shape[0])
+    out.write_rows(rows)
+    out.close()
+
+
+def frame_pixels(start_zoom, end_zoom, w, frames):
+    """
+    Returns the pixel size of every frame of a zoom, the zoom grows by the same factor every frame
+    :param start_zoom: total zoom of the first frame
+    :param end_zoom: total zoom of the last frame
+    :param w: frame width
+    :param frames: number of frames
+    :return: list of pixel sizes
+    """
+    first = GRAPH_WIDTH / start_zoom ** .5 / w
+    last = GRAPH_WIDTH / end_zoom ** .5 / w
+    return [first * (last / first) ** (k / max(1, frames - 1)) for k in range(frames)]
+
+
+def render_zoom(out, mode, gx, gy, start_zoom, end_zoom, max_iter, c, w, h, frames, center=CENTER_RADIUS, raw=False):
+    """
+    Renders the frames of a zoom from an exponential map
+    :param out: output directory
+    :param mode: mode (0 - 7)
+    :param gx: zoom center x as a decimal
+    :param gy: zoom center y as a decimal
+    :param start_zoom: total zoom of the first frame
+    :param end_zoom: total zoom of the last frame
+    :param max_iter: maximum iterations
+    :param c: c
+    :param w: frame width
+    :param h: frame height
+    :param frames: number of frames
+    :param center: radius in pixels of the central disk computed directly
+    :param raw: writes raw RGB frames (h x w x 3, top row first) instead of PNGs
+    :return: number of points computed
+    """
+    from escape_time import DD_RESOLUTION, exp_map_frame, exp_map_rows, parse_color_data, row_chunks, split_decimal
+    from pngwriter import packed_to_rows
+
+    (cx, cx_lo), (cy, cy_lo) = split_decimal(gx), split_decimal(gy)
+    # below this spacing the z^2 modes need double-double, see dd_needed
+    dd_spacing = max(abs(cx), abs(cy)) * DD_RESOLUTION if mode in [0, 1, 7] else 0.
+    palette = np.array(PALETTE, dtype=np.int32)
+    pixels = frame_pixels(start_zoom, end_zoom, w, frames)
+    radius = math.hypot(w, h) / 2
+    angles = int(math.ceil(2 * math.pi * radius))
+    ds = 2 * math.pi / angles
+    s_max = math.log(radius * pixels[0]) + ds
+    # map rows of a frame, between its corners and its central disk, and the band being computed
+    span = int(math.log(radius / center) / ds) + 4
+    strip = np.empty(((span // BAND + 2) * BAND, angles), dtype=np.float32)
+    computed = 0
+    points = 0
+    ext = 'raw' if raw else 'png'
+
+    with concurrent.futures.ThreadPoolExecutor(1) as encoder:
+        pending = None
+        for k, pixel in enumerate(pixels):
+            last_row = int(math.ceil((s_max - math.log(center * pixel)) / ds)) + 1
+            with row_chunks():
+                while computed <= last_row:
+                    slot = computed % strip.shape[0]
+                    # the band's spacing on its innermost circle
+                    dd = math.exp(s_max - (computed + BAND) * ds) * ds < dd_spacing
+                    exp_map_rows(mode, cx, cx_lo, cy, cy_lo, s_max, ds, computed, c, LIMIT, max_iter, dd,
+                                 strip[slot:slot + BAND])
+                    computed += BAND
+                    points += BAND * angles
+                values = np.empty((w, h), dtype=np.float64)
+                exp_map_frame(mode, strip, s_max, ds, cx, cx_lo, cy, cy_lo, pixel, center, c, LIMIT, max_iter,
+                              pixel < dd_spacing, values)
+            points += int(math.pi * center * center)
+            rows = packed_to_rows(parse_color_data(values, max_iter, palette))
+            if pending:
+                pending.result()
+            pending = encoder.submit(write_frame, os.path.join(out, 'frame_%05i.%s' % (k, ext)), rows, raw)
+        if pending:
+            pending.result()
+    return points
+
+
+def render_direct(out, mode, gx, gy, start_zoom, end_zoom, max_iter, c, w, h, frames, raw=False):
+    """
+    Renders the frames of a zoom one by one with escape_call, for comparison
+    Takes the same arguments as render_zoom()
+    :return: number of points computed
+    """
+    from escape_time import escape_call, parse_color_data, split_decimal
+    from pngwriter import packed_to_rows
+
+    palette = np.array(PALETTE, dtype=np.int32)
+    ext = 'raw' if raw else 'png'
+    for k, pixel in enumerate(frame_pixels(start_zoom, end_zoom, w, frames)):
+        zoom = (GRAPH_WIDTH / (pixel * w)) ** 2
+        corners = [split_decimal(corner) for corner in graph_corners(gx, gy, zoom, w, h)]
+        (bl_x, bl_x_lo), (bl_y, bl_y_lo), (tr_x, tr_x_lo), (tr_y, tr_y_lo) = corners
+        values = escape_call(mode, w, h, bl_x, bl_y, tr_x, tr_y, LIMIT, max_iter, c,
+                             bl_x_lo, bl_y_lo, tr_x_lo, tr_y_lo)
+        rows = packed_to_rows(parse_color_data(values, max_iter, palette))
+        write_frame(os.path.join(out, 'frame_%05i.%s' % (k, ext)), rows, raw)
+    return frames * w * h
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Renders a zoom into saved fractal coordinates to numbered frames')
+    parser.add_argument('-f', '--file', default='julia_graph_coords.txt', help='coords file')
+    parser.add_argument('-e', '--entry', type=int, default=0, help='entry to zoom into, numbered from 0')
+    parser.add_argument('-o', '--out', default='zoom', help='output directory')
+    parser.add_argument('-W', '--width', type=int, default=1280, help='frame width')
+    parser.add_argument('-H', '--height', type=int, default=720, help='frame height')
+    parser.add_argument('-n', '--frames', type=int, default=300, help='number of frames')
+    parser.add_argument('-z', '--start-zoom', type=float, default=1., help='total zoom of the first frame')
+    parser.add_argument('-r', '--radius', type=int, default=CENTER_RADIUS,
+                        help='radius in pixels of the central disk computed directly')
+    parser.add_argument('--raw', action='store_true', help='write raw RGB frames instead of PNGs')
+    parser.add_argument('--direct', action='store_true', help='render every frame directly')
+    args = parser.parse_args()
+
+    mode, gx, gy, zoom, max_iter, c = load_coords(args.file)[args.entry]
+    if mode not in range(8):
+        raise ValueError('mode %i has no exponential map kernels' % mode)
+    if zoom < args.start_zoom:
+        raise ValueError('the entry is zoomed out from the start zoom')
+    os.makedirs(args.out, exist_ok=True)
+    start = time.time()
+    if args.direct:
+        points = render_direct(args.out, mode, gx, gy, args.start_zoom, zoom, max_iter, c, args.width, args.height,
+                               args.frames, args.raw)
+    else:
+        points = render_zoom(args.out, mode, gx, gy, args.start_zoom, zoom, max_iter, c, args.width, args.height,
+                             args.frames, args.radius, args.raw)
+    seconds = time.time() - start
+    pixels = args.frames * args.width * args.height
+    print('%i frames in %.3f s (%.1f ms per frame)' % (args.frames, seconds, seconds * 1000 / args.frames))
+    print('%i points computed for %i pixels (%.1f%%)' % (points, pixels, points * 100 / pixels))
+
+
+if __name__ == '__main__':
+    main()
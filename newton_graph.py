@@ -32,19 +32,23 @@ from numba import jit, guvectorize
 import pyg
 
 
-@jit
+# strides of the progressive passes, the first image is at 1/8 resolution
+PASSES = [8, 4, 2, 1]
+
+
+@jit(cache=True)
 def f(z):
     #return z ** 4 - 1
     #return (z ** 2 + 1) * (z ** 2 - 5.29)
     return z ** 3 - 1
 
 
-@jit
+@jit(cache=True)
 def fprime(z):
     #return 4 * (z ** 3 - 2.145 * z)
     return 3 * z ** 2
 
-@jit
+@jit(cache=True)
 def get_root(guess, roots, palette):
     #'''
     root = roots[0]
@@ -107,7 +111,7 @@ def get_root(guess, roots, palette):
     return ((r & 0xff) << 16) | ((g & 0xff) << 8) | (b & 0xff)
 
 
-@guvectorize('(complex128[:], complex128[:], int32[:], float64[:], int32[:,:], int32[:])', '(),(n),(),(),(p,q)->()', target='parallel')
+@guvectorize('(complex128[:], complex128[:], int32[:], float64[:], int32[:,:], int32[:])', '(),(n),(),(),(p,q)->()', target='parallel', cache=True)
 def newtons(guess, roots, max_iter, tol, palette, output):
     a = -.5
     guess = guess[0]
@@ -125,7 +129,7 @@ def newtons(guess, roots, max_iter, tol, palette, output):
             output[0] = get_root(guess, roots, palette)
 
 
-@guvectorize('(complex128[:], complex128[:], int32[:])', '(),(n)->()', target='parallel')
+@guvectorize('(complex128[:], complex128[:], int32[:])', '(),(n)->()', target='parallel', cache=True)
 def parse_color_data(color_data, roots, output):
     color_data = color_data[0]
     if color_data == roots[0]:
@@ -151,24 +155,19 @@ def parse_color_data(color_data, roots, output):
     output[0] = ((r & 0xff) << 16) | ((g & 0xff) << 8) | (b & 0xff)
 
 
-@jit
-def vectorize_call(w, h, bl_x, bl_y, tr_x, tr_y, roots, max_iter, tol):
-    zr = np.linspace(bl_x, tr_x, w, dtype=np.float64, endpoint=False)
-    zi = np.linspace(bl_y, tr_y, h, dtype=np.float64, endpoint=False)
-    z = zr[:, None] + zi * 1j  # [x][y]
+def vectorize_call(z, roots, max_iter, tol):
     color_data = newtons(z, roots, max_iter, tol, np.array([[255, 0, 0], [255, 255, 0], [0, 255, 0]], dtype=np.int32))
     #return parse_color_data(color_data, roots)
     return color_data
 
 
-@jit('int32(int32, int32, int32)')
+@jit('int32(int32, int32, int32)', cache=True)
 def get_pos(x, y, w):
     return (y * w + x) * 3
 
 
-@jit
-def get_data(w, h, bl_x, bl_y, tr_x, tr_y, roots, max_iter, tol):
-    color_data = vectorize_call(w, h, bl_x, bl_y, tr_x, tr_y, roots, max_iter, tol)
+@jit(cache=True)
+def get_data(color_data, w, h):
     idx_max = w * h * 3
     colors = np.empty(idx_max, dtype=np.int32)
     for y in range(h):
@@ -182,8 +181,8 @@ def get_data(w, h, bl_x, bl_y, tr_x, tr_y, roots, max_iter, tol):
 
 
 class NewtonScreen(pyg.screen.GraphScreen):
-    def __init__(self, x, y, width, height, valset, zoom_valobj, bg = (255, 255, 255), visible = True):
-        super().__init__(x, y, width, height, 0, 0, 5, 5, valset, zoom_valobj, bg=bg, visible=visible)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.img = pyglet.image.ImageData(self.w, self.h, 'RGB', np.zeros(self.w * self.h * 3, dtype=np.ubyte).ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte)))
         #self.f = lambda x: x * (x - 1) * (x - 2)
         #self.fprime = lambda x: 3 * x * x - 6 * x + 2
@@ -198,19 +197,67 @@ class NewtonScreen(pyg.screen.GraphScreen):
             self.roots[3]: [0, 0, 255],
         }
         '''
+        # packed colors of the last frame, which of them aren't computed yet and where it was on the pixel lattice
+        self.color_data = None
+        self.todo = None
+        self.data_view = None
+        self.data_max_iter = 0
+        # progressive passes left for the current frame, see run_pass()
+        self.passes = []
+        self.z = None
+        self.pass_start = 0
 
     def render(self):
         """
         Renders the screen and creates an image with the pixel data
+        The image is rendered in progressive passes, the rest are scheduled by refine()
         """
+        pyglet.clock.unschedule(self.refine)
         #calc
         start = time.time()
-        bl_x, bl_y = self.on_plot(0, 0)
-        tr_x, tr_y = self.on_plot(self.w, self.h)
         max_iter = self.get_val('max_iter')
-        colors = get_data(self.w, self.h, bl_x, bl_y, tr_x, tr_y, self.roots, max_iter, 0.01)
+        view = self.lattice_view()
+        zr, zi = self.lattice_coords(view)
+        z = zr[:, None] + zi * 1j  # [x][y]
+        color_data = np.empty((self.w, self.h), dtype=np.int32)
+        # only the pixels that weren't on screen in the last frame are computed
+        todo = np.ones((self.w, self.h), dtype=bool)
+        if max_iter == self.data_max_iter:
+            overlap = self.lattice_overlap(self.data_view, self.color_data.shape[0], self.color_data.shape[1],
+                                           view, self.w, self.h)
+            if overlap:
+                new_index, old_index = overlap
+                color_data[new_index] = self.color_data[old_index]
+                todo[new_index] = self.todo[old_index]
+        self.color_data = color_data
+        self.todo = todo
+        self.data_view = view
+        self.data_max_iter = max_iter
+        self.z = z
+        self.passes = list(PASSES)
+        self.pass_start = start
+        self.run_pass()
         end = time.time()
+        self.valset.set_val('firsttime', ((end - start) * 1000))
         self.valset.set_val('calctime', ((end - start) * 1000))
+        if self.passes:
+            pyglet.clock.schedule_once(self.refine, 0)
+
+    def run_pass(self):
+        """
+        Computes the pixels of the next progressive pass that aren't computed yet and creates the image
+        Every computed pixel covers its stride x stride block until a finer pass reaches it
+        """
+        stride = self.passes.pop(0)
+        todo = np.zeros((self.w, self.h), dtype=bool)
+        todo[::stride, ::stride] = self.todo[::stride, ::stride]
+        self.color_data[todo] = vectorize_call(self.z[todo], self.roots, self.data_max_iter, 0.01)
+        self.todo[todo] = False
+        color_data = self.color_data
+        if stride > 1:
+            color_data = np.repeat(np.repeat(color_data[::stride, ::stride], stride, axis=0), stride, axis=1)
+            color_data = color_data[:self.w, :self.h]
+        colors = get_data(color_data, self.w, self.h)
 
         #flush
         start = time.time()
@@ -220,6 +267,16 @@ class NewtonScreen(pyg.screen.GraphScreen):
         end = time.time()
         self.valset.set_val('flushtime', ((end - start) * 1000))
 
+    def refine(self, dt):
+        """
+        Runs the next progressive pass, rescheduled until the frame is at full resolution
+        :param dt: time since it was scheduled
+        """
+        self.run_pass()
+        self.valset.set_val('calctime', ((time.time() - self.pass_start) * 1000))
+        if self.passes:
+            pyglet.clock.schedule_once(self.refine, 0)
+
     def draw(self):
         """
         Draws the image created in render()
@@ -239,10 +296,11 @@ class NewtonWindow(pyg.window.Window):
         self.valset.add_float_value('gz', .5, limit='ul', inclusive='', low=0, high=1)
         self.add_float_field('zoomfield', 150, 120, 120, 15, 'Zoom Ratio', self.get_valobj('gz'))
         self.valset.add_float_value('calctime', 0.0)
+        self.valset.add_float_value('firsttime', 0.0)
         self.valset.add_float_value('flushtime', 0.0)
         self.valset.add_int_value('max_iter', 40, limit='l', low=1)
 
-        main = NewtonScreen(0, 200, 500, 500, self.valset, self.get_valobj('gz'))
+        main = NewtonScreen(self, 0, 200, 500, 500, 0, 0, 5, 5, 'gz')
         self.add_screen('main', main)
 
         self.add_button('resetb', 10, 10, 40, 15, 'Reset(r)', self.reset)
@@ -255,7 +313,7 @@ class NewtonWindow(pyg.window.Window):
         self.add_label('bottomlabel', 10, 210, '%.5f' % self.get_screen('main').min_gy, color=(255, 0, 255))
         self.add_label('zoomlabel', self.width * 3 // 5, 180, 'Zoom: %.5E' % self.get_screen('main').total_zoom)
 
-        self.add_label('calclabel', self.width - 140, 170, '  calc time: %.3f' % self.valset.get_val('calctime'), color=(0, 240, 120))
+        self.add_label('calclabel', self.width - 140, 170, '  calc time: %.1f/%.1f' % (self.valset.get_val('firsttime'), self.valset.get_val('calctime')), color=(0, 240, 120))
         self.add_label('flushlabel', self.width - 140, 155, ' flush time: %.3f' % self.valset.get_val('flushtime'), color=(0, 240, 120))
 
     def reset(self):
@@ -271,7 +329,9 @@ class NewtonWindow(pyg.window.Window):
         self.get_label('zoomlabel').set_pos(self.width * 3 // 5, 180)
         self.get_label('zoomlabel').set_text('Zoom: %.5E' % self.get_screen('main').total_zoom)
 
-        self.labels['calclabel'].set_text('  calc time: %.3f ms' % self.valset.get_val('calctime'))
+        # time to the first progressive pass / time to the full resolution image
+        self.labels['calclabel'].set_text('  calc time: %.1f/%.1f ms' % (self.valset.get_val('firsttime'),
+                                                                         self.valset.get_val('calctime')))
         self.labels['calclabel'].set_pos(self.width - 140, 165)
         self.labels['flushlabel'].set_text(' flush time: %.3f ms' % self.valset.get_val('flushtime'))
         self.labels['flushlabel'].set_pos(self.width - 140, 150)
@@ -2,6 +2,10 @@
 Defines screens for drawing objects.
 """
 
+import decimal as _decimal
+import math as _math
+
+import numpy as _np
 import pyglet.graphics as _graphics
 import pyglet.window as _win
 
@@ -589,6 +593,8 @@ class GraphScreen(Screen2D):
     :var active: if the screen is updated
     :var gx: graph's center x coord
     :var gy: graph's center y coord
+    :var pgx: graph's center x coord as a decimal, precise at any zoom
+    :var pgy: graph's center y coord as a decimal, precise at any zoom
     :var gw: graph's width
     :var gh: graph's height
     :var min_gx: graph's minimum gx drawn
@@ -628,6 +634,8 @@ class GraphScreen(Screen2D):
         :type active: bool
         :param active: determines if the screen is updated
         """
+        # origin and pixel size of the pixel lattice, see lattice_view
+        self._lattice = None
         self.set_graph_coords(gx, gy, gw, gh)
         self._set_graph_minmax()
         self.reset_to(gx, gy, gw, gh)
@@ -649,6 +657,134 @@ class GraphScreen(Screen2D):
         self.min_gy = self.gy - self.gh / 2
         self.max_gy = self.gy + self.gh / 2
 
+    def set_center(self, gx, gy):
+        """
+        Sets the graph center.
+        Strings and decimals keep their full precision in pgx and pgy.
+
+        :type gx: float or str or Decimal
+        :param gx: graph center x
+        :type gy: float or str or Decimal
+        :param gy: graph center y
+        """
+        self.pgx = _decimal.Decimal(gx)
+        self.pgy = _decimal.Decimal(gy)
+        self.gx = float(self.pgx)
+        self.gy = float(self.pgy)
+
+    def move_center(self, dx, dy):
+        """
+        Moves the graph center without losing precision at deep zooms.
+
+        :type dx: float
+        :param dx: change in graph center x
+        :type dy: float
+        :param dy: change in graph center y
+        """
+        ctx = _decimal.Context(prec=self.graph_precision())
+        self.set_center(ctx.add(self.pgx, _decimal.Decimal(dx)), ctx.add(self.pgy, _decimal.Decimal(dy)))
+
+    def lattice_view(self):
+        """
+        Places the current view on a pixel lattice shared with the previous views.
+        Pixel i of the view is at origin_x + (kx + i) * step_x with step_x = base_x * 2 ** -level,
+        so pans by whole pixels and zooms by powers of 2 put pixels on the exact same floats as before.
+        The lattice restarts at the current view when the view is not aligned with it.
+
+        :rtype: tuple
+        :return: origin_x, origin_y, base_x, base_y, kx, ky, level
+        """
+        step_x = self.gw / self.w
+        step_y = self.gh / self.h
+        bl_x, bl_y = self.on_plot(0, 0)
+        if self._lattice:
+            origin_x, origin_y, base_x, base_y = self._lattice
+            level = round(_math.log2(base_x / step_x))
+            lstep_x = base_x * 2.0 ** -level
+            lstep_y = base_y * 2.0 ** -level
+            if abs(lstep_x - step_x) <= 1e-9 * step_x and abs(lstep_y - step_y) <= 1e-9 * step_y:
+                kx = round((bl_x - origin_x) / lstep_x)
+                ky = round((bl_y - origin_y) / lstep_y)
+                # the view is allowed to be off by rounding errors of the graph center
+                if abs(origin_x + kx * lstep_x - bl_x) <= 1e-3 * lstep_x and \
+                        abs(origin_y + ky * lstep_y - bl_y) <= 1e-3 * lstep_y:
+                    return origin_x, origin_y, base_x, base_y, kx, ky, level
+        self._lattice = (bl_x, bl_y, step_x, step_y)
+        return bl_x, bl_y, step_x, step_y, 0, 0, 0
+
+    def lattice_coords(self, view):
+        """
+        Returns the graph coordinates of the columns and rows of a lattice view.
+        For a view at kx = ky = level = 0 they are the same as linspace(min, max, w, endpoint=False).
+
+        :type view: tuple
+        :param view: view returned by lattice_view
+        :rtype: list(ndarray * 2)
+        :return: x coords and y coords
+        """
+        origin_x, origin_y, base_x, base_y, kx, ky, level = view
+        xs = origin_x + (kx + _np.arange(self.w)) * (base_x * 2.0 ** -level)
+        ys = origin_y + (ky + _np.arange(self.h)) * (base_y * 2.0 ** -level)
+        return xs, ys
+
+    @staticmethod
+    def lattice_overlap(old_view, old_w, old_h, new_view, new_w, new_h):
+        """
+        Finds the pixels of a new view that land exactly on pixels of an old view of the same lattice.
+        Per pixel data is carried over with new_data[new_index] = old_data[old_index].
+
+        :type old_view: tuple
+        :param old_view: old view returned by lattice_view
+        :type old_w: int
+        :param old_w: old width
+        :type old_h: int
+        :param old_h: old height
+        :type new_view: tuple
+        :param new_view: new view returned by lattice_view
+        :type new_w: int
+        :param new_w: new width
+        :type new_h: int
+        :param new_h: new height
+        :rtype: list(tuple * 2) or None
+        :return: new index and old index for [x][y] arrays, or None if nothing overlaps
+        """
+        if old_view is None or old_view[:4] != new_view[:4]:
+            return None
+        shift = old_view[6] - new_view[6]
+        # far away levels never share pixels on screen
+        if abs(shift) > 30:
+            return None
+
+        def overlap(old_k, old_n, new_k, new_n):
+            # lattice indices of the new pixels in units of the old pixels
+            ks = new_k + _np.arange(new_n, dtype=_np.int64)
+            if shift >= 0:
+                valid = _np.ones(new_n, dtype=bool)
+                ks = ks << shift
+            else:
+                valid = ks % (1 << -shift) == 0
+                ks = ks >> -shift
+            ks -= old_k
+            valid &= (ks >= 0) & (ks < old_n)
+            new_index = _np.nonzero(valid)[0]
+            return new_index, ks[new_index]
+
+        new_x, old_x = overlap(old_view[4], old_w, new_view[4], new_w)
+        new_y, old_y = overlap(old_view[5], old_h, new_view[5], new_h)
+        if not new_x.shape[0] or not new_y.shape[0]:
+            return None
+        return _np.ix_(new_x, new_y), _np.ix_(old_x, old_y)
+
+    def graph_precision(self, gw=None):
+        """
+        Returns the number of decimal digits needed to keep the graph center well below a pixel.
+
+        :type gw: float
+        :param gw: graph width, defaults to the current one
+        :rtype: int
+        """
+        return max(28, 24 - int(_math.log10(gw or self.gw)))
+
     def reset_screen(self):
         """
         Resets the graph to its original view and renders the screen.
@@ -661,8 +797,7 @@ class GraphScreen(Screen2D):
         """
         Only resets the graph to its original view. Does not render the screen.
         """
-        self.gx = self._ogx
-        self.gy = self._ogy
+        self.set_center(self._ogx, self._ogy)
         self.gw = self._ogw * (self.w / self._ow)
         self.gh = self._ogh * (self.h / self._oh)
         self._set_graph_minmax()
@@ -699,8 +834,7 @@ class GraphScreen(Screen2D):
         :type gh: float
         :param gh: graph height
         """
-        self.gx = gx
-        self.gy = gy
+        self.set_center(gx, gy)
         self.gw = gw
         self.gh = gh
 
@@ -708,19 +842,55 @@ class GraphScreen(Screen2D):
         """
         Sets the graph coordinates given the center and a zoom with respect to the original coordinates.
 
-        :type gx: float
+        :type gx: float or str or Decimal
         :param gx: graph center x
-        :type gy: float
+        :type gy: float or str or Decimal
         :param gy: graph center y
         :type zoom: float
         :param zoom: graph zoom
         """
-        self.gx = gx
-        self.gy = gy
+        self.set_center(gx, gy)
         self.total_zoom = zoom
+        self.gw, self.gh = self.zoom_size(zoom)
+
+    def zoom_size(self, zoom):
+        """
+        Returns the graph size of a zoom with respect to the original coordinates.
+
+        :type zoom: float
+        :param zoom: graph zoom
+        :rtype: list(float * 2)
+        :return: graph width and height
+        """
         sqrt_z = zoom ** .5
-        self.gw = self._ogw / sqrt_z
-        self.gh = self.gw * self.h / self.w
+        gw = self._ogw / sqrt_z
+        return gw, gw * self.h / self.w
+
+    def view_coords(self, gx, gy, zoom):
+        """
+        Returns the corners and the pixel coordinates of a view without changing the current one.
+        They are the same as on_plot_precise and lattice_coords give after set_graph_view(gx, gy, zoom) when the
+        lattice restarts at the view.
+
+        :type gx: float or str or Decimal
+        :param gx: graph center x
+        :type gy: float or str or Decimal
+        :param gy: graph center y
+        :type zoom: float
+        :param zoom: graph zoom
+        :rtype: tuple
+        :return: bl_x, bl_y, tr_x, tr_y as decimals, x coords and y coords
+        """
+        pgx, pgy = _decimal.Decimal(gx), _decimal.Decimal(gy)
+        gw, gh = self.zoom_size(zoom)
+        ctx = _decimal.Context(prec=self.graph_precision(gw))
+        bl_x = ctx.add(pgx, _decimal.Decimal(-gw / 2))
+        bl_y = ctx.add(pgy, _decimal.Decimal(-gh / 2))
+        tr_x = ctx.add(pgx, _decimal.Decimal(self.w * gw / self.w - gw / 2))
+        tr_y = ctx.add(pgy, _decimal.Decimal(self.h * gh / self.h - gh / 2))
+        xs = (float(pgx) - gw / 2) + _np.arange(self.w) * (gw / self.w)
+        ys = (float(pgy) - gh / 2) + _np.arange(self.h) * (gh / self.h)
+        return bl_x, bl_y, tr_x, tr_y, xs, ys
 
     def resize(self, width, height):
         """
@@ -802,7 +972,7 @@ class GraphScreen(Screen2D):
         """
         Moves the graph center up.
         """
-        self.gy += self.gh / 5
+        self.move_center(0, self.gh / 5)
         self._set_graph_minmax()
         self.set_bg(self.bg)
         self.render()
@@ -811,7 +981,7 @@ class GraphScreen(Screen2D):
         """
         Moves the graph center down.
         """
-        self.gy -= self.gh / 5
+        self.move_center(0, -self.gh / 5)
         self._set_graph_minmax()
         self.set_bg(self.bg)
         self.render()
@@ -820,7 +990,7 @@ class GraphScreen(Screen2D):
         """
         Moves the graph center left.
         """
-        self.gx -= self.gw / 5
+        self.move_center(-self.gw / 5, 0)
         self._set_graph_minmax()
         self.set_bg(self.bg)
         self.render()
@@ -829,7 +999,7 @@ class GraphScreen(Screen2D):
         """
         Moves the graph center right.
         """
-        self.gx += self.gw / 5
+        self.move_center(self.gw / 5, 0)
         self._set_graph_minmax()
         self.set_bg(self.bg)
         self.render()
@@ -861,6 +1031,22 @@ class GraphScreen(Screen2D):
         """
         return x * self.gw / self.w + self.gx - self.gw / 2, y * self.gh / self.h + self.gy - self.gh / 2
 
+    def on_plot_precise(self, x, y):
+        """
+        Transforms a point on the screen to the corresponding point on the graph as decimals.
+        Keeps the precision of pgx and pgy at deep zooms.
+
+        :type x: float
+        :param x: screen x
+        :type y: float
+        :param y: screen y
+        :rtype: list(Decimal * 2)
+        :return: the point on the graph
+        """
+        ctx = _decimal.Context(prec=self.graph_precision())
+        return (ctx.add(self.pgx, _decimal.Decimal(x * self.gw / self.w - self.gw / 2)),
+                ctx.add(self.pgy, _decimal.Decimal(y * self.gh / self.h - self.gh / 2)))
+
     def mouse_drag(self, x, y, dx, dy, buttons, modifiers):
         if self.drag:
             self.offsx = x - self.mdownx
@@ -874,16 +1060,14 @@ class GraphScreen(Screen2D):
 
     def mouse_up(self, x, y, button, modifiers):
         if button == _win.mouse.LEFT:
-            self.gx = self.gx - self.gw / 2 + x * self.gw / self.w
-            self.gy = self.gy - self.gh / 2 + y * self.gh / self.h
+            self.move_center(x * self.gw / self.w - self.gw / 2, y * self.gh / self.h - self.gh / 2)
             self.gw *= self.zoom_valobj.value
             self.gh *= self.zoom_valobj.value
             self._set_graph_minmax()
             self.total_zoom *= (1 / self.zoom_valobj.value) ** 2
             # print('zoomed to %.5f,%.5f with size %.9f,%.9f' % (self.gx, self.gy, self.gw, self.gh))
         elif button == _win.mouse.RIGHT:
-            self.gx = self.gx - self.gw / 2 + x * self.gw / self.w
-            self.gy = self.gy - self.gh / 2 + y * self.gh / self.h
+            self.move_center(x * self.gw / self.w - self.gw / 2, y * self.gh / self.h - self.gh / 2)
             self.gw /= self.zoom_valobj.value
             self.gh /= self.zoom_valobj.value
             self._set_graph_minmax()
@@ -893,8 +1077,7 @@ class GraphScreen(Screen2D):
             self.drag = False
             msx1, msy1 = self.on_plot(self.mdownx, self.mdowny)
             msx2, msy2 = self.on_plot(x, y)
-            self.gx -= msx2 - msx1
-            self.gy -= msy2 - msy1
+            self.move_center(msx1 - msx2, msy1 - msy2)
             self._set_graph_minmax()
             self.offsx = 0
             self.offsy = 0